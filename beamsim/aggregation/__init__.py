@@ -9,9 +9,11 @@ and aggregation logic needed for the BEAM Chain network simulation.
 from beamsim.aggregation.signature import Signature
 from beamsim.aggregation.snark import SNARKProof
 from beamsim.aggregation.aggregator import AggregationLogic
+from beamsim.aggregation.bitfield import ParticipationBitfield
 
 __all__ = [
     'Signature',
     'SNARKProof',
     'AggregationLogic',
+    'ParticipationBitfield',
 ]
\ No newline at end of file
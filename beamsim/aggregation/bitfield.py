@@ -0,0 +1,271 @@
+"""
+Participation bitfields for the BEAMSim discrete-event simulation engine.
+
+This module defines the ParticipationBitfield class, which records the
+validators whose signatures an aggregate covers, and computes the size of
+the bitfield on the wire under three encodings:
+
+- "raw": one bit per validator between the first and the last byte in use.
+- "rle": alternating runs of zeros and ones, each length as a LEB128 varint.
+- "roaring": 65536-bit containers stored as a sorted array of 16-bit
+  offsets, a plain bitmap or a list of runs, whichever is smallest.
+
+"auto" picks the smallest of the three, as an encoder choosing per message would.
+"""
+
+import numpy as np
+
+ENCODINGS = ("raw", "rle", "roaring")
+
+_HEADER_SIZE = 8  # Offset and length of the bitfield, 4 bytes each
+_CONTAINER_BITS = 1 << 16
+_CONTAINER_BYTES = _CONTAINER_BITS // 8
+_CONTAINER_HEADER_SIZE = 4  # 16-bit container key and 16-bit cardinality
+_ARRAY_CONTAINER_MAX = 4096
+
+
+def varint_sizes(values):
+    """
+    Get the LEB128 encoded size of every value.
+
+    Args:
+        values (numpy.ndarray): Non-negative integers.
+
+    Returns:
+        numpy.ndarray: Encoded size of each value (in bytes).
+    """
+    values = np.asarray(values, dtype=np.int64)
+    sizes = np.ones(len(values), dtype=np.int64)
+    for threshold in (1 << 7, 1 << 14, 1 << 21, 1 << 28, 1 << 35):
+        sizes += values >= threshold
+    return sizes
+
+
+class ParticipationBitfield:
+    """
+    A class representing the set of validators covered by an aggregate.
+
+    Bits are stored in a growable bytearray starting at a byte-aligned
+    validator id `offset`, so a subnet's bitfield only spans its own ids.
+    Encoded sizes are computed on first request and cached until the next
+    mutation.
+    """
+
+    __slots__ = ("offset", "encoding", "_bits", "_zeros", "_sizes")
+
+    def __init__(self, offset=0, encoding="auto"):
+        """
+        Initialize an empty bitfield.
+
+        Args:
+            offset (int): Lowest validator id the bitfield will hold (rounded down to a multiple of 8).
+            encoding (str): Default encoding of `encoded_size`: one of ENCODINGS or "auto".
+        """
+        if encoding != "auto" and encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+        self.offset = offset & ~7
+        self.encoding = encoding
+        self._bits = bytearray()
+        self._zeros = b""
+        self._sizes = {}
+
+    def set(self, validator_id):
+        """
+        Mark a validator as participating, growing the bitfield on first use only.
+
+        Args:
+            validator_id (int): The validator's id.
+        """
+        bit = validator_id - self.offset
+        if bit < 0:
+            self._grow_front(bit)
+            bit = validator_id - self.offset
+        byte_index = bit >> 3
+        if byte_index >= len(self._bits):
+            self._bits.extend(bytes(byte_index + 1 - len(self._bits)))
+            self._zeros = bytes(len(self._bits))
+        self._bits[byte_index] |= 1 << (bit & 7)
+        self._sizes.clear()
+
+    def __contains__(self, validator_id):
+        """
+        Check whether a validator is marked.
+
+        Args:
+            validator_id (int): The validator's id.
+
+        Returns:
+            bool: True if the validator participates.
+        """
+        bit = validator_id - self.offset
+        byte_index = bit >> 3
+        return 0 <= bit and byte_index < len(self._bits) and bool(self._bits[byte_index] & (1 << (bit & 7)))
+
+    def count(self):
+        """
+        Get the number of participating validators.
+
+        Returns:
+            int: The population count of the bitfield.
+        """
+        return int.from_bytes(self._bits, "little").bit_count()
+
+    def clear(self):
+        """
+        Unmark every validator, keeping the allocated bytes.
+        """
+        self._bits[:] = self._zeros
+        self._sizes.clear()
+
+    def copy(self):
+        """
+        Get an independent copy, e.g. to attach to a proof while this one keeps changing.
+
+        Returns:
+            ParticipationBitfield: The copy.
+        """
+        other = ParticipationBitfield(self.offset, self.encoding)
+        other._bits = bytearray(self._bits)
+        other._zeros = self._zeros
+        return other
+
+    def union_update(self, other):
+        """
+        Add every validator marked in another bitfield.
+
+        Args:
+            other (ParticipationBitfield): The bitfield to merge.
+
+        Returns:
+            int: Number of validators that were not marked before.
+        """
+        if not other._bits:
+            return 0
+        if other.offset < self.offset:
+            self._grow_front(other.offset - self.offset)
+        shift = (other.offset - self.offset) >> 3
+        end = shift + len(other._bits)
+        if end > len(self._bits):
+            self._bits.extend(bytes(end - len(self._bits)))
+            self._zeros = bytes(len(self._bits))
+        before = int.from_bytes(self._bits[shift:end], "little").bit_count()
+        merged = (np.frombuffer(self._bits, dtype=np.uint8)[shift:end] | np.frombuffer(other._bits, dtype=np.uint8)).tobytes()
+        self._bits[shift:end] = merged
+        self._sizes.clear()
+        return int.from_bytes(merged, "little").bit_count() - before
+
+    def union(self, other):
+        """
+        Get the union of two bitfields.
+
+        Args:
+            other (ParticipationBitfield): The other bitfield.
+
+        Returns:
+            ParticipationBitfield: A new bitfield with the validators of both.
+        """
+        result = self.copy()
+        result.union_update(other)
+        return result
+
+    def _grow_front(self, bit):
+        """
+        Move the offset down so that a negative bit position fits.
+
+        Args:
+            bit (int): The (negative) bit position relative to the current offset.
+        """
+        extra = (-bit + 7) >> 3
+        self._bits[0:0] = bytes(extra)
+        self._zeros = bytes(len(self._bits))
+        self.offset -= extra * 8
+
+    def encoded_size(self, encoding=None):
+        """
+        Get the size of the bitfield on the wire, computing it only once per mutation.
+
+        Args:
+            encoding (str, optional): One of ENCODINGS or "auto". Defaults to `self.encoding`.
+
+        Returns:
+            int: Encoded size (in bytes).
+        """
+        encoding = encoding or self.encoding
+        size = self._sizes.get(encoding)
+        if size is None:
+            if encoding == "auto":
+                size = min(self.encoded_size(name) for name in ENCODINGS)
+            elif encoding == "raw":
+                # Zero bytes at both ends are left out; the header's offset and length place the rest
+                size = _HEADER_SIZE + len(self._bits.strip(b"\0"))
+            elif encoding == "rle":
+                size = _HEADER_SIZE + 1 + int(varint_sizes(self._runs()).sum())
+            elif encoding == "roaring":
+                size = self._roaring_size()
+            else:
+                raise ValueError(f"Unsupported encoding: {encoding}")
+            self._sizes[encoding] = size
+        return size
+
+    def _bit_array(self):
+        """
+        Get the bits as a boolean array, trimmed after the last set bit.
+
+        Returns:
+            numpy.ndarray: One boolean per validator id from `offset`.
+        """
+        bits = np.unpackbits(np.frombuffer(self._bits, dtype=np.uint8), bitorder="little")
+        set_bits = np.flatnonzero(bits)
+        return bits[:set_bits[-1] + 1].view(bool) if len(set_bits) else bits[:0].view(bool)
+
+    def _runs(self):
+        """
+        Get the lengths of the alternating runs, starting with a (possibly empty) zero run.
+
+        Returns:
+            numpy.ndarray: Run lengths.
+        """
+        bits = self._bit_array()
+        if not len(bits):
+            return np.zeros(0, dtype=np.int64)
+        boundaries = np.flatnonzero(bits[1:] != bits[:-1]) + 1
+        runs = np.diff(np.concatenate(([0], boundaries, [len(bits)])))
+        return runs if not bits[0] else np.concatenate(([0], runs))
+
+    def _roaring_size(self):
+        """
+        Get the size of the roaring-style encoding.
+
+        Returns:
+            int: Encoded size (in bytes).
+        """
+        bits = self._bit_array()
+        padded = np.zeros(-(-len(bits) // _CONTAINER_BITS) * _CONTAINER_BITS, dtype=bool)
+        padded[:len(bits)] = bits
+        containers = padded.reshape(-1, _CONTAINER_BITS)
+        cardinality = containers.sum(axis=1)
+        # A run of ones starts wherever a set bit follows an unset one (or opens the container)
+        run_starts = containers[:, 0].astype(np.int64) + (containers[:, 1:] & ~containers[:, :-1]).sum(axis=1)
+        array_size = np.where(cardinality <= _ARRAY_CONTAINER_MAX, 2 * cardinality, _CONTAINER_BYTES)
+        run_size = 2 + 4 * run_starts
+        sizes = np.minimum(np.minimum(array_size, run_size), _CONTAINER_BYTES)
+        used = cardinality > 0
+        return _HEADER_SIZE + int((sizes[used] + _CONTAINER_HEADER_SIZE).sum())
+
+    def __len__(self):
+        """
+        Get the number of validator ids the bitfield spans.
+
+        Returns:
+            int: Number of bits allocated.
+        """
+        return len(self._bits) * 8
+
+    def __repr__(self):
+        """
+        Return a string representation of the bitfield.
+
+        Returns:
+            str: A string describing the bitfield.
+        """
+        return f"ParticipationBitfield(offset={self.offset}, count={self.count()}, encoding={self.encoding})"
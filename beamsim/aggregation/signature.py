@@ -8,8 +8,13 @@ and behavior of post-quantum signatures in the network simulation.
 class Signature:
     """
     A class representing a post-quantum signature in the simulation.
+
+    Signatures are immutable once created, so one instance per validator is
+    shared as the payload of every message that carries it.
     """
 
+    __slots__ = ("validator_id", "size", "data")
+
     def __init__(self, validator_id, size, data=None):
         """
         Initialize a signature.
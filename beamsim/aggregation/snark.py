@@ -8,9 +8,13 @@ and behavior of SNARK proofs in the network simulation.
 class SNARKProof:
     """
     A class representing a SNARK proof in the simulation.
+
+    A proof is shared, unmodified, by every recipient of the messages carrying it.
     """
 
-    def __init__(self, aggregator_id, proof_size, num_signatures, metadata=None):
+    __slots__ = ("aggregator_id", "proof_size", "num_signatures", "metadata", "participation")
+
+    def __init__(self, aggregator_id, proof_size, num_signatures, metadata=None, participation=None):
         """
         Initialize a SNARK proof.
 
@@ -19,11 +23,25 @@ class SNARKProof:
             proof_size (int): The size of the SNARK proof in bytes.
             num_signatures (int): The number of signatures aggregated into this proof.
             metadata (dict, optional): Additional metadata for the proof (default is None).
+            participation (ParticipationBitfield, optional): Validators covered by the proof.
         """
         self.aggregator_id = aggregator_id
         self.proof_size = proof_size
         self.num_signatures = num_signatures
         self.metadata = metadata or {}
+        self.participation = participation
+
+    @property
+    def wire_size(self):
+        """
+        Size of the proof on the wire: the proof itself plus its encoded participation bitfield.
+
+        Returns:
+            int: Size in bytes.
+        """
+        if self.participation is None:
+            return self.proof_size
+        return self.proof_size + self.participation.encoded_size()
 
     def __repr__(self):
         """
@@ -11,12 +11,19 @@ for nodes and messages.
 from beamsim.core.simulator import Simulator
 from beamsim.core.event import Event, EventQueue
 from beamsim.core.node import Node
-from beamsim.core.message import Message
+from beamsim.core.message import Message, MessagePool
+from beamsim.core.slot_driver import SlotDriver
+from beamsim.core.profiler import EngineProfiler
+from beamsim.core.trace import CausalTrace
 
 __all__ = [
+    'CausalTrace',
+    'EngineProfiler',
     'Simulator',
     'Event',
     'EventQueue',
     'Node',
     'Message',
+    'MessagePool',
+    'SlotDriver',
 ]
\ No newline at end of file
@@ -8,6 +8,8 @@ events and the EventQueue class to manage a priority queue of events.
 import heapq
 
 class Event:
+    __slots__ = ("timestamp", "callback", "args", "kwargs")
+
     def __init__(self, timestamp, callback, *args, **kwargs):
         """
         Initialize an event.
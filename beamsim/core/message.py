@@ -2,24 +2,39 @@
 Message class for the BEAMSim discrete-event simulation engine.
 
 This module provides the base Message class, which represents a generic
-message exchanged between nodes in the network simulation.
+message exchanged between nodes in the network simulation, and the
+MessagePool class, an optional free list that recycles delivered messages.
 """
 
 class Message:
-    def __init__(self, sender, recipient, timestamp, payload):
+    __slots__ = ("sender", "recipient", "timestamp", "payload", "slot", "pending", "message_id")
+
+    def __init__(self, sender, recipient=None, timestamp=None, payload=None, slot=0, message_id=-1):
         """
         Initialize a message.
 
+        The payload is treated as immutable, so a single payload object (for
+        example a validator's `Signature`) can be shared by every message and
+        recipient that carries it.
+
         Args:
-            sender (Node): The node sending the message.
-            recipient (Node): The node receiving the message.
-            timestamp (int): The time the message is sent.
-            payload (dict): The content of the message.
+            sender (Node): The node sending the message, or None for validators
+                without a Node object (see ValidatorPopulation).
+            recipient (Node, optional): The node receiving the message, or None
+                when the same message is delivered to several recipients.
+            timestamp (int, optional): The time the message is sent.
+            payload (optional): The content of the message.
+            slot (int): The slot the message belongs to.
+            message_id (int): Identifier of the message, unique within a run when
+                assigned by `Simulator.create_message`; -1 otherwise.
         """
         self.sender = sender
         self.recipient = recipient
         self.timestamp = timestamp
         self.payload = payload
+        self.slot = slot
+        self.pending = 0  # Deliveries left before a pooled message is recycled
+        self.message_id = message_id
 
     def __repr__(self):
         """
@@ -28,7 +43,62 @@ class Message:
         Returns:
             str: A string describing the message.
         """
-        return (f"Message(sender={self.sender.node_id}, "
-                f"recipient={self.recipient.node_id}, "
+        sender_id = self.sender.node_id if self.sender is not None else None
+        recipient_id = self.recipient.node_id if self.recipient is not None else None
+        return (f"Message(sender={sender_id}, "
+                f"recipient={recipient_id}, "
                 f"timestamp={self.timestamp}, "
-                f"payload={self.payload})")
\ No newline at end of file
+                f"slot={self.slot}, "
+                f"payload={self.payload})")
+
+
+class MessagePool:
+    """
+    A free list of Message objects reused across deliveries.
+
+    A pooled message records how many deliveries are still pending; the
+    simulator returns it to the pool after the last one, so recipients must
+    not keep references to the message itself (keeping the payload is fine).
+    """
+
+    def __init__(self):
+        """Initialize an empty pool."""
+        self.free = []
+        self.created = 0
+
+    def acquire(self, sender, payload, timestamp, slot, recipients):
+        """
+        Get a message from the pool, creating one only if the pool is empty.
+
+        Args:
+            sender (Node): The node sending the message.
+            payload: The (shared, immutable) content of the message.
+            timestamp (int): The time the message is sent.
+            slot (int): The slot the message belongs to.
+            recipients (int): Number of deliveries before the message is recycled.
+
+        Returns:
+            Message: A message ready to be delivered.
+        """
+        if self.free:
+            message = self.free.pop()
+            message.sender = sender
+            message.timestamp = timestamp
+            message.payload = payload
+            message.slot = slot
+        else:
+            message = Message(sender, None, timestamp, payload, slot)
+            self.created += 1
+        message.pending = recipients
+        return message
+
+    def release(self, message):
+        """
+        Return a fully delivered message to the pool.
+
+        Args:
+            message (Message): The message to recycle.
+        """
+        message.sender = None
+        message.payload = None
+        self.free.append(message)
@@ -6,6 +6,9 @@ participant in the network simulation.
 """
 
 class Node:
+    # Number of slots whose state a node keeps: the current one and the one before it
+    SLOT_HISTORY = 2
+
     def __init__(self, node_id, simulator):
         """
         Initialize a node.
@@ -18,6 +21,8 @@ class Node:
         self.simulator = simulator
         self.state = {}
         self.neighbors = []
+        self.slot = 0
+        self.slot_states = ()  # SLOT_HISTORY per-slot states of subclasses that keep any
 
     def add_neighbor(self, neighbor):
         """
@@ -28,26 +33,79 @@ class Node:
         """
         self.neighbors.append(neighbor)
 
+    def get_connected_nodes(self):
+        """
+        Get the nodes this node sends to.
+
+        Returns:
+            list[Node]: The neighboring nodes.
+        """
+        return self.neighbors
+
+    def reset_slot(self, slot):
+        """
+        Prepare the node for a new slot.
+
+        Per-slot state belongs in `slot_states` rather than on the node, so
+        that work of the previous slot still in flight is not lost when the
+        first message of a newer slot arrives.
+
+        Args:
+            slot (int): The slot that is starting.
+        """
+        self.slot = slot
+
+    def slot_state(self, slot):
+        """
+        Get the state of a slot, reusing the buffers of an older slot's state for a newer one.
+
+        Slot s uses entry s % SLOT_HISTORY of `slot_states`, whose objects
+        have a `slot` attribute and a `reset(slot)` method, so the state of
+        a slot is kept until a slot SLOT_HISTORY later starts, and long
+        multi-slot runs keep a flat memory profile.
+
+        Args:
+            slot (int): The slot of a received message.
+
+        Returns:
+            object | None: The slot's state, or None for a slot older than every retained one.
+        """
+        state = self.slot_states[slot % self.SLOT_HISTORY]
+        if state.slot != slot:
+            if slot <= self.slot - self.SLOT_HISTORY:
+                return None
+            self.open_slot_state(state, slot)
+            if slot > self.slot:
+                self.reset_slot(slot)
+        return state
+
+    def open_slot_state(self, state, slot):
+        """
+        Reuse a per-slot state for a slot that just started at this node.
+
+        Args:
+            state: The state of the oldest retained slot.
+            slot (int): The newer slot.
+        """
+        state.reset(slot)
+
     def send_message(self, recipient, message, delay=0):
         """
         Send a message to a recipient.
 
         Args:
             recipient (Node): The recipient node.
-            message (dict): The message to send.
+            message (Message): The message to send.
             delay (int): Delay (in simulation time) before the message is delivered.
         """
-        def deliver_message():
-            recipient.receive_message(self, message)
-        self.simulator.schedule_event(self.simulator.current_time + delay, deliver_message)
+        self.simulator.schedule_delivery(self.simulator.current_time + delay, recipient, message)
 
-    def receive_message(self, sender, message):
+    def receive_message(self, message):
         """
         Handle an incoming message.
 
         Args:
-            sender (Node): The node that sent the message.
-            message (dict): The received message.
+            message (Message): The received message; `message.sender` is the sending node.
         """
         raise NotImplementedError("Subclasses must implement this method.")
 
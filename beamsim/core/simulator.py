@@ -6,13 +6,45 @@ queue and processes events in a time-ordered manner.
 """
 
 import heapq
+import itertools
+
+import numpy as np
+
+from beamsim.core.message import Message
+
+# Marker stored in the callback position of message delivery entries. A
+# delivery entry is (time, sequence, DELIVER, recipient, message), so sending
+# a message allocates no closure, bound method or keyword dictionary.
+DELIVER = object()
+
 
 class Simulator:
-    def __init__(self):
-        """Initialize the simulator with an empty event queue and clock."""
+    def __init__(self, latency_model=None, random_generator=None, message_pool=None, progress=None):
+        """
+        Initialize the simulator with an empty event queue and clock.
+
+        Args:
+            latency_model (LatencyModel, optional): Latency model used by nodes to delay messages.
+            random_generator (RandomGenerator, optional): Seeded random source shared by nodes.
+            message_pool (MessagePool, optional): Free list recycling delivered messages.
+            progress (AggregationProgress, optional): Tracker aggregators report covered signatures to.
+        """
         self.event_queue = []
         self.current_time = 0
+        self.current_slot = 0
         self.running = False
+        self.latency_model = latency_model
+        self.random = random_generator
+        self.message_pool = message_pool
+        self.progress = progress
+        self.delivery_hook = None  # hook(recipient, message) run before every delivery, set at setup
+        self.profiler = None  # EngineProfiler timing the event handlers, set at setup
+        self.recorder = None  # EventRecorder writing every dispatched event, set at setup
+        self.trace = None  # CausalTrace recording every scheduled event, set with set_trace
+        self.current_event = -1  # Sequence number of the running event, kept while tracing
+        # Tie-breaker so events scheduled for the same time never compare callbacks
+        self._sequence = itertools.count()
+        self._message_ids = itertools.count()
 
     def schedule_event(self, event_time, event_callback, *args, **kwargs):
         """
@@ -24,7 +56,208 @@ class Simulator:
             *args: Positional arguments for the callback.
             **kwargs: Keyword arguments for the callback.
         """
-        heapq.heappush(self.event_queue, (event_time, event_callback, args, kwargs))
+        heapq.heappush(self.event_queue, (event_time, next(self._sequence), event_callback, args, kwargs))
+
+    def schedule_delivery(self, event_time, recipient, message):
+        """
+        Schedule the delivery of a message to `recipient.receive_message`.
+
+        Args:
+            event_time (int): The time at which the message arrives.
+            recipient (Node): The node receiving the message.
+            message (Message): The message to deliver.
+        """
+        heapq.heappush(self.event_queue, (event_time, next(self._sequence), DELIVER, recipient, message))
+
+    def deliver(self, recipient, message):
+        """
+        Hand a message to `recipient.receive_message` within the running event.
+
+        Used by transports that run their own hop events (the gossipsub
+        meshes), so their deliveries reach the recorder and the delivery
+        hook like scheduled deliveries, without another queue entry.
+
+        Args:
+            recipient (Node): The node receiving the message.
+            message (Message): The message to deliver.
+        """
+        if self.recorder is not None:
+            self.recorder.record_delivery(recipient, message)
+        if self.delivery_hook is not None:
+            self.delivery_hook(recipient, message)
+        recipient.receive_message(message)
+
+    def release_message(self, message):
+        """
+        Drop one pending delivery of a message, recycling a pooled message after the last.
+
+        Used by transports that hold a message outside the event queue (the
+        gossipsub meshes) once they will not deliver it any more.
+
+        Args:
+            message (Message): The message.
+        """
+        if message.pending:
+            message.pending -= 1
+            if not message.pending:
+                self.message_pool.release(message)
+
+    def set_trace(self, trace):
+        """
+        Record the parent event of every scheduled event in a causal trace.
+
+        The traced variants of `schedule_event` and `schedule_delivery` are
+        bound to the instance, so untraced runs keep the plain methods.
+
+        Args:
+            trace (CausalTrace | None): The trace, or None to stop tracing.
+        """
+        self.trace = trace
+        if trace is None:
+            self.__dict__.pop("schedule_event", None)
+            self.__dict__.pop("schedule_delivery", None)
+        else:
+            self.schedule_event = self._schedule_event_traced
+            self.schedule_delivery = self._schedule_delivery_traced
+
+    def _schedule_event_traced(self, event_time, event_callback, *args, **kwargs):
+        """
+        Schedule an event like `schedule_event` and record it in the trace.
+
+        Args:
+            event_time (int): The time at which the event should occur.
+            event_callback (callable): The function to execute for the event.
+            *args: Positional arguments for the callback.
+            **kwargs: Keyword arguments for the callback.
+        """
+        sequence = next(self._sequence)
+        self.trace.record_event(sequence, event_time, event_callback)
+        heapq.heappush(self.event_queue, (event_time, sequence, event_callback, args, kwargs))
+
+    def _schedule_delivery_traced(self, event_time, recipient, message):
+        """
+        Schedule a delivery like `schedule_delivery` and record it in the trace.
+
+        Args:
+            event_time (int): The time at which the message arrives.
+            recipient (Node): The node receiving the message.
+            message (Message): The message to deliver.
+        """
+        sequence = next(self._sequence)
+        self.trace.record_delivery(sequence, event_time, recipient, message)
+        heapq.heappush(self.event_queue, (event_time, sequence, DELIVER, recipient, message))
+
+    def events_scheduled(self):
+        """
+        Get the number of events scheduled so far, dispatched or still pending.
+
+        Returns:
+            int: The next sequence number.
+        """
+        count = next(self._sequence)
+        self._sequence = itertools.count(count)
+        return count
+
+    def create_message(self, sender, payload, slot, recipients=1, timestamp=None):
+        """
+        Create a message stamped with its send time and a new message id.
+
+        Messages come from the message pool when one is configured; a
+        recycled message gets a new id, so ids stay unique within the run.
+
+        Args:
+            sender (Node): The node sending the message.
+            payload: The (shared, immutable) content of the message.
+            slot (int): The slot the message belongs to.
+            recipients (int): Number of deliveries that will carry the message.
+            timestamp (float, optional): Time the message is sent, for messages scheduled
+                ahead of it. Defaults to the current time.
+
+        Returns:
+            Message: The new message.
+        """
+        if timestamp is None:
+            timestamp = self.current_time
+        if self.message_pool is not None:
+            message = self.message_pool.acquire(sender, payload, timestamp, slot, recipients)
+            message.message_id = next(self._message_ids)
+            return message
+        return Message(sender, None, timestamp, payload, slot, next(self._message_ids))
+
+    def schedule_events(self, event_times, event_callbacks, event_kwargs):
+        """
+        Schedule many events at once with a single heapify instead of one push each.
+
+        Events are ordered by time before they are added, so loading them
+        into an empty queue needs no heap operation at all.
+
+        Args:
+            event_times (numpy.ndarray | list[int]): The times at which the events should occur.
+            event_callbacks (list[callable]): The function to execute for each event.
+            event_kwargs (list[dict]): Keyword arguments for each callback.
+        """
+        start, order, times = self._sort_batch(event_times, len(event_callbacks))
+        if self.trace is not None:
+            self.trace.record_events(start, event_times, event_callbacks)
+        self._load_batch([
+            (event_time, start + index, event_callbacks[index], (), event_kwargs[index])
+            for event_time, index in zip(times, order)
+        ])
+
+    def schedule_deliveries(self, event_times, recipients, messages):
+        """
+        Schedule many message deliveries at once with a single heapify.
+
+        Args:
+            event_times (numpy.ndarray | list[int]): The times at which the messages arrive.
+            recipients (list[Node]): The recipient of each delivery.
+            messages (list[Message]): The message of each delivery.
+        """
+        start, order, times = self._sort_batch(event_times, len(recipients))
+        if self.trace is not None:
+            self.trace.record_deliveries(start, event_times, recipients, messages)
+        self._load_batch([
+            (event_time, start + index, DELIVER, recipients[index], messages[index])
+            for event_time, index in zip(times, order)
+        ])
+
+    def _sort_batch(self, event_times, count):
+        """
+        Reserve sequence numbers for a batch and order it by time.
+
+        Args:
+            event_times (numpy.ndarray | list[int]): The times of the batch's events.
+            count (int): Number of events in the batch.
+
+        Returns:
+            tuple[int, list[int], list]: First sequence number, batch indices
+            in time order, and the times in that order.
+        """
+        start = next(self._sequence)
+        self._sequence = itertools.count(start + count)
+        order = np.argsort(event_times, kind="stable").tolist()
+        times = np.asarray(event_times)[order].tolist()
+        return start, order, times
+
+    def _load_batch(self, entries):
+        """
+        Add time-ordered heap entries to the queue.
+
+        Args:
+            entries (list[tuple]): Heap entries sorted by time.
+        """
+        if not entries:
+            return
+        queue = self.event_queue
+        if not queue:
+            self.event_queue = entries  # A sorted list is already a valid heap
+        elif len(entries) * len(queue).bit_length() < len(queue):
+            # Small batches into a large queue: pushes cost less than a full heapify
+            for entry in entries:
+                heapq.heappush(queue, entry)
+        else:
+            queue.extend(entries)
+            heapq.heapify(queue)
 
     def run(self, max_time=None):
         """
@@ -34,12 +267,76 @@ class Simulator:
             max_time (int, optional): The maximum simulation time. Defaults to None.
         """
         self.running = True
+        if (self.delivery_hook is not None or self.trace is not None or self.recorder is not None
+                or self.profiler is not None):
+            self._run_hooked(max_time)
+            return
+        message_pool = self.message_pool
         while self.event_queue and self.running:
-            event_time, event_callback, args, kwargs = heapq.heappop(self.event_queue)
-            if max_time is not None and event_time > max_time:
+            if max_time is not None and self.event_queue[0][0] > max_time:
                 break
+            event_time, _, event_callback, args, kwargs = heapq.heappop(self.event_queue)
             self.current_time = event_time
-            event_callback(*args, **kwargs)
+            if event_callback is DELIVER:
+                # Delivery entries carry the recipient and message in the args/kwargs positions
+                recipient, message = args, kwargs
+                recipient.receive_message(message)
+                if message.pending:
+                    message.pending -= 1
+                    if not message.pending:
+                        message_pool.release(message)
+            else:
+                event_callback(*args, **kwargs)
+
+    def _run_hooked(self, max_time):
+        """
+        Run the event loop of `run` with a delivery hook, a trace, a recorder or a profiler.
+
+        The recorder writes every event and the hook is called before every
+        delivery, the running event's sequence number is kept in
+        `current_event` for the trace, and the profiler counts and samples
+        the dispatch of every event (the recorder and hook included). Kept
+        apart so that plain runs do none of this per event.
+
+        Args:
+            max_time (int, optional): The maximum simulation time.
+        """
+        message_pool = self.message_pool
+        delivery_hook = self.delivery_hook
+        recorder = self.recorder
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin_run()
+        started = 0
+        while self.event_queue and self.running:
+            if max_time is not None and self.event_queue[0][0] > max_time:
+                break
+            event_time, sequence, event_callback, args, kwargs = heapq.heappop(self.event_queue)
+            self.current_time = event_time
+            self.current_event = sequence
+            if profiler is not None:
+                started = profiler.start(event_callback, args, kwargs)
+            if event_callback is DELIVER:
+                recipient, message = args, kwargs
+                if recorder is not None:
+                    recorder.record_delivery(recipient, message)
+                if delivery_hook is not None:
+                    delivery_hook(recipient, message)
+                recipient.receive_message(message)
+                if message.pending:
+                    message.pending -= 1
+                    if not message.pending:
+                        message_pool.release(message)
+            else:
+                if recorder is not None:
+                    recorder.record_event(event_callback)
+                event_callback(*args, **kwargs)
+            if started:
+                profiler.stop(started)
+                started = 0
+        self.current_event = -1
+        if profiler is not None:
+            profiler.end_run()
 
     def stop(self):
         """Stop the simulation."""
@@ -49,4 +346,10 @@ class Simulator:
         """Reset the simulation to its initial state."""
         self.event_queue = []
         self.current_time = 0
-        self.running = False
\ No newline at end of file
+        self.current_slot = 0
+        self.running = False
+        self.current_event = -1
+        self._sequence = itertools.count()
+        self._message_ids = itertools.count()
+        if self.trace is not None:
+            self.trace.clear()  # Event ids start over
@@ -0,0 +1,230 @@
+"""
+Slot driver for the BEAMSim discrete-event simulation engine.
+
+This module provides the SlotDriver class, which runs the simulation as a
+continuous sequence of slots instead of a single ad-hoc round. Every
+`slot_time` ms the driver moves a shared RoleAssignment to the slot's round
+(or, without one, rotates the validator-to-aggregator assignment using the
+random seed combined with the slot number) and re-arms every validator,
+while events of the previous slot keep running in the same queue.
+"""
+
+import random
+
+import numpy as np
+
+from beamsim.nodes.global_aggregator import connect_global_aggregators
+
+
+class SlotDriver:
+    """
+    A class that re-arms validators every slot and rotates aggregator selection.
+
+    Node objects, neighbor lists and per-slot buffers are allocated once and
+    reused in place, so memory stays flat over thousands of slots. Aggregators
+    keep the state of the current and the previous slot, keyed by the slot of
+    each message, which lets slot n's global aggregation overlap with slot
+    n+1's signature dissemination without losing slot n's proofs.
+    """
+
+    def __init__(self, simulator, validators, subnet_aggregators, global_aggregators,
+                 slot_time=4000, redundancy_factor=1, random_seed=42, assignment=None,
+                 share_proofs=False, topology=None):
+        """
+        Initialize the slot driver.
+
+        Args:
+            simulator (Simulator): The simulator instance managing the simulation.
+            validators (list[Validator] | ValidatorPopulation): Validators re-armed at the
+                start of every slot.
+            subnet_aggregators (list[SubnetAggregator]): Aggregators validators send signatures to.
+            global_aggregators (list[GlobalAggregator]): Aggregators collecting subnet proofs.
+            slot_time (int): Time between the starts of consecutive slots (ms).
+            redundancy_factor (int): Number of subnet aggregators each validator sends to.
+            random_seed (int): Seed combined with the slot number for aggregator rotation
+                without an assignment.
+            assignment (RoleAssignment, optional): Shared role assignment moved to
+                each slot's round. Validators then send to the aggregators of their own
+                subnet, `subnet_aggregators` standing for the assignment's seats in
+                subnet-major order, and the seeded rotation is not used.
+            share_proofs (bool): Connect the global aggregators to each other so they
+                share subnet proofs, each then expecting every subnet proof.
+            topology (NetworkTopology, optional): Topology sharing the assignment,
+                reconnected whenever the round changes.
+        """
+        if redundancy_factor > len(subnet_aggregators):
+            raise ValueError("redundancy_factor cannot exceed the number of subnet aggregators")
+        self.simulator = simulator
+        self.validators = validators
+        self.subnet_aggregators = subnet_aggregators
+        self.global_aggregators = global_aggregators
+        self.slot_time = slot_time
+        self.redundancy_factor = redundancy_factor
+        self.random_seed = random_seed
+        self.assignment = assignment
+        self.topology = topology
+        self.current_slot = -1
+        self.num_slots = None
+        self._rng = random.Random(random_seed)
+        self._aggregator_order = list(range(len(subnet_aggregators)))
+        # A ValidatorPopulation rotates and re-arms all validators with vectorized calls
+        self._population = validators if hasattr(validators, "rotate_aggregators") else None
+        # Aggregators rotate within their subnet's group of the population's subnet-major layout
+        self._group_size = len(subnet_aggregators)
+        if self._population is not None:
+            self._group_size, remainder = divmod(self._group_size, self._population.num_subnets)
+            if remainder or not self._group_size:
+                raise ValueError(f"{len(subnet_aggregators)} subnet aggregators cannot be split evenly "
+                                 f"over {self._population.num_subnets} subnets")
+
+        if assignment is not None:
+            if len(subnet_aggregators) != assignment.subnet_aggregators.size:
+                raise ValueError("There must be one subnet aggregator per aggregator seat of the assignment")
+            if self._population is not None and self._population.assignment is not assignment:
+                raise ValueError("The population must be built with the driver's assignment")
+
+        if self._population is not None:
+            self._population.set_aggregators(subnet_aggregators)
+        elif assignment is not None:
+            self._connect_to_seats()
+        else:
+            # Fixed-length neighbor lists, overwritten in place on every rotation
+            for validator in validators:
+                validator.neighbors[:] = subnet_aggregators[:redundancy_factor]
+
+        # Aggregator -> global aggregator wiring does not rotate, so count it once
+        for global_aggregator in global_aggregators:
+            global_aggregator.expected_proofs = 0
+        if share_proofs:
+            connect_global_aggregators(global_aggregators)
+            for global_aggregator in global_aggregators:
+                global_aggregator.expected_proofs = len(subnet_aggregators)
+        else:
+            for aggregator in subnet_aggregators:
+                for global_aggregator in aggregator.get_connected_nodes():
+                    global_aggregator.expected_proofs += 1
+
+    def start(self, num_slots=None, start_time=None):
+        """
+        Schedule the first slot.
+
+        Args:
+            num_slots (int, optional): Number of slots to run. Defaults to None (unbounded).
+            start_time (int, optional): Time of the first slot. Defaults to the current time.
+        """
+        self.num_slots = num_slots
+        if start_time is None:
+            start_time = self.simulator.current_time
+        self.simulator.schedule_event(start_time, self._start_slot, 0)
+
+    def run(self, num_slots):
+        """
+        Run the simulation for a fixed number of slots and drain the remaining events.
+
+        Args:
+            num_slots (int): Number of slots to run.
+        """
+        self.start(num_slots)
+        self.simulator.run()
+
+    def _start_slot(self, slot):
+        """
+        Move to the slot's aggregators, re-arm validators and schedule the next slot.
+
+        Args:
+            slot (int): The slot that is starting.
+        """
+        self.current_slot = slot
+        self.simulator.current_slot = slot
+        if self.assignment is not None:
+            self._follow_assignment(slot)
+        else:
+            self._rotate_aggregators(slot)
+        if self._population is not None:
+            self._population.start_signature_generation()
+        else:
+            for validator in self.validators:
+                validator.start_signature_generation()
+        if self.num_slots is None or slot + 1 < self.num_slots:
+            self.simulator.schedule_event(
+                self.simulator.current_time + self.slot_time,
+                self._start_slot,
+                slot + 1,
+            )
+
+    def _follow_assignment(self, slot):
+        """
+        Move the shared assignment to a slot's round and reconnect what depends on its roles.
+
+        Which validators hold the aggregator seats changes with the round;
+        which seat a validator sends to only depends on its subnet and its
+        rank in the subnet, as set up by `_connect_to_seats` or
+        `ValidatorPopulation.set_aggregators`.
+
+        Args:
+            slot (int): The slot that is starting.
+        """
+        assignment = self.assignment
+        previous_round = assignment.round_number
+        assignment.assign(slot)
+        if self.topology is not None and assignment.round_number != previous_round:
+            self.topology.reassign()
+        if self._population is not None:
+            self._population.follow_assignment()
+
+    def _connect_to_seats(self):
+        """
+        Connect validator i to `redundancy_factor` aggregator seats of its subnet in the assignment.
+
+        The validator of rank r in subnet s sends to seats (r + j) mod k of
+        the subnet, aggregator s*k + (r + j) mod k of `subnet_aggregators`,
+        as `DirectTopology` connects validators to their subnet's aggregators.
+        """
+        assignment = self.assignment
+        per_subnet = assignment.num_subnet_aggregators
+        if self.redundancy_factor > per_subnet:
+            raise ValueError("redundancy_factor cannot exceed the number of subnet aggregators per subnet")
+        columns = (assignment.subnet_rank[:, None] + np.arange(self.redundancy_factor)) % per_subnet
+        seats = assignment.subnet_of.astype(np.int64)[:, None] * per_subnet + columns
+        aggregators = self.subnet_aggregators
+        for aggregator in aggregators:
+            aggregator.expected_signatures = 0
+        for validator, row in zip(self.validators, seats.tolist()):
+            validator.neighbors[:] = [aggregators[seat] for seat in row]
+            for seat in row:
+                aggregators[seat].expected_signatures += 1
+
+    def _rotate_aggregators(self, slot):
+        """
+        Reassign validators to subnet aggregators for a slot, in place.
+
+        The assignment is a deterministic function of the random seed and
+        the slot number, so reruns with the same seed select the same
+        aggregators for every round. Aggregators are only shuffled within
+        their subnet's group, so validators keep sending to their own subnet.
+
+        Args:
+            slot (int): The slot to compute the assignment for.
+        """
+        order = self._aggregator_order
+        order[:] = range(len(order))  # Start from the identity so rotation ignores history
+        self._rng.seed(f"{self.random_seed}:{slot}")
+        group_size = self._group_size
+        for start in range(0, len(order), group_size):
+            group = order[start:start + group_size]
+            self._rng.shuffle(group)
+            order[start:start + group_size] = group
+        if self._population is not None:
+            self._population.rotate_aggregators(order)
+            return
+
+        aggregators = self.subnet_aggregators
+        for aggregator in aggregators:
+            aggregator.expected_signatures = 0
+        num_aggregators = len(order)
+        for index, validator in enumerate(self.validators):
+            neighbors = validator.neighbors
+            for k in range(self.redundancy_factor):
+                aggregator = aggregators[order[(index + k) % num_aggregators]]
+                neighbors[k] = aggregator
+                aggregator.expected_signatures += 1
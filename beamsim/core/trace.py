@@ -0,0 +1,411 @@
+"""
+Causal event tracing for the BEAMSim discrete-event simulation engine.
+
+This module defines the CausalTrace class, an opt-in recorder of which
+event scheduled which. Every event is identified by its sequence number in
+the event queue; the trace stores, per event id, the id of the event that
+was running when it was scheduled, together with its scheduling and
+execution times, a small integer code for its kind (callback or delivered
+payload type) and the node it runs on, all in preallocated NumPy arrays.
+After a run, the chain of events that led to a given event (typically the
+first final proof) is walked back through the parent ids and broken down
+into the time spent in each stage: signing, network hops, subnet
+aggregation and recursive aggregation.
+"""
+
+import numpy as np
+
+# Kind of the event that produces a slot's final proof
+FINAL_PROOF = "GlobalAggregator._broadcast_final_snark"
+
+PATH_DTYPE = np.dtype([
+    ("event", np.int64),
+    ("kind", np.int32),
+    ("node", np.int32),
+    ("source", np.int32),
+    ("scheduled_at", np.float64),
+    ("time", np.float64),
+])
+
+
+class CausalTrace:
+    """
+    A class recording the parent event of every scheduled event.
+
+    Recording is bound into the simulator by `attach` (see
+    `Simulator.set_trace`), so runs without a trace pay nothing. Events
+    scheduled outside the event loop (e.g. the first slot's signatures) have
+    no parent (-1). Arrays are indexed by event id and double when an id
+    falls beyond them; ids that were never recorded keep a parent of -1 and
+    a kind of -1.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        """
+        Initialize an empty trace.
+
+        Args:
+            capacity (int): Initial number of event ids allocated.
+        """
+        self.simulator = None
+        self.kind_names = []
+        self._kind_codes = {}  # Callback or (payload type, recipient type) -> kind code
+        self._allocate(capacity)
+        self.size = 0  # One past the largest recorded event id
+
+    def _allocate(self, capacity):
+        """
+        Allocate empty arrays for `capacity` event ids.
+
+        Args:
+            capacity (int): Number of event ids.
+        """
+        self.parents = np.full(capacity, -1, dtype=np.int64)
+        self.kinds = np.full(capacity, -1, dtype=np.int32)
+        self.nodes = np.full(capacity, -1, dtype=np.int32)
+        self.sources = np.full(capacity, -1, dtype=np.int32)
+        self.scheduled_at = np.full(capacity, np.nan, dtype=np.float64)
+        self.times = np.full(capacity, np.nan, dtype=np.float64)
+
+    def _grow(self, size):
+        """
+        Double the arrays until they hold `size` event ids.
+
+        Args:
+            size (int): Number of event ids needed.
+        """
+        capacity = len(self.parents)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        arrays = (self.parents, self.kinds, self.nodes, self.sources, self.scheduled_at, self.times)
+        self._allocate(capacity)
+        for old, new in zip(arrays, (self.parents, self.kinds, self.nodes, self.sources,
+                                     self.scheduled_at, self.times)):
+            new[:len(old)] = old
+
+    def attach(self, simulator):
+        """
+        Start recording the events scheduled by a simulator.
+
+        Args:
+            simulator (Simulator): The simulator to trace.
+        """
+        self.simulator = simulator
+        simulator.set_trace(self)
+
+    def detach(self):
+        """Stop recording; the recorded events are kept."""
+        if self.simulator is not None:
+            self.simulator.set_trace(None)
+
+    def clear(self):
+        """Forget every recorded event, keeping the allocated arrays and kind names."""
+        self.parents.fill(-1)
+        self.kinds.fill(-1)
+        self.nodes.fill(-1)
+        self.sources.fill(-1)
+        self.scheduled_at.fill(np.nan)
+        self.times.fill(np.nan)
+        self.size = 0
+
+    def _event_kind(self, callback):
+        """
+        Get the kind code and node of a callback, naming new kinds "Class.method".
+
+        Args:
+            callback (callable): The event callback.
+
+        Returns:
+            tuple[int, int]: Kind code and node id of the callback's owner (-1 if none).
+        """
+        owner = getattr(callback, "__self__", None)
+        key = (type(owner), callback.__func__) if owner is not None else callback
+        code = self._kind_codes.get(key)
+        if code is None:
+            name = (f"{type(owner).__name__}.{callback.__name__}" if owner is not None
+                    else getattr(callback, "__qualname__", repr(callback)))
+            code = self._kind_codes[key] = len(self.kind_names)
+            self.kind_names.append(name)
+        return code, getattr(owner, "node_id", -1)
+
+    def _delivery_kind(self, recipient, message):
+        """
+        Get the kind code of a delivery, naming new kinds "deliver Payload to Recipient".
+
+        Args:
+            recipient (Node): The node receiving the message.
+            message (Message): The delivered message.
+
+        Returns:
+            int: The kind code.
+        """
+        key = (type(message.payload), type(recipient))
+        code = self._kind_codes.get(key)
+        if code is None:
+            code = self._kind_codes[key] = len(self.kind_names)
+            self.kind_names.append(f"deliver {key[0].__name__} to {key[1].__name__}")
+        return code
+
+    @staticmethod
+    def _source(message):
+        """
+        Get the node a message comes from: its sender, or the validator of a sender-less signature.
+
+        Args:
+            message (Message): The message.
+
+        Returns:
+            int: The source node id, -1 if unknown.
+        """
+        sender = message.sender
+        if sender is not None:
+            return sender.node_id
+        return getattr(message.payload, "validator_id", -1)
+
+    def record_event(self, event_id, event_time, callback):
+        """
+        Record an event scheduled by the running event.
+
+        Args:
+            event_id (int): Sequence number of the event.
+            event_time (float): Time the event runs at (ms).
+            callback (callable): The event callback.
+        """
+        if event_id >= len(self.parents):
+            self._grow(event_id + 1)
+        simulator = self.simulator
+        kind, node = self._event_kind(callback)
+        self.parents[event_id] = simulator.current_event
+        self.kinds[event_id] = kind
+        self.nodes[event_id] = node
+        self.sources[event_id] = node
+        self.scheduled_at[event_id] = simulator.current_time
+        self.times[event_id] = event_time
+        if event_id >= self.size:
+            self.size = event_id + 1
+
+    def record_delivery(self, event_id, event_time, recipient, message):
+        """
+        Record a message delivery scheduled by the running event.
+
+        Args:
+            event_id (int): Sequence number of the delivery.
+            event_time (float): Time the message arrives (ms).
+            recipient (Node): The node receiving the message.
+            message (Message): The message.
+        """
+        if event_id >= len(self.parents):
+            self._grow(event_id + 1)
+        simulator = self.simulator
+        self.parents[event_id] = simulator.current_event
+        self.kinds[event_id] = self._delivery_kind(recipient, message)
+        self.nodes[event_id] = recipient.node_id
+        self.sources[event_id] = self._source(message)
+        self.scheduled_at[event_id] = simulator.current_time
+        self.times[event_id] = event_time
+        if event_id >= self.size:
+            self.size = event_id + 1
+
+    def _record_batch(self, start, event_times, kinds, nodes, sources):
+        """
+        Record a batch of events with consecutive ids scheduled by the running event.
+
+        Args:
+            start (int): Id of the batch's first event.
+            event_times (numpy.ndarray | list[float]): Times of the events, in batch order.
+            kinds (list[int]): Kind codes of the events.
+            nodes (list[int]): Nodes the events run on.
+            sources (list[int]): Source nodes of the events.
+        """
+        end = start + len(kinds)
+        self._grow(end)
+        self.parents[start:end] = self.simulator.current_event
+        self.kinds[start:end] = kinds
+        self.nodes[start:end] = nodes
+        self.sources[start:end] = sources
+        self.scheduled_at[start:end] = self.simulator.current_time
+        self.times[start:end] = event_times
+        self.size = max(self.size, end)
+
+    def record_events(self, start, event_times, callbacks):
+        """
+        Record a batch of events scheduled by `Simulator.schedule_events`.
+
+        Args:
+            start (int): Id of the batch's first event.
+            event_times (numpy.ndarray | list[float]): Times of the events, in batch order.
+            callbacks (list[callable]): The event callbacks.
+        """
+        kinds, nodes = zip(*map(self._event_kind, callbacks)) if callbacks else ((), ())
+        self._record_batch(start, event_times, kinds, nodes, nodes)
+
+    def record_deliveries(self, start, event_times, recipients, messages):
+        """
+        Record a batch of deliveries scheduled by `Simulator.schedule_deliveries`.
+
+        Args:
+            start (int): Id of the batch's first delivery.
+            event_times (numpy.ndarray | list[float]): Arrival times, in batch order.
+            recipients (list[Node]): The recipient of each delivery.
+            messages (list[Message]): The message of each delivery.
+        """
+        self._record_batch(
+            start, event_times,
+            [self._delivery_kind(recipient, message) for recipient, message in zip(recipients, messages)],
+            [recipient.node_id for recipient in recipients],
+            [self._source(message) for message in messages],
+        )
+
+    def kind_code(self, name):
+        """
+        Get the code of a kind name.
+
+        Args:
+            name (str): A kind name, e.g. "SubnetAggregator._send_snark_proof".
+
+        Returns:
+            int: The code, -1 if no event of the kind was recorded.
+        """
+        try:
+            return self.kind_names.index(name)
+        except ValueError:
+            return -1
+
+    def find(self, name, start_time=0.0):
+        """
+        Get the recorded events of a kind that have run, in time order.
+
+        Args:
+            name (str): The kind name.
+            start_time (float): Only events at or after this time (ms) are returned.
+
+        Returns:
+            numpy.ndarray: The event ids.
+        """
+        times = self.times[:self.size]
+        selected = self.kinds[:self.size] == self.kind_code(name)
+        selected &= times >= start_time
+        if self.simulator is not None:
+            selected &= times <= self.simulator.current_time  # Still pending events have not run
+        events = np.flatnonzero(selected)
+        return events[np.argsort(times[events], kind="stable")]
+
+    def chain(self, event_id):
+        """
+        Walk the parent ids back from an event to the event that started its chain.
+
+        Args:
+            event_id (int): The last event of the chain.
+
+        Returns:
+            numpy.ndarray: The event ids, from the root to `event_id`.
+        """
+        chain = []
+        parents = self.parents
+        while event_id >= 0:
+            chain.append(event_id)
+            event_id = int(parents[event_id])
+        return np.array(chain[::-1], dtype=np.int64)
+
+    def critical_path(self, target=FINAL_PROOF, start_time=0.0):
+        """
+        Get the chain of events that led to the first event of a kind.
+
+        With the default target this is the critical path of finalization:
+        the signature, the proofs and the aggregations whose completion each
+        unblocked the next step, ending with the first final proof.
+
+        Args:
+            target (str): Kind name of the last event.
+            start_time (float): Time the path is measured from (ms), e.g. the
+                slot start; the first target event at or after it is used.
+
+        Returns:
+            numpy.ndarray: One PATH_DTYPE row per event, from the root to the
+            target; empty if no target event has run.
+        """
+        events = self.find(target, start_time)
+        if not len(events):
+            return np.zeros(0, dtype=PATH_DTYPE)
+        chain = self.chain(int(events[0]))
+        path = np.empty(len(chain), dtype=PATH_DTYPE)
+        path["event"] = chain
+        path["kind"] = self.kinds[chain]
+        path["node"] = self.nodes[chain]
+        path["source"] = self.sources[chain]
+        path["scheduled_at"] = self.scheduled_at[chain]
+        path["time"] = self.times[chain]
+        return path
+
+    def breakdown(self, path, start_time=0.0, population=None):
+        """
+        Split the duration of a critical path into the time spent in each stage.
+
+        Every event on the path is delayed from the moment its parent
+        scheduled it to the moment it runs, i.e. by a network latency for a
+        delivery and by an aggregation time for an aggregator's event; that
+        delay is charged to the event's kind. Time before `start_time` is
+        not charged. With a population, the first signature delivery is split
+        into the validator's sign delay and the network latency.
+
+        Args:
+            path (numpy.ndarray): A path returned by `critical_path`.
+            start_time (float): Time the path is measured from (ms).
+            population (ValidatorPopulation, optional): The validators, whose
+                sign delays of the latest slot are used.
+
+        Returns:
+            list[dict]: One row per stage in path order, with the stage name,
+            the number of events on the path and the time spent (ms).
+        """
+        rows = {}
+
+        def charge(stage, duration, events=1):
+            row = rows.setdefault(stage, {"stage": stage, "events": 0, "time_ms": 0.0})
+            row["events"] += events
+            row["time_ms"] += duration
+
+        for event in path:
+            if event["time"] < start_time:
+                continue
+            duration = event["time"] - max(event["scheduled_at"], start_time)
+            name = self.kind_names[event["kind"]]
+            if population is not None and name.startswith("deliver Signature ") and event["source"] >= 0:
+                sign_delay = float(population.sign_delays[event["source"] - population.ids[0]])
+                sign_delay = min(sign_delay, duration)
+                charge("signing", sign_delay)
+                duration -= sign_delay
+            charge(name, float(duration))
+        return list(rows.values())
+
+    def describe(self, path):
+        """
+        Format a path as one line per event.
+
+        Args:
+            path (numpy.ndarray): A path returned by `critical_path`.
+
+        Returns:
+            list[str]: The lines.
+        """
+        return [
+            f"{event['time']:>10.1f} ms  +{event['time'] - event['scheduled_at']:>8.1f} ms  "
+            f"{self.kind_names[event['kind']]} (node {event['node']}, from {event['source']})"
+            for event in path
+        ]
+
+    @property
+    def nbytes(self):
+        """
+        Get the memory held by the trace arrays.
+
+        Returns:
+            int: Size of the arrays (in bytes).
+        """
+        return sum(array.nbytes for array in (self.parents, self.kinds, self.nodes, self.sources,
+                                              self.scheduled_at, self.times))
+
+    def __len__(self):
+        return int(np.count_nonzero(self.kinds[:self.size] >= 0))
@@ -8,9 +8,26 @@ and latency measurements.
 
 # Import metrics-related classes to make them available directly from beamsim.metrics
 from beamsim.metrics.collector import MetricsCollector
+from beamsim.metrics.progress import AggregationProgress, times_to_reach
+from beamsim.metrics.recorder import EventRecorder, read_events, replay_events
+from beamsim.metrics.sink import MetricsSink, load_metrics
+from beamsim.metrics.sketch import LatencySketch, LatencySketches
+from beamsim.metrics.snapshots import MetricsSnapshots
+from beamsim.metrics.telemetry import LiveTelemetry
 from beamsim.metrics.visualizer import MetricsVisualizer
 
 __all__ = [
+    'AggregationProgress',
+    'EventRecorder',
+    'LatencySketch',
+    'LatencySketches',
+    'LiveTelemetry',
     'MetricsCollector',
+    'MetricsSink',
+    'MetricsSnapshots',
     'MetricsVisualizer',
-]
\ No newline at end of file
+    'load_metrics',
+    'read_events',
+    'replay_events',
+    'times_to_reach',
+]
@@ -5,18 +5,303 @@ This module defines the MetricsCollector class, which collects and stores
 metrics during simulation runs.
 """
 
+import csv
+import os
+import re
+
+import numpy as np
+
+from beamsim.metrics.sink import MetricsSink, METRIC_BANDWIDTH, METRIC_MESSAGE, METRIC_LATENCY
+from beamsim.metrics.progress import AggregationProgress
+from beamsim.metrics.sketch import LatencySketches
+
+_KEY_NAMES = {}  # Class -> snake_case name used as message type / node role key
+
+
+def key_name(cls):
+    """
+    Get the snake_case name a payload or node class is keyed by, e.g. "snark_proof".
+
+    Args:
+        cls (type): The class.
+
+    Returns:
+        str: The name.
+    """
+    name = _KEY_NAMES.get(cls)
+    if name is None:
+        name = _KEY_NAMES[cls] = snake_case(cls.__name__)
+    return name
+
+
+def snake_case(name):
+    """
+    Convert a class name to the snake_case name it is keyed by.
+
+    Args:
+        name (str): The class name, e.g. "SNARKProof".
+
+    Returns:
+        str: The key, e.g. "snark_proof".
+    """
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])", "_", name).lower()
+
+
+def payload_size(payload):
+    """
+    Get the wire size of a message payload.
+
+    Args:
+        payload: A Signature, a SNARKProof or any object with a `size`.
+
+    Returns:
+        int: Size in bytes (0 if unknown).
+    """
+    size = getattr(payload, "wire_size", None)
+    return size if size is not None else getattr(payload, "size", 0)
+
+
+def _ignore(*args, **kwargs):
+    """Record nothing; disabled metrics are bound to this at setup."""
+
+
+def _add_totals(totals, node_ids, weights=None):
+    """
+    Add per-record values to per-node totals.
+
+    Args:
+        totals (dict[int, int]): Node id -> total, updated in place.
+        node_ids (numpy.ndarray): Node of every record.
+        weights (numpy.ndarray, optional): Value of every record; 1 each if None.
+    """
+    nodes, inverse = np.unique(node_ids, return_inverse=True)
+    sums = np.bincount(inverse, weights, minlength=len(nodes))
+    for node_id, value in zip(nodes.tolist(), sums.astype(np.int64).tolist()):
+        totals[node_id] = totals.get(node_id, 0) + value
+
+
 class MetricsCollector:
     """
     A class for collecting and storing metrics during the simulation.
+
+    Per-node totals are kept in dictionaries, bounded by the number of
+    nodes, and latencies in fixed-size quantile sketches per message type
+    and node role. Individual records go to an optional MetricsSink, and
+    raw latency samples are only kept in `latency_measurements` when
+    `keep_samples` is set, so memory does not grow with the run length.
+    Aggregation progress is reported by the aggregators themselves to the
+    AggregationProgress passed as the simulator's `progress`.
+
+    Which metrics are collected is decided once, at construction: the
+    `record_*` method of a disabled metric is replaced by a no-op, and
+    `attach` only installs a delivery hook for enabled metrics (none at
+    all when every metric is off), so disabled metrics cost nothing per
+    message.
     """
 
-    def __init__(self):
+    def __init__(self, sink=None, simulator=None, keep_samples=False, relative_accuracy=0.01,
+                 aggregation_progress=None, collect_bandwidth_usage=True, collect_message_counts=True,
+                 collect_latency=True, roles=None):
         """
         Initialize the metrics collector.
+
+        Args:
+            sink (MetricsSink, optional): Sink receiving every record.
+            simulator (Simulator, optional): Clock used to timestamp records.
+            keep_samples (bool): Also keep every latency in `latency_measurements`.
+            relative_accuracy (float): Relative error bound of the latency quantiles.
+            aggregation_progress (AggregationProgress, optional): Tracker of covered signatures.
+            collect_bandwidth_usage (bool): Record bytes received per node.
+            collect_message_counts (bool): Record messages sent per node.
+            collect_latency (bool): Record message delivery latencies.
+            roles (numpy.ndarray, optional): Role flags by node id, e.g. `RoleAssignment.roles`
+                (updated in place every round), for runs whose nodes are the assignment's
+                validators; latencies are then keyed by the recipient's roles.
         """
         self.bandwidth_usage = {}
         self.message_counts = {}
         self.latency_measurements = []
+        self.latency_sketches = LatencySketches(relative_accuracy)
+        self.keep_samples = keep_samples
+        self.aggregation_progress = aggregation_progress
+        self.sink = sink
+        self.simulator = simulator
+        self.collect_bandwidth_usage = collect_bandwidth_usage
+        self.collect_message_counts = collect_message_counts
+        self.collect_latency = collect_latency
+        self.roles = roles
+        if not collect_bandwidth_usage:
+            self.record_bandwidth = _ignore
+        if not collect_message_counts:
+            self.record_message = _ignore
+        if not collect_latency:
+            self.record_latency = _ignore
+
+    @classmethod
+    def from_config(cls, config, output_dir=None, simulator=None):
+        """
+        Build a collector from the `metrics` section of a loaded configuration.
+
+        The collector's aggregation progress covers `network.num_validators`
+        signatures; pass it to the Simulator as `progress` to fill it.
+
+        Args:
+            config (ConfigManager): The simulation configuration.
+            output_dir (str, optional): Directory of the streamed records; None keeps them in memory.
+            simulator (Simulator, optional): Clock used to timestamp records.
+
+        Returns:
+            MetricsCollector: The collector.
+        """
+        sink = None
+        if output_dir is not None:
+            sink = MetricsSink(
+                os.path.join(output_dir, "metrics"),
+                chunk_size=config.get("metrics.chunk_size", 65536),
+                num_buffers=config.get("metrics.num_buffers", 4),
+                output_format=config.get("metrics.output_format", "auto"),
+            )
+        return cls(sink, simulator, config.get("metrics.keep_latency_samples", False),
+                   config.get("metrics.latency_relative_accuracy", 0.01),
+                   AggregationProgress(config.get("network.num_validators")),
+                   config.get("metrics.collect_bandwidth_usage", True),
+                   config.get("metrics.collect_message_counts", True),
+                   config.get("metrics.collect_latency", True))
+
+    def attach(self, simulator):
+        """
+        Use a simulator's clock and record every message delivery it runs.
+
+        Args:
+            simulator (Simulator): The simulator.
+        """
+        self.simulator = simulator
+        simulator.delivery_hook = self.delivery_hook()
+
+    def delivery_hook(self):
+        """
+        Build the function recording a message delivery, from the enabled metrics only.
+
+        Deliveries record the bytes received by the recipient, a message
+        sent by the sender (the signing validator for population
+        signatures) and the latency since the message was created, keyed by
+        payload type and the recipient's role (see `role_of`).
+
+        Returns:
+            callable | None: hook(recipient, message), or None if no metric is enabled.
+        """
+        hooks = []
+        if self.collect_bandwidth_usage:
+            record_bandwidth = self.record_bandwidth
+            hooks.append(lambda recipient, message: record_bandwidth(recipient.node_id,
+                                                                     payload_size(message.payload)))
+        if self.collect_message_counts:
+            record_message = self.record_message
+            hooks.append(lambda recipient, message: record_message(
+                message.sender.node_id if message.sender is not None
+                else getattr(message.payload, "validator_id", -1)))
+        if self.collect_latency:
+            record_latency = self.record_latency
+
+            def on_latency(recipient, message):
+                if message.timestamp is None:
+                    return  # No send time to measure from
+                record_latency(self.simulator.current_time - message.timestamp, recipient.node_id,
+                               key_name(type(message.payload)), self.role_of(recipient))
+
+            hooks.append(on_latency)
+
+        if not hooks:
+            return None
+        if len(hooks) == 1:
+            return hooks[0]
+
+        def on_delivery(recipient, message):
+            for hook in hooks:
+                hook(recipient, message)
+
+        return on_delivery
+
+    def role_of(self, recipient):
+        """
+        Get the role a node's latencies are keyed by.
+
+        Args:
+            recipient (Node): The receiving node.
+
+        Returns:
+            int | str: The node's role flags in `roles`, or its class name for
+            nodes outside them (or without `roles`).
+        """
+        roles = self.roles
+        if roles is not None and 0 <= recipient.node_id < len(roles):
+            return int(roles[recipient.node_id])
+        return key_name(type(recipient))
+
+    def replay(self, events, kinds, chunk_size=1 << 20):
+        """
+        Record the deliveries of a recorded run, as `delivery_hook` would have during it.
+
+        Records are processed `chunk_size` at a time: per-node totals are
+        summed with one bincount per metric and latencies are added to the
+        sketch of every (payload type, recipient role) with one vectorized
+        call per chunk. Recipients are keyed by the flags `roles` holds at
+        replay time, as in `role_of`.
+
+        Args:
+            events (numpy.ndarray): Records of an EventRecorder (see `read_events`).
+            kinds (list[dict]): Kind table of the records.
+            chunk_size (int): Records read from the (memory-mapped) events at a time.
+        """
+        delivery_kinds = [code for code, kind in enumerate(kinds) if "recipient" in kind]
+        latency_keys = {code: (snake_case(kinds[code]["payload"]), snake_case(kinds[code]["recipient"]))
+                        for code in delivery_kinds}
+        for start in range(0, len(events), chunk_size):
+            chunk = events[start:start + chunk_size]
+            deliveries = chunk[np.isin(chunk["kind"], delivery_kinds)]
+            times, sources, recipients = deliveries["time"], deliveries["src"], deliveries["dst"]
+            if self.collect_bandwidth_usage:
+                sizes = deliveries["size"].astype(np.int64)
+                _add_totals(self.bandwidth_usage, recipients, sizes)
+                if self.sink is not None:
+                    self.sink.extend(times, METRIC_BANDWIDTH, recipients, sizes)
+            if self.collect_message_counts:
+                _add_totals(self.message_counts, sources)
+                if self.sink is not None:
+                    self.sink.extend(times, METRIC_MESSAGE, sources, 1)
+            if self.collect_latency:
+                timed = ~np.isnan(deliveries["sent"])  # NaN: the message had no send time
+                latencies = (times - deliveries["sent"])[timed]
+                times, recipients = times[timed], recipients[timed]
+                kind_codes = deliveries["kind"][timed]
+                roles = self.roles
+                if roles is not None:
+                    assigned = (recipients >= 0) & (recipients < len(roles))
+                    recipient_roles = np.where(assigned, roles[np.where(assigned, recipients, 0)].astype(np.int64), -1)
+                for code, (message_type, role) in latency_keys.items():
+                    selected = kind_codes == code
+                    if not selected.any():
+                        continue
+                    if roles is None:
+                        self.latency_sketches.record_many(latencies[selected], message_type, role)
+                        continue
+                    selected_roles = recipient_roles[selected]
+                    for flags in np.unique(selected_roles).tolist():
+                        self.latency_sketches.record_many(latencies[selected][selected_roles == flags],
+                                                          message_type, role if flags < 0 else flags)
+                if self.sink is not None:
+                    self.sink.extend(times, METRIC_LATENCY, recipients, latencies)
+                if self.keep_samples:
+                    self.latency_measurements.extend(latencies.tolist())
+
+    def _now(self):
+        """
+        Get the timestamp of a new record.
+
+        Returns:
+            float: The current simulation time, or NaN without a simulator.
+        """
+        return self.simulator.current_time if self.simulator is not None else np.nan
 
     def record_bandwidth(self, node_id, bytes_used):
         """
@@ -29,6 +314,8 @@ class MetricsCollector:
         if node_id not in self.bandwidth_usage:
             self.bandwidth_usage[node_id] = 0
         self.bandwidth_usage[node_id] += bytes_used
+        if self.sink is not None:
+            self.sink.append(self._now(), METRIC_BANDWIDTH, node_id, bytes_used)
 
     def record_message(self, node_id):
         """
@@ -40,15 +327,109 @@ class MetricsCollector:
         if node_id not in self.message_counts:
             self.message_counts[node_id] = 0
         self.message_counts[node_id] += 1
+        if self.sink is not None:
+            self.sink.append(self._now(), METRIC_MESSAGE, node_id, 1)
 
-    def record_latency(self, latency):
+    def record_latency(self, latency, node_id=-1, message_type="any", role="any"):
         """
         Record a latency measurement.
 
         Args:
             latency (float): The latency in milliseconds.
+            node_id (int): The node that measured it, if any.
+            message_type (str): Type of the measured message, e.g. "signature".
+            role (int | str): Role of the measuring node (RoleAssignment flags or a name).
+        """
+        self.latency_sketches.record(latency, message_type, role)
+        if self.sink is not None:
+            self.sink.append(self._now(), METRIC_LATENCY, node_id, latency)
+        if self.keep_samples:
+            self.latency_measurements.append(latency)
+
+    def get_latencies(self):
+        """
+        Get every latency measurement, reading streamed ones back from the sink.
+
+        Returns:
+            numpy.ndarray: The latencies in milliseconds (empty if samples
+            are neither kept nor streamed; see `latency_sketches`).
+        """
+        if self.keep_samples or self.sink is None:
+            return np.asarray(self.latency_measurements, dtype=np.float64)
+        records = self.load(as_pandas=False)
+        return records["value"][records["metric"] == METRIC_LATENCY]
+
+    def load(self, as_pandas=True):
+        """
+        Load every streamed record so far; the sink stays open for more.
+
+        Args:
+            as_pandas (bool): Return a pandas DataFrame when pandas is installed.
+
+        Returns:
+            pandas.DataFrame | dict[str, numpy.ndarray]: The records (see `load_metrics`).
         """
-        self.latency_measurements.append(latency)
+        if self.sink is None:
+            raise ValueError("No metrics sink is attached")
+        return self.sink.read(as_pandas)
+
+    def close(self):
+        """Write the remaining streamed records and close the sink."""
+        if self.sink is not None:
+            self.sink.close()
+
+    def save_to_csv(self, output_dir):
+        """
+        Save the per-node totals, the latency quantiles, the aggregation progress
+        and the latency measurements as CSV files.
+
+        `latencies.csv` is only written when samples are kept or streamed.
+
+        Args:
+            output_dir (str): Directory the files are written to.
+
+        Returns:
+            list[str]: Paths of the written files.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        tables = {
+            "bandwidth_usage.csv": (("node_id", "bytes"), sorted(self.bandwidth_usage.items())),
+            "message_counts.csv": (("node_id", "messages"), sorted(self.message_counts.items())),
+        }
+        paths = []
+        for name, (header, rows) in tables.items():
+            path = os.path.join(output_dir, name)
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(header)
+                writer.writerows(rows)
+            paths.append(path)
+
+        summary = self.latency_sketches.summary()
+        path = os.path.join(output_dir, "latency_quantiles.csv")
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(summary[0]) if summary else ["message_type", "role"])
+            writer.writeheader()
+            writer.writerows(summary)
+        paths.append(path)
+
+        if self.aggregation_progress is not None:
+            path = os.path.join(output_dir, "aggregation_progress.csv")
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(("level", "slot", "time_ms", "covered_fraction"))
+                for level in self.aggregation_progress.levels:
+                    for slot in self.aggregation_progress.slots(level).tolist():
+                        times, fractions = self.aggregation_progress.steps(level, slot)
+                        writer.writerows((level, slot, time, fraction)
+                                         for time, fraction in zip(times.tolist(), fractions.tolist()))
+            paths.append(path)
+
+        if self.keep_samples or self.sink is not None:
+            path = os.path.join(output_dir, "latencies.csv")
+            np.savetxt(path, self.get_latencies(), fmt="%.17g", header="latency_ms", comments="")
+            paths.append(path)
+        return paths
 
     def get_metrics(self):
         """
@@ -60,5 +441,7 @@ class MetricsCollector:
         return {
             "bandwidth_usage": self.bandwidth_usage,
             "message_counts": self.message_counts,
-            "latency_measurements": self.latency_measurements,
-        }
\ No newline at end of file
+            "latency_measurements": self.get_latencies(),
+            "latency_sketches": self.latency_sketches,
+            "aggregation_progress": self.aggregation_progress,
+        }
@@ -0,0 +1,269 @@
+"""
+Aggregation progress tracking for the BEAMSim discrete-event simulation engine.
+
+This module defines the AggregationProgress class, which maintains the
+number of signatures covered by aggregated proofs over time, at subnet
+level (proofs sent by subnet aggregators) and global level (final proofs
+broadcast by global aggregators). Aggregators report the participation of
+every proof they produce; the covered count is kept as an array-backed step
+function per level, extended in amortized O(1) per report, so queries such
+as "when were 90% of the signatures aggregated" are array lookups.
+"""
+
+import numpy as np
+
+from beamsim.aggregation.bitfield import ParticipationBitfield
+
+LEVELS = ("subnet", "global")
+
+
+class ProgressSeries:
+    """
+    A class storing one step function of covered signatures over time.
+
+    Steps are (time, slot, covered) rows appended to preallocated arrays
+    that double when full. Reports arrive in simulation time order, so
+    within a slot both the times and the covered counts are non-decreasing.
+    """
+
+    def __init__(self, capacity=1024):
+        """
+        Initialize an empty series.
+
+        Args:
+            capacity (int): Initial number of steps allocated.
+        """
+        self._times = np.empty(capacity, dtype=np.float64)
+        self._slots = np.empty(capacity, dtype=np.int64)
+        self._covered = np.empty(capacity, dtype=np.int64)
+        self._count = 0
+
+    def append(self, time, slot, covered):
+        """
+        Add a step, merging it into the previous one when it has the same time and slot.
+
+        Args:
+            time (float): Time of the step (ms).
+            slot (int): Slot the covered signatures belong to.
+            covered (int): Signatures covered from this time on.
+        """
+        count = self._count
+        if count and self._times[count - 1] == time and self._slots[count - 1] == slot:
+            self._covered[count - 1] = covered
+            return
+        if count == len(self._times):
+            self._times = np.concatenate((self._times, np.empty_like(self._times)))
+            self._slots = np.concatenate((self._slots, np.empty_like(self._slots)))
+            self._covered = np.concatenate((self._covered, np.empty_like(self._covered)))
+        self._times[count] = time
+        self._slots[count] = slot
+        self._covered[count] = covered
+        self._count = count + 1
+
+    def steps(self, slot=None):
+        """
+        Get the steps of the series.
+
+        Args:
+            slot (int, optional): Slot to select; None returns every slot's steps.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Step times (ms) and covered signatures.
+        """
+        times = self._times[:self._count]
+        covered = self._covered[:self._count]
+        if slot is None:
+            return times, covered
+        selected = self._slots[:self._count] == slot
+        return times[selected], covered[selected]
+
+    def slots(self):
+        """
+        Get the slots with at least one step.
+
+        Returns:
+            numpy.ndarray: The slots, in increasing order.
+        """
+        return np.unique(self._slots[:self._count])
+
+    def __len__(self):
+        return self._count
+
+
+class AggregationProgress:
+    """
+    A class tracking how many signatures are covered by aggregated proofs, per level and slot.
+
+    Proofs of redundant aggregators overlap, so coverage is deduplicated
+    with one ParticipationBitfield per level and active slot: a report only
+    adds the validators its proof covers that no earlier proof of the same
+    level and slot did. Slots overlap (a slot's global aggregation runs
+    while the next one's signatures spread), so the state of the last
+    `max_active_slots` slots is kept.
+    """
+
+    def __init__(self, total_signatures, levels=LEVELS, capacity=1024, max_active_slots=4):
+        """
+        Initialize the tracker.
+
+        Args:
+            total_signatures (int): Signatures of a slot, the 100% mark.
+            levels (tuple[str, ...]): Levels reported.
+            capacity (int): Initial number of steps allocated per level.
+            max_active_slots (int): Slots whose coverage is still updated.
+        """
+        self.total_signatures = total_signatures
+        self.levels = levels
+        self.max_active_slots = max_active_slots
+        self.series = {level: ProgressSeries(capacity) for level in levels}
+        self._active = {}  # Slot -> {level: [covered bitfield, covered count]}
+
+    def _slot_state(self, slot):
+        """
+        Get the coverage state of a slot, starting it on its first report.
+
+        Args:
+            slot (int): The slot.
+
+        Returns:
+            dict[str, list]: Covered bitfield and count of every level.
+        """
+        state = self._active.get(slot)
+        if state is None:
+            state = self._active[slot] = {level: [ParticipationBitfield(), 0] for level in self.levels}
+            while len(self._active) > self.max_active_slots:
+                del self._active[min(self._active)]
+        return state
+
+    def report(self, level, slot, time, delta):
+        """
+        Add newly covered signatures.
+
+        Args:
+            level (str): One of `levels`.
+            slot (int): Slot of the signatures.
+            time (float): Time they are covered (ms).
+            delta (int): Number of newly covered signatures.
+        """
+        state = self._slot_state(slot)[level]
+        state[1] = min(state[1] + delta, self.total_signatures)
+        self.series[level].append(time, slot, state[1])
+
+    def cover(self, level, slot, time, participation=None, num_signatures=0):
+        """
+        Report a proof, adding the validators it covers that no earlier proof of the level did.
+
+        Args:
+            level (str): One of `levels`.
+            slot (int): Slot of the proof.
+            time (float): Time the proof is produced (ms).
+            participation (ParticipationBitfield, optional): Validators in the proof.
+            num_signatures (int): Signatures in the proof, used when it has no bitfield.
+        """
+        state = self._slot_state(slot)[level]
+        if participation is None:
+            delta = num_signatures
+        else:
+            delta = state[0].union_update(participation)
+        if delta:
+            self.report(level, slot, time, delta)
+
+    def covered(self, level="global", slot=None):
+        """
+        Get the signatures covered so far in a slot.
+
+        Args:
+            level (str): One of `levels`.
+            slot (int, optional): The slot. Defaults to the latest slot with a report.
+
+        Returns:
+            int: Covered signatures (0 if the slot is no longer active).
+        """
+        if slot is None:
+            if not self._active:
+                return 0
+            slot = max(self._active)
+        state = self._active.get(slot)
+        return state[level][1] if state is not None else 0
+
+    def steps(self, level="global", slot=None):
+        """
+        Get the step function of a level.
+
+        Args:
+            level (str): One of `levels`.
+            slot (int, optional): Slot to select; None returns every slot's steps.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Step times (ms) and covered fractions.
+        """
+        times, covered = self.series[level].steps(slot)
+        return times, covered / self.total_signatures
+
+    def fraction_at(self, times, level="global", slot=0):
+        """
+        Evaluate the covered fraction of a slot at given times.
+
+        Args:
+            times (numpy.ndarray | float): Times (ms).
+            level (str): One of `levels`.
+            slot (int): The slot.
+
+        Returns:
+            numpy.ndarray: Covered fraction at every time.
+        """
+        step_times, fractions = self.steps(level, slot)
+        indices = np.searchsorted(step_times, times, side="right") - 1
+        return np.where(indices >= 0, fractions[np.maximum(indices, 0)] if len(fractions) else 0.0, 0.0)
+
+    def time_to_reach(self, fractions, level="global", slot=0):
+        """
+        Get the first time a slot's coverage reaches given fractions.
+
+        Args:
+            fractions (numpy.ndarray | float): Fractions of `total_signatures` in [0, 1].
+            level (str): One of `levels`.
+            slot (int): The slot.
+
+        Returns:
+            numpy.ndarray | float: Time every fraction is reached (ms), NaN if it never is.
+        """
+        step_times, covered = self.series[level].steps(slot)
+        targets = np.ceil(np.asarray(fractions, dtype=np.float64) * self.total_signatures - 1e-9)
+        indices = np.searchsorted(covered, targets, side="left")
+        reached = indices < len(covered)
+        result = np.where(reached, step_times[np.minimum(indices, len(covered) - 1)] if len(covered) else 0.0,
+                          np.nan)
+        return float(result) if result.ndim == 0 else result
+
+    def slots(self, level="global"):
+        """
+        Get the slots a level has coverage in.
+
+        Args:
+            level (str): One of `levels`.
+
+        Returns:
+            numpy.ndarray: The slots, in increasing order.
+        """
+        return self.series[level].slots()
+
+
+def times_to_reach(progresses, fractions, level="global", slot=0):
+    """
+    Get the time every run's coverage reaches given fractions, for comparing many runs.
+
+    Args:
+        progresses (list[AggregationProgress]): One tracker per run.
+        fractions (numpy.ndarray | list[float]): Fractions of the signatures in [0, 1].
+        level (str): Level compared.
+        slot (int): Slot compared.
+
+    Returns:
+        numpy.ndarray: Times (ms) of shape (runs, fractions), NaN where not reached.
+    """
+    fractions = np.atleast_1d(np.asarray(fractions, dtype=np.float64))
+    result = np.full((len(progresses), len(fractions)), np.nan)
+    for row, progress in enumerate(progresses):
+        result[row] = progress.time_to_reach(fractions, level, slot)
+    return result
@@ -0,0 +1,237 @@
+"""
+Binary event recording for the BEAMSim discrete-event simulation engine.
+
+This module defines the EventRecorder class, which appends every event the
+simulator dispatches as a fixed-width record (time, kind, source, destination,
+message id, size, send time) to a memory-mapped binary file, and
+`read_events`, which maps a recorded file back as a NumPy structured array
+without loading it. `replay_events` feeds a recorded run to a
+MetricsCollector, so metrics can be recomputed over old runs without
+simulating them again.
+"""
+
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from beamsim.metrics.collector import payload_size
+
+# One record per dispatched event; `kind` indexes the kinds stored next to the file
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("kind", "<u2"),
+    ("src", "<i4"),
+    ("dst", "<i4"),
+    ("message_id", "<i8"),
+    ("size", "<u4"),
+    ("sent", "<f8"),
+])
+_RECORD = struct.Struct("<dHiiqId")
+
+MAGIC = b"BEAMEVT1"
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<8sIQ")  # Magic, record size, number of records
+
+
+def kinds_path(path):
+    """
+    Get the path of the kind table written next to an event file.
+
+    Args:
+        path (str): Path of the event file.
+
+    Returns:
+        str: Path of the JSON kind table.
+    """
+    return f"{path}.kinds.json"
+
+
+class EventRecorder:
+    """
+    A class appending the simulator's dispatched events to a memory-mapped file.
+
+    The file is a 64-byte header followed by RECORD_DTYPE records. It is
+    extended by `chunk_records` records at a time and remapped, so writing a
+    record is a single `struct.pack_into` into the mapping; the OS writes
+    the pages back. Deliveries record the sending node (the signing
+    validator for population signatures), the recipient, the payload's wire
+    size and the time the message was sent; other events record their
+    callback's node as both source and destination. The message id is the
+    `message_id` given by `Simulator.create_message` (-1 for messages built
+    directly), and a message without a send time records NaN as `sent`.
+    """
+
+    def __init__(self, path, chunk_records=1 << 16):
+        """
+        Create the event file.
+
+        Args:
+            path (str): Path of the event file; overwritten if it exists.
+            chunk_records (int): Records the file is extended by when full.
+        """
+        self.path = path
+        self.chunk_records = chunk_records
+        self.simulator = None
+        self.kinds = []  # Kind code -> {"name", and "payload"/"recipient" for deliveries}
+        self._kind_codes = {}
+        self.count = 0
+        self.capacity = 0
+        self._file = open(path, "w+b")
+        self._map = None
+        self._grow()
+
+    def _grow(self):
+        """Extend the file by `chunk_records` records and remap it."""
+        if self._map is not None:
+            self._map.close()
+        self.capacity += self.chunk_records
+        self._file.truncate(HEADER_SIZE + self.capacity * RECORD_DTYPE.itemsize)
+        self._map = mmap.mmap(self._file.fileno(), HEADER_SIZE + self.capacity * RECORD_DTYPE.itemsize)
+        self._write_header()
+
+    def _write_header(self):
+        """Write the magic, the record size and the record count."""
+        _HEADER.pack_into(self._map, 0, MAGIC, RECORD_DTYPE.itemsize, self.count)
+
+    def attach(self, simulator):
+        """
+        Record every event a simulator dispatches.
+
+        Args:
+            simulator (Simulator): The simulator.
+        """
+        self.simulator = simulator
+        simulator.recorder = self
+
+    def detach(self):
+        """Stop recording."""
+        if self.simulator is not None and self.simulator.recorder is self:
+            self.simulator.recorder = None
+
+    def _kind(self, key, kind):
+        """
+        Get the code of a kind, adding it to the table on first use.
+
+        Args:
+            key: Hashable identity of the kind.
+            kind (dict): Table entry of the kind.
+
+        Returns:
+            int: The kind code.
+        """
+        code = self._kind_codes[key] = len(self.kinds)
+        self.kinds.append(kind)
+        return code
+
+    def record_delivery(self, recipient, message):
+        """
+        Record a message delivery dispatched at the current time.
+
+        Args:
+            recipient (Node): The node receiving the message.
+            message (Message): The delivered message.
+        """
+        if self.count == self.capacity:
+            self._grow()
+        payload = message.payload
+        key = (type(payload), type(recipient))
+        kind = self._kind_codes.get(key)
+        if kind is None:
+            kind = self._kind(key, {"name": f"deliver {key[0].__name__} to {key[1].__name__}",
+                                    "payload": key[0].__name__, "recipient": key[1].__name__})
+        sender = message.sender
+        _RECORD.pack_into(
+            self._map, HEADER_SIZE + self.count * RECORD_DTYPE.itemsize,
+            self.simulator.current_time, kind,
+            sender.node_id if sender is not None else getattr(payload, "validator_id", -1),
+            recipient.node_id, message.message_id, payload_size(payload),
+            np.nan if message.timestamp is None else message.timestamp,
+        )
+        self.count += 1
+
+    def record_event(self, callback):
+        """
+        Record an event callback dispatched at the current time.
+
+        Args:
+            callback (callable): The event callback.
+        """
+        if self.count == self.capacity:
+            self._grow()
+        owner = getattr(callback, "__self__", None)
+        key = (type(owner), callback.__func__) if owner is not None else callback
+        kind = self._kind_codes.get(key)
+        if kind is None:
+            kind = self._kind(key, {"name": f"{type(owner).__name__}.{callback.__name__}" if owner is not None
+                                    else getattr(callback, "__qualname__", repr(callback))})
+        node_id = getattr(owner, "node_id", -1)
+        now = self.simulator.current_time
+        _RECORD.pack_into(self._map, HEADER_SIZE + self.count * RECORD_DTYPE.itemsize,
+                          now, kind, node_id, node_id, -1, 0, now)
+        self.count += 1
+
+    def flush(self):
+        """Write the record count, the mapped pages and the kind table to disk."""
+        self._write_header()
+        self._map.flush()
+        with open(kinds_path(self.path), "w") as file:
+            json.dump(self.kinds, file)
+
+    def close(self):
+        """Flush, unmap and trim the file to the recorded events."""
+        if self._file.closed:
+            return
+        self.detach()
+        self.flush()
+        self._map.close()
+        self._file.truncate(HEADER_SIZE + self.count * RECORD_DTYPE.itemsize)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+
+def read_events(path):
+    """
+    Map a recorded event file as a structured array.
+
+    Args:
+        path (str): Path of the event file.
+
+    Returns:
+        tuple[numpy.ndarray, list[dict]]: The records (a read-only memory map,
+        RECORD_DTYPE) and the kind table their `kind` field indexes.
+    """
+    with open(path, "rb") as file:
+        magic, record_size, count = _HEADER.unpack(file.read(_HEADER.size))
+    if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a BEAMSim event file")
+    with open(kinds_path(path)) as file:
+        kinds = json.load(file)
+    if not count:
+        return np.zeros(0, dtype=RECORD_DTYPE), kinds
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,)), kinds
+
+
+def replay_events(path, collector):
+    """
+    Feed the deliveries of a recorded run to a metrics collector.
+
+    Args:
+        path (str): Path of the event file.
+        collector (MetricsCollector): The collector; only its enabled metrics are computed.
+
+    Returns:
+        MetricsCollector: The collector.
+    """
+    events, kinds = read_events(path)
+    collector.replay(events, kinds)
+    return collector
@@ -0,0 +1,368 @@
+"""
+Streaming metrics sink for the BEAMSim discrete-event simulation engine.
+
+This module defines the MetricsSink class, which buffers metric records in
+a fixed pool of preallocated NumPy column chunks and writes full chunks to
+disk from a background thread: as Parquet row groups or Arrow IPC record
+batches when `pyarrow` is installed, as CSV otherwise. Memory therefore
+stays at `num_buffers` chunks however long the run is. `load_metrics` reads
+a written file back, memory-mapped where the format allows it.
+"""
+
+import os
+import queue
+import threading
+import warnings
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; records are written as CSV instead
+    pa = None
+
+try:
+    import pandas as pd
+except ImportError:  # pandas is optional; load_metrics then returns NumPy columns
+    pd = None
+
+# Columns of every record; `metric` is an index into METRIC_NAMES
+COLUMNS = (
+    ("time", np.float64),
+    ("metric", np.uint8),
+    ("node_id", np.int64),
+    ("value", np.float64),
+)
+
+# Metric recorded by each MetricsCollector method, by code
+METRIC_NAMES = ("bandwidth", "message", "latency")
+METRIC_BANDWIDTH, METRIC_MESSAGE, METRIC_LATENCY = range(len(METRIC_NAMES))
+
+FORMATS = ("parquet", "arrow", "csv")
+_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+
+
+def resolve_format(output_format="auto"):
+    """
+    Resolve the file format records are written in.
+
+    Args:
+        output_format (str): "parquet", "arrow", "csv", or "auto" for Parquet
+            when pyarrow is installed and CSV otherwise.
+
+    Returns:
+        str: The format.
+    """
+    if output_format == "auto":
+        return "parquet" if pa is not None else "csv"
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown metrics format: {output_format}")
+    if output_format != "csv" and pa is None:
+        raise ImportError(f"Writing {output_format} metrics requires pyarrow")
+    return output_format
+
+
+class MetricsSink:
+    """
+    A bounded-memory, append-only store of (time, metric, node_id, value) records.
+
+    Records are appended to the current chunk in place. A full chunk is
+    queued for the writer thread and replaced by a free one from the pool;
+    if the writer falls `num_buffers - 1` chunks behind, appending blocks
+    until it catches up instead of allocating more.
+    """
+
+    def __init__(self, path, chunk_size=65536, num_buffers=4, output_format="auto"):
+        """
+        Initialize the sink and start its writer thread.
+
+        Args:
+            path (str): Output file; the format's extension is added if missing.
+            chunk_size (int): Records per chunk (and per Parquet row group / Arrow batch).
+            num_buffers (int): Chunks in the pool, at least 2.
+            output_format (str): "parquet", "arrow", "csv" or "auto".
+        """
+        if num_buffers < 2:
+            raise ValueError("num_buffers must be at least 2")
+        self.output_format = resolve_format(output_format)
+        extension = _EXTENSIONS[self.output_format]
+        self.path = path if path.endswith(extension) else path + extension
+        self.chunk_size = chunk_size
+        self.records_written = 0
+        self.chunks_written = 0
+        self._submitted = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._free = queue.Queue()
+        for _ in range(num_buffers - 1):
+            self._free.put(self._allocate())
+        self._pending = queue.Queue()
+        self._columns = self._allocate()
+        self._count = 0
+        self._error = None
+        self._closed = False
+        self._writer = None
+        self._thread = threading.Thread(target=self._write_loop, name="metrics-sink", daemon=True)
+        self._thread.start()
+
+    def _allocate(self):
+        """
+        Allocate one chunk.
+
+        Returns:
+            tuple[numpy.ndarray, ...]: One array of `chunk_size` rows per column.
+        """
+        return tuple(np.empty(self.chunk_size, dtype=dtype) for _, dtype in COLUMNS)
+
+    def append(self, time, metric, node_id, value):
+        """
+        Append one record.
+
+        Args:
+            time (float): Simulation time of the record (ms).
+            metric (int): Metric code (see METRIC_NAMES).
+            node_id (int): Node the record is about (-1 for none).
+            value (float): The measured value.
+        """
+        if self._closed:
+            raise ValueError(f"Metrics sink {self.path} is closed")
+        columns = self._columns
+        index = self._count
+        columns[0][index] = time
+        columns[1][index] = metric
+        columns[2][index] = node_id
+        columns[3][index] = value
+        self._count = index + 1
+        if self._count == self.chunk_size:
+            self._submit()
+
+    def extend(self, times, metrics, node_ids, values):
+        """
+        Append many records at once.
+
+        Scalars are broadcast to the length of the longest argument.
+
+        Args:
+            times (numpy.ndarray | float): Simulation time of every record (ms).
+            metrics (numpy.ndarray | int): Metric code of every record.
+            node_ids (numpy.ndarray | int): Node of every record.
+            values (numpy.ndarray | float): Value of every record.
+        """
+        if self._closed:
+            raise ValueError(f"Metrics sink {self.path} is closed")
+        arrays = np.broadcast_arrays(*(np.asarray(column) for column in (times, metrics, node_ids, values)))
+        total = len(arrays[0]) if arrays[0].ndim else 1
+        arrays = [array.reshape(-1) for array in arrays]
+        start = 0
+        while start < total:
+            count = min(total - start, self.chunk_size - self._count)
+            for column, array in zip(self._columns, arrays):
+                column[self._count:self._count + count] = array[start:start + count]
+            self._count += count
+            start += count
+            if self._count == self.chunk_size:
+                self._submit()
+
+    def _submit(self):
+        """Queue the current chunk for writing and continue in a free one."""
+        if self._closed:
+            raise ValueError(f"Metrics sink {self.path} is closed")
+        self._raise_error()
+        self._pending.put((self._columns, self._count))
+        self._submitted += self._count
+        self._columns = self._free.get()
+        self._count = 0
+
+    def flush(self):
+        """
+        Write every record appended so far and wait until the writer thread has written it.
+
+        CSV files can be read after a flush; Parquet and Arrow files only
+        after `close`, which writes their footer, or through `read`.
+        """
+        if self._count:
+            self._submit()
+        self._pending.join()
+        self._raise_error()
+
+    def read(self, as_pandas=True):
+        """
+        Load every record appended so far, leaving the sink open for more.
+
+        The records are flushed first. A Parquet or Arrow file only becomes
+        readable once its footer is written, so an open one is finished,
+        read, and started again with the records read back.
+
+        Args:
+            as_pandas (bool): Return a pandas DataFrame when pandas is installed.
+
+        Returns:
+            pandas.DataFrame | dict[str, numpy.ndarray]: The records (see `load_metrics`).
+        """
+        self.flush()
+        if self._closed:
+            return load_metrics(self.path, as_pandas)
+        # The writer thread is idle after the flush until the next chunk is submitted
+        if self._writer is None:
+            self._write_chunk(self._allocate(), 0)
+        if self.output_format == "csv":
+            return load_metrics(self.path, as_pandas)
+
+        self._writer.close()
+        if self.output_format == "parquet":
+            table = pq.read_table(self.path)
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table, row_group_size=self.chunk_size)
+        else:
+            with pa.OSFile(self.path) as file:
+                table = pa.ipc.open_file(file).read_all()
+            self._writer = pa.ipc.new_file(pa.OSFile(self.path, "wb"), table.schema)
+            self._writer.write_table(table, max_chunksize=self.chunk_size)
+        return _from_table(table, as_pandas)
+
+    def close(self):
+        """Flush the remaining records, stop the writer thread and close the file."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._pending.put(None)
+        self._thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        """
+        Get the number of records appended, written or not.
+
+        Returns:
+            int: Number of records.
+        """
+        return self._submitted + self._count
+
+    def _raise_error(self):
+        """Re-raise an error of the writer thread in the simulation thread."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Writing metrics to {self.path} failed") from error
+
+    def _write_loop(self):
+        """Write queued chunks until the sentinel arrives, then close the file."""
+        while True:
+            item = self._pending.get()
+            if item is None:
+                self._close_writer()
+                self._pending.task_done()
+                return
+            columns, count = item
+            try:
+                if self._error is None:
+                    self._write_chunk(columns, count)
+                    self.records_written += count
+                    self.chunks_written += 1
+            except Exception as error:  # Surfaced by the next append, flush or close
+                self._error = error
+            finally:
+                self._free.put(columns)
+                self._pending.task_done()
+
+    def _write_chunk(self, columns, count):
+        """
+        Write the first `count` records of a chunk.
+
+        Args:
+            columns (tuple[numpy.ndarray, ...]): The chunk.
+            count (int): Number of filled records.
+        """
+        if self.output_format == "csv":
+            if self._writer is None:
+                self._writer = open(self.path, "w")
+                self._writer.write(",".join(name for name, _ in COLUMNS) + "\n")
+            # repr() of a Python float is its shortest exact decimal form
+            self._writer.write("".join(
+                f"{time!r},{metric},{node_id},{value!r}\n"
+                for time, metric, node_id, value in zip(*(column[:count].tolist() for column in columns))
+            ))
+            self._writer.flush()
+            return
+
+        schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in COLUMNS])
+        batch = pa.RecordBatch.from_arrays([pa.array(column[:count]) for column in columns], schema=schema)
+        if self._writer is None:
+            if self.output_format == "parquet":
+                self._writer = pq.ParquetWriter(self.path, schema)
+            else:
+                self._writer = pa.ipc.new_file(pa.OSFile(self.path, "wb"), schema)
+        if self.output_format == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def _close_writer(self):
+        """Close the output file, creating an empty one if nothing was written."""
+        try:
+            if self._writer is None:
+                self._write_chunk(self._allocate(), 0)
+            self._writer.close()
+        except Exception as error:
+            self._error = error
+
+
+def load_metrics(path, as_pandas=True):
+    """
+    Load the records written by a MetricsSink.
+
+    Parquet and Arrow files are memory-mapped, so their numeric columns are
+    not copied until pandas needs them as one block; CSV is parsed.
+
+    Args:
+        path (str): File written by a MetricsSink.
+        as_pandas (bool): Return a pandas DataFrame (with `metric` as a
+            categorical of METRIC_NAMES) when pandas is installed.
+
+    Returns:
+        pandas.DataFrame | dict[str, numpy.ndarray]: The records, one column per field.
+    """
+    if path.endswith(".csv"):
+        if as_pandas and pd is not None:
+            frame = pd.read_csv(path, dtype=dict(COLUMNS))
+            frame["metric"] = pd.Categorical.from_codes(frame["metric"], METRIC_NAMES)
+            return frame
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)  # An empty run has a header only
+            records = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=1, dtype=np.dtype(list(COLUMNS)))
+        return {name: np.ascontiguousarray(records[name]) for name, _ in COLUMNS}
+
+    if pa is None:
+        raise ImportError(f"Reading {path} requires pyarrow")
+    if path.endswith(".parquet"):
+        table = pq.read_table(path, memory_map=True)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return _from_table(table, as_pandas)
+
+
+def _from_table(table, as_pandas):
+    """
+    Convert an Arrow table of records to the form `load_metrics` returns.
+
+    Args:
+        table (pyarrow.Table): The records.
+        as_pandas (bool): Return a pandas DataFrame when pandas is installed.
+
+    Returns:
+        pandas.DataFrame | dict[str, numpy.ndarray]: The records, one column per field.
+    """
+    if as_pandas and pd is not None:
+        frame = table.to_pandas(split_blocks=True)
+        frame["metric"] = pd.Categorical.from_codes(frame["metric"], METRIC_NAMES)
+        return frame
+    return {name: table.column(name).to_numpy() for name, _ in COLUMNS}
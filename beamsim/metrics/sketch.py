@@ -0,0 +1,350 @@
+"""
+Latency quantile sketches for the BEAMSim discrete-event simulation engine.
+
+This module defines the LatencySketch class, a fixed-size log-bucketed
+histogram (in the style of DDSketch / HDR histograms) answering quantile
+queries with a bounded relative error, and the LatencySketches class,
+which keeps one sketch per (message type, node role). Sketches with the
+same parameters merge by adding their bucket counts, so sketches from
+several processes or seeds of a sweep combine exactly.
+"""
+
+import math
+
+import numpy as np
+
+from beamsim.network.assignment import ROLE_VALIDATOR, ROLE_SUBNET_AGGREGATOR, ROLE_GLOBAL_AGGREGATOR
+
+_ROLE_NAMES = (
+    (ROLE_VALIDATOR, "validator"),
+    (ROLE_SUBNET_AGGREGATOR, "subnet_aggregator"),
+    (ROLE_GLOBAL_AGGREGATOR, "global_aggregator"),
+)
+
+
+def role_name(role):
+    """
+    Get the name a role is keyed by.
+
+    Args:
+        role (int | str): Role bit flags of a RoleAssignment, or a name.
+
+    Returns:
+        str: The name, with combined roles joined by "+".
+    """
+    if isinstance(role, str):
+        return role
+    return "+".join(name for flag, name in _ROLE_NAMES if role & flag) or "none"
+
+
+class LatencySketch:
+    """
+    A class summarizing latencies in logarithmically sized buckets.
+
+    Bucket `i` holds values in (gamma^(i-1), gamma^i] with
+    gamma = (1 + a) / (1 - a), so every quantile is returned within a
+    relative error `a` of a value in the data. The bucket array covers
+    [min_value, max_value] and is allocated once; values below `min_value`
+    are counted as zero and values above `max_value` fall in the last bucket
+    (the exact maximum is kept separately).
+    """
+
+    __slots__ = ("relative_accuracy", "min_value", "max_value", "gamma", "_log_gamma", "_offset",
+                 "counts", "zero_count", "count", "sum", "min", "max")
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-3, max_value=1e7):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            relative_accuracy (float): Relative error bound of the quantiles, in (0, 1).
+            min_value (float): Smallest value told apart from zero (ms).
+            max_value (float): Largest value with its own bucket (ms).
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma)
+        num_buckets = math.ceil(math.log(max_value) / self._log_gamma) - self._offset + 1
+        self.counts = np.zeros(num_buckets, dtype=np.int64)
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value):
+        """
+        Add one value.
+
+        Args:
+            value (float): The latency (ms).
+        """
+        if value < self.min_value:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma) - self._offset
+            self.counts[min(index, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def record_many(self, values):
+        """
+        Add many values at once.
+
+        Args:
+            values (numpy.ndarray): The latencies (ms).
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        if not len(values):
+            return
+        positive = values[values >= self.min_value]
+        indices = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64) - self._offset
+        np.minimum(indices, len(self.counts) - 1, out=indices)
+        self.counts += np.bincount(indices, minlength=len(self.counts))
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def compatible(self, other):
+        """
+        Check whether another sketch has the same buckets.
+
+        Args:
+            other (LatencySketch): The other sketch.
+
+        Returns:
+            bool: True if the two can be merged.
+        """
+        return (self.gamma == other.gamma and self._offset == other._offset
+                and len(self.counts) == len(other.counts))
+
+    def merge(self, other):
+        """
+        Add the values of another sketch to this one.
+
+        Args:
+            other (LatencySketch): A sketch with the same parameters.
+
+        Returns:
+            LatencySketch: This sketch.
+        """
+        if not self.compatible(other):
+            raise ValueError("Cannot merge sketches with different accuracy or value range")
+        self.counts += other.counts
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def copy(self):
+        """
+        Copy the sketch.
+
+        Returns:
+            LatencySketch: An independent sketch with the same values.
+        """
+        sketch = LatencySketch(self.relative_accuracy, self.min_value, self.max_value)
+        return sketch.merge(self)
+
+    @property
+    def mean(self):
+        """
+        Get the mean of the values.
+
+        Returns:
+            float: The exact mean, or NaN for an empty sketch.
+        """
+        return self.sum / self.count if self.count else math.nan
+
+    def bucket_values(self, indices):
+        """
+        Get the value every bucket reports, the point of least relative error in it.
+
+        Args:
+            indices (numpy.ndarray): Bucket indices.
+
+        Returns:
+            numpy.ndarray: The bucket values (ms).
+        """
+        return 2 * self.gamma ** (np.asarray(indices) + self._offset) / (self.gamma + 1)
+
+    def quantiles(self, qs):
+        """
+        Estimate several quantiles.
+
+        Args:
+            qs (numpy.ndarray | list[float]): Quantiles in [0, 1].
+
+        Returns:
+            numpy.ndarray: The estimates (ms), NaN for an empty sketch.
+        """
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        ranks = np.floor(qs * (self.count - 1)).astype(np.int64) - self.zero_count
+        indices = np.searchsorted(np.cumsum(self.counts), ranks, side="right")
+        estimates = self.bucket_values(np.minimum(indices, len(self.counts) - 1))
+        estimates[ranks < 0] = 0.0
+        return np.clip(estimates, self.min, self.max)
+
+    def quantile(self, q):
+        """
+        Estimate one quantile.
+
+        Args:
+            q (float): Quantile in [0, 1].
+
+        Returns:
+            float: The estimate (ms).
+        """
+        return float(self.quantiles([q])[0])
+
+    def histogram(self):
+        """
+        Get the non-empty range of buckets, for plotting.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Bucket edges (ms) and counts.
+        """
+        filled = np.flatnonzero(self.counts)
+        if not len(filled):
+            return np.zeros(1), np.zeros(0, dtype=np.int64)
+        indices = np.arange(filled[0], filled[-1] + 1)
+        edges = self.gamma ** (np.append(indices[0] - 1, indices) + self._offset)
+        return edges, self.counts[indices]
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        p50, p99, p999 = self.quantiles([0.5, 0.99, 0.999])
+        return f"LatencySketch(count={self.count}, p50={p50:.2f}, p99={p99:.2f}, p999={p999:.2f})"
+
+
+class LatencySketches:
+    """
+    A class keeping one LatencySketch per (message type, node role).
+
+    All sketches share the same parameters, so any subset can be merged,
+    and two LatencySketches merge key by key.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-3, max_value=1e7):
+        """
+        Initialize without any sketch; one is created for every new key.
+
+        Args:
+            relative_accuracy (float): Relative error bound of the quantiles.
+            min_value (float): Smallest value told apart from zero (ms).
+            max_value (float): Largest value with its own bucket (ms).
+        """
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.sketches = {}
+
+    def sketch(self, message_type, role):
+        """
+        Get the sketch of a key, creating it if needed.
+
+        Args:
+            message_type (str): Type of the measured messages, e.g. "signature".
+            role (int | str): Role of the measuring node (see `role_name`).
+
+        Returns:
+            LatencySketch: The sketch.
+        """
+        key = (message_type, role_name(role))
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = LatencySketch(self.relative_accuracy, self.min_value, self.max_value)
+        return sketch
+
+    def record(self, latency, message_type="any", role="any"):
+        """
+        Add one latency.
+
+        Args:
+            latency (float): The latency (ms).
+            message_type (str): Type of the measured message.
+            role (int | str): Role of the measuring node.
+        """
+        self.sketch(message_type, role).record(latency)
+
+    def record_many(self, latencies, message_type="any", role="any"):
+        """
+        Add many latencies of the same key.
+
+        Args:
+            latencies (numpy.ndarray): The latencies (ms).
+            message_type (str): Type of the measured messages.
+            role (int | str): Role of the measuring nodes.
+        """
+        self.sketch(message_type, role).record_many(latencies)
+
+    def merge(self, other):
+        """
+        Add every sketch of another LatencySketches to the sketch of the same key.
+
+        Args:
+            other (LatencySketches): Sketches with the same parameters.
+
+        Returns:
+            LatencySketches: These sketches.
+        """
+        for (message_type, role), sketch in other.sketches.items():
+            self.sketch(message_type, role).merge(sketch)
+        return self
+
+    def get(self, message_type=None, role=None):
+        """
+        Merge the sketches matching a message type and/or role.
+
+        Args:
+            message_type (str, optional): Message type to select; None selects all.
+            role (int | str, optional): Role to select; None selects all.
+
+        Returns:
+            LatencySketch: A new sketch of every matching latency.
+        """
+        role = None if role is None else role_name(role)
+        merged = LatencySketch(self.relative_accuracy, self.min_value, self.max_value)
+        for (key_type, key_role), sketch in self.sketches.items():
+            if message_type in (None, key_type) and role in (None, key_role):
+                merged.merge(sketch)
+        return merged
+
+    def summary(self, quantiles=(0.5, 0.99, 0.999)):
+        """
+        Summarize every sketch.
+
+        Args:
+            quantiles (tuple[float, ...]): Quantiles reported for each key.
+
+        Returns:
+            list[dict]: One row per key with its count, mean, maximum and quantiles.
+        """
+        rows = []
+        for (message_type, role), sketch in sorted(self.sketches.items()):
+            row = {"message_type": message_type, "role": role, "count": sketch.count,
+                   "mean": sketch.mean, "max": sketch.max}
+            for q, value in zip(quantiles, sketch.quantiles(quantiles).tolist()):
+                row[f"p{q * 100:g}"] = value
+            rows.append(row)
+        return rows
+
+    def __len__(self):
+        return len(self.sketches)
@@ -0,0 +1,314 @@
+"""
+Live telemetry for the BEAMSim discrete-event simulation engine.
+
+This module defines the TelemetryBuffer class, a lock-free ring written by
+the simulation thread and read by any other thread, and the LiveTelemetry
+class, which samples the simulator from a self-rescheduling event into
+that ring and serves the latest stats (events per second, simulated time,
+queue size, aggregation coverage, resident memory and the estimated time
+left) from an asyncio HTTP server in a side thread, as JSON on `/` and in
+the Prometheus text format on `/metrics`.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # resource is Unix-only; memory then falls back to 0 without /proc
+    resource = None
+
+# Fields of every sample pushed by the simulation thread
+FIELDS = ("wall_time", "sim_time", "events", "queue_size", "coverage")
+
+
+def resident_memory():
+    """
+    Get the resident memory of this process.
+
+    Returns:
+        int: Resident set size (in bytes), the peak where the current one is
+        not available, 0 if neither is.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class TelemetryBuffer:
+    """
+    A single-producer ring of fixed-width samples, read without locks.
+
+    The producer writes a sample into the next row and only then publishes
+    it by advancing `written`, a plain integer whose update is atomic under
+    the interpreter lock, so `push` never waits for readers. A reader
+    copies the rows it wants and re-reads `written`: rows the producer has
+    lapped in the meantime are dropped rather than returned torn.
+    """
+
+    def __init__(self, capacity=64, fields=FIELDS):
+        """
+        Initialize an empty ring.
+
+        Args:
+            capacity (int): Samples retained.
+            fields (tuple[str, ...]): Names of the values of a sample.
+        """
+        self.fields = fields
+        self.capacity = capacity
+        self._rows = np.zeros((capacity, len(fields)), dtype=np.float64)
+        self.written = 0  # Samples published, including overwritten ones
+
+    def push(self, values):
+        """
+        Write and publish a sample; called by the producer thread only.
+
+        Args:
+            values (tuple[float, ...]): One value per field.
+        """
+        self._rows[self.written % self.capacity] = values
+        self.written += 1
+
+    def read(self, count=None):
+        """
+        Copy the latest published samples.
+
+        Args:
+            count (int, optional): Samples wanted. Defaults to all retained ones.
+
+        Returns:
+            numpy.ndarray: Samples x fields, oldest first (possibly fewer than asked).
+        """
+        written = self.written
+        count = min(written, self.capacity if count is None else count, self.capacity)
+        rows = self._rows[np.arange(written - count, written) % self.capacity]
+        # Rows overwritten while copying were from before the producer's current position
+        lapped = max(0, self.written - self.capacity + 1 - (written - count))
+        return rows[lapped:]
+
+    def latest(self):
+        """
+        Get the latest sample.
+
+        Returns:
+            dict[str, float] | None: The sample by field name, None before the first push.
+        """
+        rows = self.read(1)
+        return dict(zip(self.fields, rows[-1].tolist())) if len(rows) else None
+
+
+class LiveTelemetry:
+    """
+    A class serving live simulation stats over a local HTTP endpoint.
+
+    The simulation thread only runs the sampling event every `interval_ms`
+    of simulated time, which pushes one sample into a TelemetryBuffer;
+    rates, memory and the ETA are computed by the server thread when a
+    request arrives. The sampling event stops rescheduling itself once
+    nothing else is left in the queue, and is left out of the event counts
+    and rates it reports.
+    """
+
+    def __init__(self, simulator, interval_ms=100, end_time=None, host="127.0.0.1", port=0, capacity=64):
+        """
+        Initialize the telemetry without starting it.
+
+        Args:
+            simulator (Simulator): The simulator sampled.
+            interval_ms (float): Simulated time between samples (ms).
+            end_time (float, optional): Simulated time the run ends at (ms), for the ETA.
+            host (str): Address the server listens on.
+            port (int): Port the server listens on; 0 picks a free one.
+            capacity (int): Samples retained; rates are measured over them.
+        """
+        if interval_ms <= 0:
+            raise ValueError("interval_ms must be positive")
+        self.simulator = simulator
+        self.interval_ms = interval_ms
+        self.end_time = end_time
+        self.host = host
+        self.port = port
+        self.buffer = TelemetryBuffer(capacity)
+        self.running = False
+        self._thread = None
+        self._loop = None
+        self._task = None
+        self._error = None  # Exception raised while the server thread was starting
+        self._samples = 0  # Sampling events dispatched, not counted as simulation events
+
+    @classmethod
+    def from_config(cls, simulator, config, end_time=None):
+        """
+        Build the telemetry from the `metrics` section of a loaded configuration.
+
+        Args:
+            simulator (Simulator): The simulator sampled.
+            config (ConfigManager): The simulation configuration.
+            end_time (float, optional): Simulated time the run ends at (ms).
+
+        Returns:
+            LiveTelemetry | None: The telemetry, or None if `metrics.telemetry_port` is not set.
+        """
+        port = config.get("metrics.telemetry_port")
+        if port is None:
+            return None
+        return cls(simulator, config.get("metrics.telemetry_interval_ms", 100), end_time,
+                   config.get("metrics.telemetry_host", "127.0.0.1"), port)
+
+    def start(self):
+        """
+        Start the server thread and schedule the first sample at the current time.
+
+        Returns:
+            str: URL of the server.
+
+        Raises:
+            OSError: If the server cannot listen on `host` and `port`, as raised in the server thread.
+        """
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), name="beamsim-telemetry", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            error, self._error = self._error, None
+            raise error
+        self.running = True
+        self.simulator.schedule_event(self.simulator.current_time, self._sample)
+        return f"http://{self.host}:{self.port}/"
+
+    def stop(self):
+        """Stop sampling and shut the server down."""
+        self.running = False
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            self._thread.join()
+            self._loop = None
+
+    def _sample(self):
+        """
+        Push a sample and schedule the next one while other events are pending.
+
+        The events of a sample are the dispatched events minus the sampling
+        events themselves, so the reported rate is the simulation's own.
+        """
+        simulator = self.simulator
+        self._samples += 1
+        queue_size = len(simulator.event_queue)
+        progress = simulator.progress
+        coverage = np.nan
+        if progress is not None and progress.total_signatures:
+            coverage = progress.covered() / progress.total_signatures
+        self.buffer.push((time.perf_counter(), simulator.current_time,
+                          simulator.events_scheduled() - queue_size - self._samples, queue_size, coverage))
+        # With nothing else left in the queue, the next sample would keep the run going forever
+        if self.running and queue_size:
+            simulator.schedule_event(simulator.current_time + self.interval_ms, self._sample)
+
+    def stats(self):
+        """
+        Compute the current stats from the retained samples.
+
+        Event and simulated-time rates are measured between the oldest and
+        the latest retained sample; the ETA extrapolates the simulated-time
+        rate to `end_time`.
+
+        Returns:
+            dict: The stats; values that cannot be computed yet are None.
+        """
+        rows = self.buffer.read()
+        stats = {"samples": self.buffer.written, "sim_time_ms": None, "events": None, "queue_size": None,
+                 "coverage": None, "events_per_sec": None, "sim_ms_per_sec": None,
+                 "rss_bytes": resident_memory(), "eta_sec": None}
+        if not len(rows):
+            return stats
+        wall_time, sim_time, events, queue_size, coverage = rows[-1].tolist()
+        stats.update(sim_time_ms=sim_time, events=int(events), queue_size=int(queue_size),
+                     coverage=None if np.isnan(coverage) else coverage)
+        first_wall_time, first_sim_time, first_events = rows[0, :3].tolist()
+        elapsed = wall_time - first_wall_time
+        if elapsed > 0:
+            stats["events_per_sec"] = (events - first_events) / elapsed
+            sim_rate = stats["sim_ms_per_sec"] = (sim_time - first_sim_time) / elapsed
+            if self.end_time is not None and sim_rate > 0:
+                stats["eta_sec"] = max(self.end_time - sim_time, 0.0) / sim_rate
+        return stats
+
+    def prometheus(self):
+        """
+        Format the current stats in the Prometheus text exposition format.
+
+        Returns:
+            str: One gauge per stat that has a value.
+        """
+        lines = []
+        for name, value in self.stats().items():
+            if value is None:
+                continue
+            lines.append(f"# TYPE beamsim_{name} gauge")
+            lines.append(f"beamsim_{name} {value:.17g}")
+        return "\n".join(lines) + "\n"
+
+    def _serve(self, ready):
+        """
+        Run the HTTP server on an event loop of its own until `stop`.
+
+        Args:
+            ready (threading.Event): Set once the server is listening, or once it
+                failed to start, with the exception kept for `start` to raise.
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            self.port = server.sockets[0].getsockname()[1]
+            self._task = loop.create_task(server.serve_forever())
+            self._loop = loop
+        except Exception as error:
+            self._error = error
+            loop.close()
+            return
+        finally:
+            ready.set()
+        try:
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+
+    async def _handle(self, reader, writer):
+        """
+        Answer one HTTP request: JSON stats on `/`, Prometheus text on `/metrics`.
+
+        Args:
+            reader (asyncio.StreamReader): The request.
+            writer (asyncio.StreamWriter): The response.
+        """
+        try:
+            request = (await reader.readline()).split()
+            while (await reader.readline()).strip():
+                pass  # Headers are not used
+            path = request[1].decode("latin-1").split("?")[0] if len(request) > 1 else "/"
+            if path in ("/", "/stats"):
+                status, content_type, body = "200 OK", "application/json", json.dumps(self.stats())
+            elif path == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", self.prometheus()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "Not found\n"
+            body = body.encode()
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
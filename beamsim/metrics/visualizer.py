@@ -1,66 +1,297 @@
 """
 Metrics visualization for the BEAMSim discrete-event simulation engine.
 
-This module defines the MetricsVisualizer class, which provides methods
-to visualize metrics collected during simulation runs.
+This module defines the MetricsVisualizer class, which plots the metrics
+collected during simulation runs aggregated by node role: percentile bands
+(median to p90, and the maximum) of per-node counters over time, or of
+their totals, and latency distributions per role. Figures are rendered
+with the Agg backend straight to image files, without pyplot state or a
+display, and `render_runs` renders the figures of many runs in parallel
+worker processes.
 """
 
-import matplotlib.pyplot as plt
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure  # A bare Figure renders with Agg; no pyplot, no window
+
+from beamsim.metrics.sketch import role_name
+
+# Files written by `MetricsVisualizer.render`
+STANDARD_CHARTS = ("bandwidth_usage.png", "message_counts.png", "latency_distribution.png")
+_COLORS = ("tab:blue", "tab:orange", "tab:green", "tab:red", "tab:purple", "tab:brown")
+
+
+def _totals(counts):
+    """
+    Convert per-node totals to sorted arrays.
+
+    Args:
+        counts (dict[int, int]): Node id -> total.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Node ids and their totals.
+    """
+    node_ids = np.fromiter(counts.keys(), np.int64, len(counts))
+    totals = np.fromiter(counts.values(), np.float64, len(counts))
+    order = np.argsort(node_ids)
+    return node_ids[order], totals[order]
+
+
+def _order_statistics(values, quantiles):
+    """
+    Get nearest-rank quantiles of every row with partial sorts instead of a full sort.
+
+    Quantiles are taken in increasing order, each partitioning only the
+    part of the rows above the previous one; the maximum is a plain max.
+
+    Args:
+        values (numpy.ndarray): Samples x nodes, reordered in place.
+        quantiles (tuple[float, ...]): Increasing quantiles in [0, 1].
+
+    Returns:
+        numpy.ndarray: One row per quantile, one value per sample.
+    """
+    last = values.shape[1] - 1
+    result = np.empty((len(quantiles), len(values)), dtype=values.dtype)
+    offset = 0  # Rank of the first remaining column
+    for row, q in enumerate(quantiles):
+        rank = round(q * last) - offset
+        if rank == values.shape[1] - 1:
+            result[row] = values.max(axis=1)
+            continue
+        values.partition(rank, axis=1)
+        result[row] = values[:, rank]
+        values = values[:, rank:]
+        offset += rank
+    return result
 
 
 class MetricsVisualizer:
     """
     A class for visualizing metrics collected during the simulation.
+
+    Only arrays are kept (per-node totals, the latency sketches and the
+    snapshot series), so a visualizer is cheap to pickle to a worker
+    process. Nodes are grouped by role when a role array (RoleAssignment
+    or ValidatorPopulation `roles`, indexed by node id) is given; nodes
+    outside it, or all nodes without one, form a single "all" group.
     """
 
-    def __init__(self, metrics_collector):
+    def __init__(self, metrics_collector, roles=None, snapshots=None):
         """
         Initialize the metrics visualizer.
 
         Args:
             metrics_collector (MetricsCollector): The metrics collector instance.
+            roles (numpy.ndarray, optional): Role bit flags of every node, by node id.
+            snapshots (MetricsSnapshots, optional): Snapshots tracking the collector
+                (see `MetricsSnapshots.track_collector`), for the plots over time.
+        """
+        self.bandwidth = _totals(metrics_collector.bandwidth_usage)
+        self.messages = _totals(metrics_collector.message_counts)
+        self.latency_sketches = metrics_collector.latency_sketches
+        self.roles = None if roles is None else np.asarray(roles)
+        self.series = {}
+        if snapshots is not None:
+            for name in ("bandwidth_usage", "message_counts"):
+                if name in snapshots.names():
+                    self.series[name] = snapshots.history(name)
+
+    def role_groups(self, node_ids):
+        """
+        Group nodes by role.
+
+        Args:
+            node_ids (numpy.ndarray): Node ids.
+
+        Returns:
+            dict[str, numpy.ndarray]: Role name -> positions in `node_ids`.
         """
-        self.metrics_collector = metrics_collector
+        if self.roles is None:
+            return {"all": np.arange(len(node_ids))}
+        known = node_ids < len(self.roles)
+        flags = np.where(known, self.roles[np.minimum(node_ids, len(self.roles) - 1)], -1)
+        unique, inverse = np.unique(flags, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(unique)))[:-1]
+        return {("all" if flag < 0 else role_name(int(flag))): positions
+                for flag, positions in zip(unique.tolist(), np.split(order, bounds))}
 
-    def plot_bandwidth_usage(self):
+    def _plot_bands(self, ax, name, ylabel):
         """
-        Plot bandwidth usage for each node.
+        Plot the median, p90 and maximum per role of a per-node counter over time.
+
+        Args:
+            ax (matplotlib.axes.Axes): The axes.
+            name (str): Name of the snapshot series.
+            ylabel (str): Label of the counter.
         """
-        bandwidth = self.metrics_collector.bandwidth_usage
-        nodes = list(bandwidth.keys())
-        usage = list(bandwidth.values())
+        times, values = self.series[name]
+        values = values.reshape(len(times), -1)
+        groups = self.role_groups(np.arange(values.shape[1]))
+        for color, (role, columns) in zip(_COLORS * len(groups), groups.items()):
+            median, p90, maximum = _order_statistics(np.take(values, columns, axis=1), (0.5, 0.9, 1.0))
+            ax.plot(times, median, color=color, label=f"{role} median")
+            ax.fill_between(times, median, p90, color=color, alpha=0.25, linewidth=0, label=f"{role} p50-p90")
+            ax.plot(times, maximum, color=color, linestyle="--", linewidth=1, label=f"{role} max")
+        ax.set_xlabel("Time (ms)")
+        ax.set_ylabel(ylabel)
+        ax.legend(loc="upper left", fontsize="small")
 
-        plt.figure(figsize=(10, 6))
-        plt.bar(nodes, usage, color='blue')
-        plt.xlabel('Node ID')
-        plt.ylabel('Bandwidth Usage (bytes)')
-        plt.title('Bandwidth Usage per Node')
-        plt.show()
+    def _plot_totals(self, ax, node_ids, totals, ylabel):
+        """
+        Plot the median, p90 and maximum per role of per-node totals.
 
-    def plot_message_counts(self):
+        Args:
+            ax (matplotlib.axes.Axes): The axes.
+            node_ids (numpy.ndarray): Node ids.
+            totals (numpy.ndarray): Total of every node.
+            ylabel (str): Label of the totals.
         """
-        Plot the number of messages sent by each node.
+        groups = self.role_groups(node_ids)
+        positions = np.arange(len(groups))
+        stats = np.array([[*np.quantile(totals[members], (0.5, 0.9)), totals[members].max()]
+                          if len(members) else [0.0, 0.0, 0.0] for members in groups.values()])
+        width = 0.25
+        for offset, (label, column) in enumerate((("median", 0), ("p90", 1), ("max", 2))):
+            ax.bar(positions + (offset - 1) * width, stats[:, column], width, color=_COLORS[offset], label=label)
+        ax.set_xticks(positions, [f"{role}\n({len(members):,} nodes)" for role, members in groups.items()])
+        ax.set_ylabel(ylabel)
+        ax.legend(loc="upper left", fontsize="small")
+
+    def _counter_figure(self, name, totals, ylabel, title, path):
         """
-        message_counts = self.metrics_collector.message_counts
-        nodes = list(message_counts.keys())
-        counts = list(message_counts.values())
+        Build the figure of a per-node counter, over time if it was snapshotted.
 
-        plt.figure(figsize=(10, 6))
-        plt.bar(nodes, counts, color='green')
-        plt.xlabel('Node ID')
-        plt.ylabel('Message Count')
-        plt.title('Messages Sent per Node')
-        plt.show()
+        Args:
+            name (str): Name of the snapshot series.
+            totals (tuple[numpy.ndarray, numpy.ndarray]): Node ids and totals, used without snapshots.
+            ylabel (str): Label of the counter.
+            title (str): Title of the figure.
+            path (str, optional): Image file the figure is saved to.
 
-    def plot_latency_distribution(self):
+        Returns:
+            matplotlib.figure.Figure: The figure.
         """
-        Plot the distribution of latency measurements.
+        figure = Figure(figsize=(10, 6))
+        ax = figure.add_subplot()
+        if name in self.series:
+            self._plot_bands(ax, name, ylabel)
+        else:
+            self._plot_totals(ax, *totals, ylabel)
+        ax.set_title(title)
+        if path is not None:
+            figure.savefig(path)
+        return figure
+
+    def plot_bandwidth_usage(self, path=None):
         """
-        latencies = self.metrics_collector.latency_measurements
+        Plot the bandwidth usage per role.
+
+        Args:
+            path (str, optional): Image file the figure is saved to.
 
-        plt.figure(figsize=(10, 6))
-        plt.hist(latencies, bins=20, color='orange', edgecolor='black')
-        plt.xlabel('Latency (ms)')
-        plt.ylabel('Frequency')
-        plt.title('Latency Distribution')
-        plt.show()
\ No newline at end of file
+        Returns:
+            matplotlib.figure.Figure: The figure.
+        """
+        return self._counter_figure("bandwidth_usage", self.bandwidth, "Bandwidth Usage (bytes)",
+                                    "Bandwidth Usage per Role", path)
+
+    def plot_message_counts(self, path=None):
+        """
+        Plot the number of messages sent per role.
+
+        Args:
+            path (str, optional): Image file the figure is saved to.
+
+        Returns:
+            matplotlib.figure.Figure: The figure.
+        """
+        return self._counter_figure("message_counts", self.messages, "Message Count",
+                                    "Messages Sent per Role", path)
+
+    def plot_latency_distribution(self, message_type=None, role=None, path=None):
+        """
+        Plot the distribution of latency measurements per role from their quantile sketches.
+
+        Args:
+            message_type (str, optional): Message type to plot; None plots all.
+            role (int | str, optional): Node role to plot; None plots every role.
+            path (str, optional): Image file the figure is saved to.
+
+        Returns:
+            matplotlib.figure.Figure: The figure.
+        """
+        figure = Figure(figsize=(10, 6))
+        ax = figure.add_subplot()
+        roles = sorted({key_role for _, key_role in self.latency_sketches.sketches}) if role is None else [role]
+        for color, key_role in zip(_COLORS * len(roles), roles):
+            sketch = self.latency_sketches.get(message_type, key_role)
+            if not sketch.count:
+                continue
+            edges, counts = sketch.histogram()
+            ax.stairs(counts, edges, color=color, label=role_name(key_role))
+        sketch = self.latency_sketches.get(message_type, role)
+        if sketch.count:
+            for q, style in ((0.5, "-"), (0.99, "--"), (0.999, ":")):
+                ax.axvline(sketch.quantile(q), color="black", linestyle=style, label=f"p{q * 100:g}")
+            ax.set_xscale("log")
+            ax.legend(loc="upper right", fontsize="small")
+        ax.set_xlabel("Latency (ms)")
+        ax.set_ylabel("Frequency")
+        ax.set_title("Latency Distribution")
+        if path is not None:
+            figure.savefig(path)
+        return figure
+
+    def render(self, output_dir, dpi=100):
+        """
+        Render the standard charts (bandwidth usage, message counts, latency distribution) to files.
+
+        Args:
+            output_dir (str): Directory the images are written to.
+            dpi (int): Resolution of the images.
+
+        Returns:
+            list[str]: Paths of the written images.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = [os.path.join(output_dir, name) for name in STANDARD_CHARTS]
+        for plot, path in zip((self.plot_bandwidth_usage, self.plot_message_counts,
+                               self.plot_latency_distribution), paths):
+            plot(path=None).savefig(path, dpi=dpi)
+        return paths
+
+
+def _render(visualizer, output_dir, dpi):
+    """
+    Render the standard charts of one run; runs in a worker process.
+
+    Args:
+        visualizer (MetricsVisualizer): The run's visualizer.
+        output_dir (str): Directory the images are written to.
+        dpi (int): Resolution of the images.
+
+    Returns:
+        list[str]: Paths of the written images.
+    """
+    return visualizer.render(output_dir, dpi)
+
+
+def render_runs(visualizers, output_dirs, max_workers=None, dpi=100):
+    """
+    Render the standard charts of many runs in parallel worker processes.
+
+    Args:
+        visualizers (list[MetricsVisualizer]): One visualizer per run.
+        output_dirs (list[str]): Directory of every run's images.
+        max_workers (int, optional): Worker processes. Defaults to the number of CPUs.
+        dpi (int): Resolution of the images.
+
+    Returns:
+        list[list[str]]: Paths of every run's images.
+    """
+    with ProcessPoolExecutor(max_workers) as executor:
+        return list(executor.map(_render, visualizers, output_dirs, [dpi] * len(visualizers)))
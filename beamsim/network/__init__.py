@@ -10,17 +10,23 @@ related utilities for modeling network communication in BEAM Chain simulations.
 from beamsim.network.topology import NetworkTopology
 from beamsim.network.latency import LatencyModel
 from beamsim.network.bandwidth import BandwidthTracker
+from beamsim.network.assignment import RoleAssignment
+from beamsim.network.cache import TopologyCache
 
 # Import specific topology implementations
 from beamsim.network.direct_topology import DirectTopology
 from beamsim.network.gossipsub_topology import GossipsubTopology
 from beamsim.network.grid_topology import GridTopology
+from beamsim.network.tree_topology import TreeTopology
 
 __all__ = [
     'NetworkTopology',
     'LatencyModel',
     'BandwidthTracker',
+    'RoleAssignment',
+    'TopologyCache',
     'DirectTopology',
     'GossipsubTopology',
     'GridTopology',
+    'TreeTopology',
 ]
\ No newline at end of file
@@ -0,0 +1,450 @@
+"""
+Structural topology analysis for the BEAMSim discrete-event simulation engine.
+
+This module computes structural numbers of a topology before any simulation
+time is spent on it: degree statistics, hop-count distributions, effective
+diameter, validator-to-aggregator hops and minimum edge cut estimates. All
+of them run on a symmetric CSR adjacency built from `NetworkTopology.edge_list`,
+with breadth-first searches from many sources advanced together as array
+operations. `scipy.sparse.csgraph` is used instead when it is installed.
+"""
+
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import maximum_flow, shortest_path
+except ImportError:  # SciPy is optional; the NumPy implementations below are used instead
+    csr_matrix = None
+
+
+def csr_from_edges(sources, targets, num_nodes):
+    """
+    Build a symmetric CSR adjacency without self-loops or duplicate edges.
+
+    Args:
+        sources (numpy.ndarray): Row of one end of every edge.
+        targets (numpy.ndarray): Row of the other end of every edge.
+        num_nodes (int): Number of rows.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: CSR row pointers and sorted column indices.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    distinct = sources != targets
+    sources, targets = sources[distinct], targets[distinct]
+    keys = np.unique(np.concatenate((sources * num_nodes + targets, targets * num_nodes + sources)))
+    rows, columns = np.divmod(keys, num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+    return indptr, columns.astype(np.int32)
+
+
+def adjacency(topology):
+    """
+    Get the adjacency of a connected topology.
+
+    Rows are the sorted node ids of the topology's nodes and of every node
+    appearing in one of its connections.
+
+    Args:
+        topology (NetworkTopology): The topology, after `connect_nodes`.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: Node id of every
+        row, CSR row pointers and column indices.
+    """
+    sources, targets = topology.edge_list()
+    node_ids = np.unique(np.concatenate((
+        sources, targets, np.fromiter((node.node_id for node in topology.nodes), dtype=np.int64,
+                                      count=len(topology.nodes)),
+    )))
+    indptr, indices = csr_from_edges(np.searchsorted(node_ids, sources), np.searchsorted(node_ids, targets),
+                                     len(node_ids))
+    return node_ids, indptr, indices
+
+
+def _expand(indptr, nodes):
+    """
+    Get the edges leaving a set of nodes.
+
+    Args:
+        indptr (numpy.ndarray): CSR row pointers.
+        nodes (numpy.ndarray): Rows to expand (repeats allowed).
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Index of every edge, and the
+        position in `nodes` of the node it leaves.
+    """
+    counts = indptr[nodes + 1] - indptr[nodes]
+    owners = np.repeat(np.arange(len(nodes)), counts)
+    edges = indptr[nodes][owners] + np.arange(len(owners)) - (np.cumsum(counts) - counts)[owners]
+    return edges, owners
+
+
+def bfs_hops(indptr, indices, sources, targets=None):
+    """
+    Get the hop count from every source to every node.
+
+    The searches from all sources advance together as bitsets, one bit per
+    search in 64-bit words per node: every level gathers the frontier words
+    of all edges at once and ORs them into their source rows, so a level
+    costs one pass over the edges for up to 64 searches per word. A search
+    given targets stops as soon as it has reached all of them.
+
+    Args:
+        indptr (numpy.ndarray): CSR row pointers.
+        indices (numpy.ndarray): CSR column indices.
+        sources (numpy.ndarray): Source rows.
+        targets (numpy.ndarray, optional): Rows each search needs, of shape
+            (len(sources), k); pad short rows with the source itself.
+
+    Returns:
+        numpy.ndarray: Hops of shape (len(sources), number of rows), -1 where
+        unreachable (or not reached before the search stopped).
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    num_nodes = len(indptr) - 1
+    if csr_matrix is not None:
+        graph = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(num_nodes, num_nodes))
+        distances = shortest_path(graph, unweighted=True, indices=sources)
+        return np.where(np.isfinite(distances), distances, -1).astype(np.int32)
+
+    num_searches = len(sources)
+    searches = np.arange(num_searches)
+    hops = np.full((num_searches, num_nodes), -1, dtype=np.int32)
+    hops[searches, sources] = 0
+    search_words = searches >> 6
+    search_bits = np.left_shift(np.uint64(1), (searches & 63).astype(np.uint64))
+    visited = np.zeros((num_nodes, -(-num_searches // 64)), dtype=np.uint64)
+    np.bitwise_or.at(visited, (sources, search_words), search_bits)
+    frontier = visited.copy()
+    # reduceat misreads empty rows, so only rows with edges are reduced
+    rows = np.flatnonzero(np.diff(indptr))
+    starts = indptr[rows]
+    reach = np.zeros_like(visited)
+    level = 0
+    while frontier.any():
+        level += 1
+        if len(rows):
+            reach[rows] = np.bitwise_or.reduceat(frontier[indices], starts, axis=0)
+        frontier = reach & ~visited
+        visited |= frontier
+
+        nodes, words = np.nonzero(frontier)
+        bits = np.unpackbits(frontier[nodes, words].view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+        pairs, positions = np.nonzero(bits)
+        reached = words[pairs] * 64 + positions
+        hops[reached, nodes[pairs]] = level
+
+        if targets is not None:
+            done = np.all(hops[searches[:, None], targets] >= 0, axis=1)
+            if done.any():
+                finished = np.zeros(visited.shape[1], dtype=np.uint64)
+                np.bitwise_or.at(finished, search_words[done], search_bits[done])
+                frontier &= ~finished
+    return hops
+
+
+def hop_distribution(hops):
+    """
+    Count the reachable (source, node) pairs at every hop distance, excluding the sources themselves.
+
+    Args:
+        hops (numpy.ndarray): Hop counts from `bfs_hops`.
+
+    Returns:
+        numpy.ndarray: Number of pairs at 1, 2, ... hops (index 0 is always 0).
+    """
+    reachable = hops[hops > 0]
+    counts = np.bincount(reachable) if len(reachable) else np.zeros(1, dtype=np.int64)
+    return counts
+
+
+def effective_diameter(indptr, indices, num_sources=128, quantile=0.9, batch_size=256, random_seed=42):
+    """
+    Estimate the diameter of a graph from breadth-first searches of sampled sources.
+
+    The effective diameter is the (interpolated) hop count within which
+    `quantile` of the reachable pairs lie; the largest hop count observed
+    is a lower bound on the true diameter.
+
+    Args:
+        indptr (numpy.ndarray): CSR row pointers.
+        indices (numpy.ndarray): CSR column indices.
+        num_sources (int): Number of sources sampled (all rows if there are fewer).
+        quantile (float): Fraction of pairs the effective diameter covers.
+        batch_size (int): Sources searched together, bounding memory to batch_size x rows hops.
+        random_seed (int): Seed for the source sample.
+
+    Returns:
+        dict: 'effective_diameter', 'max_hops', 'unreachable_fraction' and
+        'hop_counts' (pairs at every hop distance).
+    """
+    num_nodes = len(indptr) - 1
+    rng = np.random.default_rng(random_seed)
+    sources = rng.choice(num_nodes, min(num_sources, num_nodes), replace=False)
+    hop_counts = np.zeros(1, dtype=np.int64)
+    unreachable = 0
+    for start in range(0, len(sources), batch_size):
+        hops = bfs_hops(indptr, indices, sources[start:start + batch_size])
+        unreachable += int(np.count_nonzero(hops < 0))
+        counts = hop_distribution(hops)
+        if len(counts) > len(hop_counts):
+            counts[:len(hop_counts)] += hop_counts
+            hop_counts = counts
+        else:
+            hop_counts[:len(counts)] += counts
+
+    total = hop_counts.sum()
+    if not total:
+        return {"effective_diameter": 0.0, "max_hops": 0, "unreachable_fraction": float(unreachable > 0),
+                "hop_counts": hop_counts}
+    cumulative = np.cumsum(hop_counts) / total
+    hop = int(np.searchsorted(cumulative, quantile))
+    # Interpolate between the last hop count below the quantile and the first one at or above it
+    below = cumulative[hop - 1] if hop else 0.0
+    effective = hop - 1 + (quantile - below) / (cumulative[hop] - below)
+    pairs = len(sources) * (num_nodes - 1)
+    return {
+        "effective_diameter": float(effective),
+        "max_hops": len(hop_counts) - 1,
+        "unreachable_fraction": unreachable / pairs if pairs else 0.0,
+        "hop_counts": hop_counts,
+    }
+
+
+def validator_aggregators(topology):
+    """
+    Get the aggregators every validator's signature has to reach.
+
+    With a RoleAssignment these are the subnet aggregators of the
+    validator's subnet; in an aggregation tree, the root.
+
+    Args:
+        topology (NetworkTopology): The topology, after `connect_nodes`.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Validator ids, and the node ids of
+        their aggregators with one column per aggregator.
+    """
+    assignment = topology.assignment
+    if assignment is not None:
+        validator_ids = np.arange(assignment.num_validators, dtype=np.int64)
+        return validator_ids, assignment.subnet_aggregators[assignment.subnet_of].astype(np.int64)
+    levels = getattr(topology, "levels", None)
+    if levels:
+        validator_ids = topology.validator_ids
+        return validator_ids, np.full((len(validator_ids), 1), levels[-1][0].node_id, dtype=np.int64)
+    raise ValueError("The topology has neither a role assignment nor aggregation levels")
+
+
+def aggregator_hops(topology, graph=None, batch_size=256):
+    """
+    Get the hop count from every validator to each of its aggregators.
+
+    Searches start from the aggregators, which are far fewer than the validators.
+
+    Args:
+        topology (NetworkTopology): The topology, after `connect_nodes`.
+        graph (tuple, optional): The topology's `adjacency`, if already computed.
+        batch_size (int): Aggregators searched together.
+
+    Returns:
+        numpy.ndarray: Hops of shape (validators, aggregators per validator), -1 where unreachable.
+    """
+    node_ids, indptr, indices = graph if graph is not None else adjacency(topology)
+    validator_ids, aggregator_ids = validator_aggregators(topology)
+    validator_rows = np.searchsorted(node_ids, validator_ids)
+    aggregator_rows = np.searchsorted(node_ids, aggregator_ids)
+    aggregators, slots = np.unique(aggregator_rows, return_inverse=True)
+    slots = slots.reshape(aggregator_rows.shape)
+    # The validators of every aggregator, padded with the aggregator itself, end its search early
+    pair_slots = slots.ravel()
+    pair_validators = np.repeat(validator_rows, slots.shape[1])
+    order = np.argsort(pair_slots, kind="stable")
+    counts = np.bincount(pair_slots, minlength=len(aggregators))
+    ranks = np.arange(len(order)) - np.repeat(np.cumsum(counts) - counts, counts)
+    needed = np.repeat(aggregators[:, None], counts.max() if len(counts) else 0, axis=1)
+    needed[pair_slots[order], ranks] = pair_validators[order]
+
+    hops = np.empty(aggregator_rows.shape, dtype=np.int32)
+    for start in range(0, len(aggregators), batch_size):
+        batch = slice(start, start + batch_size)
+        batch_hops = bfs_hops(indptr, indices, aggregators[batch], needed[batch])
+        in_batch = (slots >= start) & (slots < start + batch_size)
+        pairs = np.nonzero(in_batch)
+        hops[pairs] = batch_hops[slots[pairs] - start, validator_rows[pairs[0]]]
+    return hops
+
+
+def degree_histogram(indptr):
+    """
+    Count the nodes of every degree.
+
+    Args:
+        indptr (numpy.ndarray): CSR row pointers.
+
+    Returns:
+        numpy.ndarray: Number of nodes with degree 0, 1, 2, ...
+    """
+    return np.bincount(np.diff(indptr))
+
+
+def degree_stats(indptr):
+    """
+    Summarize the degree distribution.
+
+    Args:
+        indptr (numpy.ndarray): CSR row pointers.
+
+    Returns:
+        dict: 'min', 'mean', 'median' and 'max' degree.
+    """
+    degrees = np.diff(indptr)
+    if not len(degrees):
+        return {"min": 0, "mean": 0.0, "median": 0.0, "max": 0}
+    return {"min": int(degrees.min()), "mean": float(degrees.mean()),
+            "median": float(np.median(degrees)), "max": int(degrees.max())}
+
+
+def reverse_edges(indptr, indices):
+    """
+    Get the index of the reverse of every edge of a symmetric CSR adjacency.
+
+    Args:
+        indptr (numpy.ndarray): CSR row pointers (columns sorted within rows).
+        indices (numpy.ndarray): CSR column indices.
+
+    Returns:
+        numpy.ndarray: Edge index of (v, u) for every edge (u, v).
+    """
+    num_nodes = len(indptr) - 1
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(indptr))
+    keys = sources * num_nodes + indices
+    return np.searchsorted(keys, indices.astype(np.int64) * num_nodes + sources)
+
+
+def min_cut(indptr, indices, source, sink, reverse=None):
+    """
+    Get the minimum number of edges separating two nodes (their edge connectivity).
+
+    Unit-capacity max-flow with shortest augmenting paths; each path is
+    found by a level-synchronous search over the residual edges.
+
+    Args:
+        indptr (numpy.ndarray): CSR row pointers.
+        indices (numpy.ndarray): CSR column indices.
+        source (int): Row of one node.
+        sink (int): Row of the other node.
+        reverse (numpy.ndarray, optional): `reverse_edges` of the adjacency, if already computed.
+
+    Returns:
+        int: The size of a minimum edge cut between the two nodes.
+    """
+    num_nodes = len(indptr) - 1
+    if csr_matrix is not None:
+        graph = csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr), shape=(num_nodes, num_nodes))
+        return int(maximum_flow(graph, int(source), int(sink)).flow_value)
+
+    if reverse is None:
+        reverse = reverse_edges(indptr, indices)
+    edge_sources = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(indptr))
+    flow = np.zeros(len(indices), dtype=np.int8)  # Antisymmetric: flow[reverse[e]] == -flow[e]
+    limit = min(indptr[source + 1] - indptr[source], indptr[sink + 1] - indptr[sink])
+    cut = 0
+    while cut < limit:
+        parent_edge = np.full(num_nodes, -1, dtype=np.int64)
+        visited = np.zeros(num_nodes, dtype=bool)
+        visited[source] = True
+        frontier = np.array([source], dtype=np.int64)
+        while len(frontier) and not visited[sink]:
+            edges, _ = _expand(indptr, frontier)
+            edges = edges[flow[edges] < 1]
+            targets = indices[edges]
+            unvisited = ~visited[targets]
+            targets, first = np.unique(targets[unvisited], return_index=True)
+            parent_edge[targets] = edges[unvisited][first]
+            visited[targets] = True
+            frontier = targets.astype(np.int64)
+        if not visited[sink]:
+            break
+        node = sink
+        while node != source:
+            edge = parent_edge[node]
+            flow[edge] += 1
+            flow[reverse[edge]] -= 1
+            node = edge_sources[edge]
+        cut += 1
+    return cut
+
+
+def min_cut_estimate(indptr, indices, num_pairs=8, random_seed=42):
+    """
+    Estimate the global minimum edge cut from sampled node pairs.
+
+    The true minimum cut is at most the smallest sampled pair cut and at
+    most the minimum degree; pairs are drawn uniformly, so cuts isolating
+    a large group (e.g. a subnet) are found with high probability.
+
+    Args:
+        indptr (numpy.ndarray): CSR row pointers.
+        indices (numpy.ndarray): CSR column indices.
+        num_pairs (int): Number of node pairs sampled.
+        random_seed (int): Seed for the pair sample.
+
+    Returns:
+        dict: 'min_degree', 'sampled_min_cut' (the estimate), 'pair_cuts'
+        (the cut of every pair) and 'pairs' (the sampled rows).
+    """
+    num_nodes = len(indptr) - 1
+    rng = np.random.default_rng(random_seed)
+    degrees = np.diff(indptr)
+    if num_nodes < 2:
+        return {"min_degree": int(degrees.min()) if num_nodes else 0, "sampled_min_cut": 0,
+                "pair_cuts": [], "pairs": np.zeros((0, 2), dtype=np.int64)}
+    pairs = np.array([rng.choice(num_nodes, 2, replace=False) for _ in range(num_pairs)], dtype=np.int64)
+    reverse = reverse_edges(indptr, indices) if csr_matrix is None else None
+    pair_cuts = [min_cut(indptr, indices, source, sink, reverse) for source, sink in pairs.tolist()]
+    min_degree = int(degrees.min())
+    return {
+        "min_degree": min_degree,
+        "sampled_min_cut": min([min_degree] + pair_cuts),
+        "pair_cuts": pair_cuts,
+        "pairs": pairs,
+    }
+
+
+def analyze(topology, num_sources=128, num_cut_pairs=8, random_seed=42):
+    """
+    Compute every structural number of a topology.
+
+    Args:
+        topology (NetworkTopology): The topology, after `connect_nodes`.
+        num_sources (int): Sources sampled for the effective diameter.
+        num_cut_pairs (int): Node pairs sampled for the minimum cut estimate.
+        random_seed (int): Seed for the samples.
+
+    Returns:
+        dict: 'num_nodes', 'num_edges', 'degree' (stats), 'degree_histogram',
+        'diameter' (see `effective_diameter`), 'aggregator_hops' (pairs at
+        every hop distance, or None without validator -> aggregator roles)
+        and 'min_cut' (see `min_cut_estimate`).
+    """
+    graph = adjacency(topology)
+    node_ids, indptr, indices = graph
+    try:
+        hops = aggregator_hops(topology, graph)
+        hop_counts = np.bincount(hops[hops >= 0]) if np.any(hops >= 0) else np.zeros(1, dtype=np.int64)
+    except ValueError:
+        hop_counts = None
+    return {
+        "num_nodes": len(node_ids),
+        "num_edges": len(indices) // 2,
+        "degree": degree_stats(indptr),
+        "degree_histogram": degree_histogram(indptr),
+        "diameter": effective_diameter(indptr, indices, num_sources, random_seed=random_seed),
+        "aggregator_hops": hop_counts,
+        "min_cut": min_cut_estimate(indptr, indices, num_cut_pairs, random_seed),
+    }
@@ -0,0 +1,299 @@
+"""
+Subnet and aggregator assignment for the BEAMSim discrete-event simulation engine.
+
+This module provides the RoleAssignment class, which partitions validators
+into subnets and selects the subnet aggregators and global aggregators of
+every round from the random seed combined with the round number. All
+results are NumPy arrays indexed by validator, so every topology can share
+one assignment and answer "my subnet", "my aggregators" and "is global
+aggregator" in O(1).
+"""
+
+import numpy as np
+
+from beamsim.network.cache import TopologyCache, cache_key
+
+
+# Role bit flags stored in RoleAssignment.roles
+ROLE_VALIDATOR = 1
+ROLE_SUBNET_AGGREGATOR = 2
+ROLE_GLOBAL_AGGREGATOR = 4
+
+# Selection priorities within a subnet: all-role peers first, then eligible
+# validators; global aggregators without all roles are never subnet aggregators
+_PRIORITY_ALL_ROLES = 0
+_PRIORITY_ELIGIBLE = 1
+_PRIORITY_EXCLUDED = 2
+
+
+class RoleAssignment:
+    """
+    A class computing subnet membership and per-round aggregator roles.
+
+    Subnet membership depends on the seed only. Aggregator roles are
+    recomputed by `assign(round_number)` in O(N): one random permutation,
+    one radix (stable, small-integer) sort by subnet and one gather.
+    With a TopologyCache, the membership arrays are memory-mapped from the
+    cache (read-only); the roles of every round are only stored in and
+    copied from it with `cache_roles`, as drawing them costs about as much as
+    loading them and one entry per round would flood the cache.
+    """
+
+    def __init__(self, num_validators, num_subnets, num_subnet_aggregators,
+                 num_global_aggregators, num_peers_with_all_roles=0, random_seed=42, cache=None,
+                 cache_roles=False):
+        """
+        Initialize the assignment and compute the roles of round 0.
+
+        Args:
+            num_validators (int): Total number of validators.
+            num_subnets (int): Number of subnets to divide the validators into.
+            num_subnet_aggregators (int): Number of aggregators per subnet.
+            num_global_aggregators (int): Number of global aggregators.
+            num_peers_with_all_roles (int): Number of global aggregators that are
+                also subnet aggregators of their own subnet.
+            random_seed (int): Seed combined with the round number for selection.
+            cache (TopologyCache, optional): Cache of membership and role arrays.
+            cache_roles (bool): Also cache the role arrays of every round.
+        """
+        if num_global_aggregators > num_validators:
+            raise ValueError("num_global_aggregators cannot exceed num_validators")
+        if num_peers_with_all_roles > min(num_global_aggregators, num_subnets * num_subnet_aggregators):
+            raise ValueError("num_peers_with_all_roles must be a subset of both aggregator sets")
+        self.num_validators = num_validators
+        self.num_subnets = num_subnets
+        self.num_subnet_aggregators = num_subnet_aggregators
+        self.num_global_aggregators = num_global_aggregators
+        self.num_peers_with_all_roles = num_peers_with_all_roles
+        self.random_seed = random_seed
+        self.round_number = None
+        self.cache = cache
+        self.cache_roles = cache_roles
+
+        if cache is None:
+            membership = self._build_membership()
+        else:
+            membership = cache.fetch(cache_key("subnet_membership", self._membership_params(), random_seed),
+                                     self._build_membership)
+        self.subnet_of = membership["subnet_of"]
+        self.subnet_sizes = membership["subnet_sizes"]
+        self.subnet_offsets = membership["subnet_offsets"]
+        self.subnet_members = membership["subnet_members"]
+        self.subnet_rank = membership["subnet_rank"]
+        if np.any(self.subnet_sizes < num_subnet_aggregators):
+            raise ValueError("Every subnet needs at least num_subnet_aggregators validators")
+
+        self._key_dtype = np.uint16 if num_subnets * 3 <= np.iinfo(np.uint16).max else np.int64
+        self.roles = np.empty(num_validators, dtype=np.uint8)
+        self.global_aggregators = np.empty(num_global_aggregators, dtype=np.int32)
+        self.subnet_aggregators = np.empty((num_subnets, num_subnet_aggregators), dtype=np.int32)
+        self.assign(0)
+
+    @classmethod
+    def from_config(cls, config, topology, round_number=0):
+        """
+        Build an assignment from a loaded configuration.
+
+        Args:
+            config (ConfigManager): The simulation configuration.
+            topology (int): Topology number whose parameters to use (0, 1 or 2).
+            round_number (int): Round whose roles to compute.
+
+        Returns:
+            RoleAssignment: The assignment.
+        """
+        section = f"topology{topology}"
+        assignment = cls(
+            num_validators=config.get("network.num_validators"),
+            num_subnets=config.get(f"{section}.num_subnets"),
+            num_subnet_aggregators=config.get(f"{section}.num_subnet_aggregators"),
+            num_global_aggregators=config.get(f"{section}.num_global_aggregators"),
+            num_peers_with_all_roles=config.get(f"{section}.num_peers_with_all_roles", 0),
+            random_seed=config.get("simulation.random_seed", 42),
+            cache=TopologyCache.from_config(config),
+            cache_roles=config.get("simulation.topology_cache_roles", False),
+        )
+        if round_number:
+            assignment.assign(round_number)
+        return assignment
+
+    def _membership_params(self):
+        """
+        Get the parameters subnet membership depends on, besides the seed.
+
+        Returns:
+            dict: The parameters, as hashed into cache keys.
+        """
+        return {"num_validators": self.num_validators, "num_subnets": self.num_subnets}
+
+    def _build_membership(self):
+        """
+        Compute the static subnet membership: a seeded permutation split into equal blocks.
+
+        Returns:
+            dict[str, numpy.ndarray]: The subnet of every validator, the subnet
+            sizes and offsets, the validators grouped by subnet and each
+            validator's position inside its subnet.
+        """
+        num_validators, num_subnets = self.num_validators, self.num_subnets
+        rng = np.random.default_rng(self.random_seed)
+        block = np.arange(num_validators, dtype=np.int64) * num_subnets // num_validators
+        subnet_of = np.empty(num_validators, dtype=np.int32)
+        subnet_of[rng.permutation(num_validators)] = block
+        subnet_sizes = np.bincount(subnet_of, minlength=num_subnets)
+        subnet_offsets = np.zeros(num_subnets + 1, dtype=np.int64)
+        np.cumsum(subnet_sizes, out=subnet_offsets[1:])
+        subnet_members = np.argsort(subnet_of, kind="stable").astype(np.int32)
+        subnet_rank = np.empty(num_validators, dtype=np.int32)
+        subnet_rank[subnet_members] = np.arange(num_validators) - np.repeat(subnet_offsets[:-1], subnet_sizes)
+        return {
+            "subnet_of": subnet_of,
+            "subnet_sizes": subnet_sizes,
+            "subnet_offsets": subnet_offsets,
+            "subnet_members": subnet_members,
+            "subnet_rank": subnet_rank,
+        }
+
+    def assign(self, round_number):
+        """
+        Select the aggregators of a round, overwriting the role arrays in place.
+
+        Args:
+            round_number (int): The round (slot) number combined with the seed.
+        """
+        if round_number == self.round_number:
+            return
+        if self.cache is not None and self.cache_roles:
+            params = dict(self._membership_params(), num_subnet_aggregators=self.num_subnet_aggregators,
+                          num_global_aggregators=self.num_global_aggregators,
+                          num_peers_with_all_roles=self.num_peers_with_all_roles, round_number=round_number)
+            roles = self.cache.fetch(cache_key("aggregator_roles", params, self.random_seed),
+                                     lambda: self._select_roles(round_number))
+            self.global_aggregators[:] = roles["global_aggregators"]
+            self.subnet_aggregators[:] = roles["subnet_aggregators"]
+            self.roles[:] = roles["roles"]
+        else:
+            self._select_roles(round_number)
+        self.round_number = round_number
+
+    def _select_roles(self, round_number):
+        """
+        Draw the aggregators of a round into the role arrays.
+
+        Args:
+            round_number (int): The round (slot) number combined with the seed.
+
+        Returns:
+            dict[str, numpy.ndarray]: The role arrays, by attribute name.
+        """
+        rng = np.random.default_rng([self.random_seed, round_number])
+        num_validators = self.num_validators
+
+        # The all-role peers are drawn first, at most num_subnet_aggregators
+        # per subnet so that every one of them gets a subnet seat: a random
+        # order is regrouped by subnet, and a validator is a candidate if it
+        # is among the first num_subnet_aggregators of its subnet's block.
+        num_all_roles = self.num_peers_with_all_roles
+        order = rng.permutation(num_validators)
+        grouped = order[np.argsort(self.subnet_of[order], kind="stable")]
+        rank = np.empty(num_validators, dtype=np.int64)
+        rank[grouped] = np.arange(num_validators) - np.repeat(self.subnet_offsets[:-1], self.subnet_sizes)
+        all_roles = order[rank[order] < self.num_subnet_aggregators][:num_all_roles]
+        others = np.ones(num_validators, dtype=bool)
+        others[all_roles] = False
+        self.global_aggregators[:num_all_roles] = all_roles
+        self.global_aggregators[num_all_roles:] = rng.choice(
+            np.flatnonzero(others), self.num_global_aggregators - num_all_roles, replace=False)
+        priority = np.full(num_validators, _PRIORITY_ELIGIBLE, dtype=self._key_dtype)
+        priority[self.global_aggregators] = _PRIORITY_EXCLUDED
+        priority[self.global_aggregators[:self.num_peers_with_all_roles]] = _PRIORITY_ALL_ROLES
+
+        # A random order, regrouped by subnet with a stable sort on a small
+        # integer key, leaves every subnet's validators shuffled and ordered by
+        # priority; the first num_subnet_aggregators of each block are selected.
+        order = rng.permutation(num_validators)
+        key = self.subnet_of[order].astype(self._key_dtype) * 3 + priority[order]
+        grouped = order[np.argsort(key, kind="stable")]
+        positions = self.subnet_offsets[:-1, None] + np.arange(self.num_subnet_aggregators)
+        self.subnet_aggregators[:] = grouped[positions]
+        if np.any(priority[self.subnet_aggregators] == _PRIORITY_EXCLUDED):
+            raise ValueError("Not enough validators outside the global aggregators to fill every subnet")
+
+        self.roles.fill(ROLE_VALIDATOR)
+        self.roles[self.subnet_aggregators.ravel()] |= ROLE_SUBNET_AGGREGATOR
+        self.roles[self.global_aggregators] |= ROLE_GLOBAL_AGGREGATOR
+        return {
+            "global_aggregators": self.global_aggregators,
+            "subnet_aggregators": self.subnet_aggregators,
+            "roles": self.roles,
+        }
+
+    def subnet(self, validator):
+        """
+        Get the subnet of a validator.
+
+        Args:
+            validator (int): Validator index.
+
+        Returns:
+            int: The validator's subnet id.
+        """
+        return int(self.subnet_of[validator])
+
+    def members(self, subnet_id):
+        """
+        Get the validators of a subnet.
+
+        Args:
+            subnet_id (int): The subnet to look up.
+
+        Returns:
+            numpy.ndarray: Validator indices of the subnet (a view, do not modify).
+        """
+        return self.subnet_members[self.subnet_offsets[subnet_id]:self.subnet_offsets[subnet_id + 1]]
+
+    def aggregators(self, validator):
+        """
+        Get the subnet aggregators of a validator's subnet.
+
+        Args:
+            validator (int): Validator index.
+
+        Returns:
+            numpy.ndarray: Validator indices of the aggregators (a view, do not modify).
+        """
+        return self.subnet_aggregators[self.subnet_of[validator]]
+
+    def is_subnet_aggregator(self, validator):
+        """
+        Check whether a validator is a subnet aggregator in the current round.
+
+        Args:
+            validator (int): Validator index.
+
+        Returns:
+            bool: True if the validator aggregates its subnet's signatures.
+        """
+        return bool(self.roles[validator] & ROLE_SUBNET_AGGREGATOR)
+
+    def is_global_aggregator(self, validator):
+        """
+        Check whether a validator is a global aggregator in the current round.
+
+        Args:
+            validator (int): Validator index.
+
+        Returns:
+            bool: True if the validator is a global aggregator.
+        """
+        return bool(self.roles[validator] & ROLE_GLOBAL_AGGREGATOR)
+
+    def peers_with_all_roles(self):
+        """
+        Get the validators holding every role in the current round.
+
+        Returns:
+            numpy.ndarray: Validator indices of the all-role peers.
+        """
+        all_roles = ROLE_VALIDATOR | ROLE_SUBNET_AGGREGATOR | ROLE_GLOBAL_AGGREGATOR
+        return np.flatnonzero(self.roles == all_roles)
@@ -0,0 +1,201 @@
+"""
+Topology build cache for the BEAMSim discrete-event simulation engine.
+
+This module provides the TopologyCache class, which stores the NumPy arrays
+of built topologies (role assignments, gossipsub candidate graphs) in a
+local directory so that sweeps rerunning the same configuration and seed
+load them instead of rebuilding them. Every entry is a directory of `.npy`
+files opened with `np.load(mmap_mode='r')`, so a hit maps the arrays
+read-only without copying them; entries are evicted least recently used
+first once the directory grows past its size bound.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Bumped whenever the layout or the meaning of cached arrays changes
+CACHE_VERSION = 2
+# Eviction frees space down to this share of the bound, so a full cache is not rescanned on every store
+_EVICT_TO = 0.9
+
+
+def cache_key(kind, params, seed):
+    """
+    Get the cache key of a build from the parameters it depends on.
+
+    Parameters are hashed in canonical form (sorted keys, no whitespace), so
+    the key only changes when a value the build depends on changes.
+
+    Args:
+        kind (str): What is built, e.g. "role_assignment".
+        params (dict): The build parameters (the relevant config subtree).
+        seed (int | tuple): The random seed of the build.
+
+    Returns:
+        str: The key, a file-system safe name.
+    """
+    canonical = json.dumps({"version": CACHE_VERSION, "params": params, "seed": seed},
+                           sort_keys=True, separators=(",", ":"), default=str)
+    return f"{kind}-{hashlib.sha256(canonical.encode()).hexdigest()[:32]}"
+
+
+class TopologyCache:
+    """
+    A size-bounded, least recently used cache of built topology arrays.
+
+    Recency is the modification time of an entry's directory, refreshed on
+    every hit, so several processes of a sweep can share one cache. The
+    directory is only scanned for eviction once the running total of the
+    entries this process has seen and stored exceeds the bound.
+    """
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        """
+        Initialize the cache, creating its directory if needed.
+
+        Args:
+            directory (str): Directory holding the cache entries.
+            max_bytes (int): Total size of the entries above which the oldest are evicted.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = None  # Size of the entries as of the last scan plus the entries stored since
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build the cache from the `simulation` section of a loaded configuration.
+
+        Args:
+            config (ConfigManager): The simulation configuration.
+
+        Returns:
+            TopologyCache | None: The cache, or None if `simulation.topology_cache_dir` is not set.
+        """
+        directory = config.get("simulation.topology_cache_dir")
+        if not directory:
+            return None
+        return cls(directory, int(config.get("simulation.topology_cache_max_mb", 1024) * 1024 ** 2))
+
+    def load(self, key):
+        """
+        Map the arrays of a cache entry.
+
+        Args:
+            key (str): The entry's key from `cache_key`.
+
+        Returns:
+            dict[str, numpy.ndarray] | None: Read-only memory-mapped arrays by name, or None on a miss.
+        """
+        path = os.path.join(self.directory, key)
+        try:
+            names = [name for name in os.listdir(path) if name.endswith(".npy")]
+            arrays = {name[:-4]: np.load(os.path.join(path, name), mmap_mode="r") for name in names}
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Missing, or evicted by another process while it was being read
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays
+
+    def store(self, key, arrays):
+        """
+        Save the arrays of a build as a cache entry, then evict old entries if needed.
+
+        The entry is written to a temporary directory and renamed into place,
+        so readers never see a partial entry. Its size is added to the
+        running total, and the directory is only scanned when the total
+        exceeds `max_bytes` (or on the first store).
+
+        Args:
+            key (str): The entry's key from `cache_key`.
+            arrays (dict[str, numpy.ndarray]): The arrays to save, by name.
+        """
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.directory)
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        size = sum(file.stat().st_size for file in os.scandir(staging))
+        try:
+            os.rename(staging, os.path.join(self.directory, key))
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)  # Another process stored the entry first
+            size = 0
+        if self.total_bytes is None:
+            self.evict()
+            return
+        self.total_bytes += size
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def fetch(self, key, build):
+        """
+        Load an entry, building and storing it on a miss.
+
+        Args:
+            key (str): The entry's key from `cache_key`.
+            build (callable): Called without arguments on a miss; returns the arrays by name.
+
+        Returns:
+            dict[str, numpy.ndarray]: The arrays by name, memory-mapped on a hit.
+        """
+        arrays = self.load(key)
+        if arrays is None:
+            arrays = build()
+            self.store(key, arrays)
+        return arrays
+
+    def entries(self):
+        """
+        List the cache entries, least recently used first.
+
+        Returns:
+            list[tuple[float, int, str]]: Last use time, size in bytes and path of every entry.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir() or entry.name.startswith(".staging-"):
+                continue
+            try:
+                size = sum(file.stat().st_size for file in os.scandir(entry.path))
+                entries.append((entry.stat().st_mtime, size, entry.path))
+            except FileNotFoundError:
+                continue  # Evicted concurrently
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in 90% of `max_bytes`.
+
+        The scan also resets the running total, picking up entries stored by
+        other processes. Arrays already mapped from an evicted entry stay
+        valid until they are released.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            self.total_bytes = total
+            return
+        for _, size, path in entries:
+            if total <= self.max_bytes * _EVICT_TO:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        self.total_bytes = total
+
+    def clear(self):
+        """
+        Remove every cache entry.
+        """
+        for _, _, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
+        self.total_bytes = 0
@@ -5,6 +5,8 @@ This module implements a direct communication model where nodes are connected
 point-to-point, eliminating gossip protocols for message dissemination.
 """
 
+import numpy as np
+
 from beamsim.network.topology import NetworkTopology
 
 
@@ -23,14 +25,25 @@ class DirectTopology(NetworkTopology):
         """
         super().__init__(simulator)
         self.redundancy_factor = redundancy_factor
+        self._validators = []
 
     def connect_nodes(self, params):
         """
         Establish direct connections between nodes.
 
+        When a RoleAssignment is set, validators connect to `redundancy_factor`
+        aggregators of their own subnet (spread by their position in the
+        subnet) and the aggregators of each subnet connect to each other;
+        node ids are the validator indices of the assignment.
+
         Args:
             params (dict): Parameters including 'subnet_aggregators' and 'validators'.
         """
+        if self.assignment is not None:
+            self._validators = params.get('validators', [])
+            self._connect_subnets(self._validators)
+            return
+
         validators = params.get('validators', [])
         subnet_aggregators = params.get('subnet_aggregators', [])
 
@@ -40,6 +53,42 @@ class DirectTopology(NetworkTopology):
                 self.node_connections[validator.node_id].add(aggregator.node_id)
                 self.node_connections[aggregator.node_id].add(validator.node_id)
 
+    def reassign(self):
+        """
+        Reconnect validators to the subnet aggregators of the assignment's current round.
+        """
+        if self.assignment is not None:
+            self._connect_subnets(self._validators)
+
+    def _connect_subnets(self, validators):
+        """
+        Connect validators to their subnet's aggregators for the assignment's current round.
+
+        Args:
+            validators (list): Validator nodes whose node ids index the assignment.
+        """
+        assignment = self.assignment
+        for connections in self.node_connections.values():
+            connections.clear()
+
+        validator_ids = np.fromiter((validator.node_id for validator in validators), dtype=np.int64,
+                                    count=len(validators))
+        columns = (assignment.subnet_rank[validator_ids][:, None] + np.arange(self.redundancy_factor)) \
+            % assignment.num_subnet_aggregators
+        targets = assignment.subnet_aggregators[assignment.subnet_of[validator_ids][:, None], columns]
+        for validator_id, aggregator_ids in zip(validator_ids.tolist(), targets.tolist()):
+            for aggregator_id in aggregator_ids:
+                if aggregator_id == validator_id:
+                    continue
+                self.node_connections.setdefault(validator_id, set()).add(aggregator_id)
+                self.node_connections.setdefault(aggregator_id, set()).add(validator_id)
+
+        # Aggregators of the same subnet share signatures and proofs directly
+        for aggregator_ids in assignment.subnet_aggregators.tolist():
+            for aggregator_id in aggregator_ids:
+                self.node_connections.setdefault(aggregator_id, set()).update(aggregator_ids)
+                self.node_connections[aggregator_id].discard(aggregator_id)
+
     def route_message(self, sender, recipient, message, **kwargs):
         """
         Route a message directly from sender to recipient(s).
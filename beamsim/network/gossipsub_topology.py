@@ -2,19 +2,102 @@
 Gossipsub communication topology for the BEAMSim discrete-event simulation engine.
 
 This module implements a gossip-based communication model using the Gossipsub
-protocol for message dissemination.
+protocol for message dissemination. Every topic (one `beacon_attestation_{subnet_id}`
+topic per subnet and the global aggregation channel) has its own meshes,
+stored as one CSR block over the topic's members.
 """
 
+import numpy as np
+
+from beamsim.aggregation.snark import SNARKProof
+from beamsim.network.cache import TopologyCache, cache_key
 from beamsim.network.topology import NetworkTopology
-import random
+from beamsim.protocols.flood import TickFlood
+from beamsim.protocols.gossipsub import (
+    BatchedGossipSub,
+    MESSAGE_KIND_SIGNATURE,
+    MESSAGE_KIND_SUBNET_PROOF,
+    MESSAGE_KIND_GLOBAL_PROOF,
+    message_id,
+)
+
+GLOBAL_TOPIC = "global_aggregation"
+# Per-node counters of the meshes that are kept when a topic is rebuilt
+TRAFFIC_COUNTERS = ("bytes_sent", "bytes_received", "messages_received", "duplicates_received")
+
+
+def subnet_topic(subnet_id):
+    """
+    Get the name of a subnet's attestation topic.
+
+    Args:
+        subnet_id (int): The subnet.
+
+    Returns:
+        str: The topic name.
+    """
+    return f"beacon_attestation_{subnet_id}"
+
+
+def candidate_graph(num_members, subscribed, degree_low, degree_high, rng):
+    """
+    Draw the candidate peers of a topic as a symmetric CSR adjacency over its members.
+
+    Every subscriber connects to between `degree_low` and `degree_high` random
+    other subscribers, and every non-subscribed member (a publisher using
+    fanout) to `degree_high` random subscribers.
+
+    Args:
+        num_members (int): Number of topic members (CSR rows).
+        subscribed (numpy.ndarray): Boolean mask of the subscribed members.
+        degree_low (int): Minimum number of peers a subscriber picks.
+        degree_high (int): Maximum number of peers a member picks.
+        rng (numpy.random.Generator): Random source.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: CSR row pointers and sorted column indices.
+    """
+    subscribers = np.flatnonzero(subscribed)
+    publishers = np.flatnonzero(~subscribed)
+    num_subscribers = len(subscribers)
+    sources, targets = [], []
+    if num_subscribers > 1:
+        degrees = np.minimum(rng.integers(degree_low, degree_high + 1, num_subscribers), num_subscribers - 1)
+        offsets = rng.integers(1, num_subscribers, (num_subscribers, degree_high))
+        picked = np.arange(degree_high)[None, :] < degrees[:, None]
+        peers = (np.arange(num_subscribers)[:, None] + offsets) % num_subscribers
+        sources.append(np.broadcast_to(subscribers[:, None], picked.shape)[picked])
+        targets.append(subscribers[peers[picked]])
+    if num_subscribers and len(publishers):
+        peers = rng.integers(0, num_subscribers, (len(publishers), min(degree_high, num_subscribers)))
+        sources.append(np.repeat(publishers, peers.shape[1]))
+        targets.append(subscribers[peers.ravel()])
+
+    sources = np.concatenate(sources) if sources else np.zeros(0, dtype=np.int64)
+    targets = np.concatenate(targets) if targets else np.zeros(0, dtype=np.int64)
+    distinct = sources != targets
+    sources, targets = sources[distinct], targets[distinct]
+    keys = np.unique(np.concatenate((sources * num_members + targets, targets * num_members + sources)))
+    rows, columns = np.divmod(keys, num_members)
+    indptr = np.zeros(num_members + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_members), out=indptr[1:])
+    return indptr, columns.astype(np.int32)
 
 
 class GossipsubTopology(NetworkTopology):
     """
     Gossipsub communication topology implementation.
+
+    Nodes share one position index (their place in `self.nodes`). Each
+    topic is a BatchedGossipSub whose rows are the topic's members, sorted
+    by position, so a node in several topics (aggregators, peers with all
+    roles) has one row per topic instead of duplicated adjacency sets.
     """
 
-    def __init__(self, simulator, gossipsub_D=8, gossipsub_D_low=6, gossipsub_D_high=12, random_seed=42):
+    def __init__(self, simulator, gossipsub_D=8, gossipsub_D_low=6, gossipsub_D_high=12, random_seed=42,
+                 gossipsub_heartbeat_interval_ms=700, gossipsub_fanout_ttl_seconds=60,
+                 gossipsub_lazy_gossip=True, gossipsub_D_lazy=6, gossipsub_history_length=5,
+                 gossipsub_history_gossip=3, gossipsub_seen_ttl_seconds=120, cache=None):
         """
         Initialize the Gossipsub topology.
 
@@ -24,66 +107,429 @@ class GossipsubTopology(NetworkTopology):
             gossipsub_D_low (int): Minimum number of peers in the mesh.
             gossipsub_D_high (int): Maximum number of peers in the mesh.
             random_seed (int): Seed for random number generation.
+            gossipsub_heartbeat_interval_ms (int): Interval between heartbeat events (ms).
+            gossipsub_fanout_ttl_seconds (float): Time-to-live for peers in fanout maps.
+            gossipsub_lazy_gossip (bool): Whether heartbeats send IHAVE/IWANT gossip.
+            gossipsub_D_lazy (int): Number of non-mesh peers receiving IHAVE per heartbeat.
+            gossipsub_history_length (int): Number of heartbeat windows kept in the mcache.
+            gossipsub_history_gossip (int): Number of recent windows advertised in IHAVE.
+            gossipsub_seen_ttl_seconds (float): Time message ids are remembered for duplicate detection.
+            cache (TopologyCache, optional): Cache of the topics' candidate graphs.
         """
         super().__init__(simulator)
         self.gossipsub_D = gossipsub_D
         self.gossipsub_D_low = gossipsub_D_low
         self.gossipsub_D_high = gossipsub_D_high
-        random.seed(random_seed)
+        self.random_seed = random_seed
+        self.gossipsub_heartbeat_interval_ms = gossipsub_heartbeat_interval_ms
+        self.gossipsub_fanout_ttl_seconds = gossipsub_fanout_ttl_seconds
+        self.gossipsub_lazy_gossip = gossipsub_lazy_gossip
+        self.gossipsub_D_lazy = gossipsub_D_lazy
+        self.gossipsub_history_length = gossipsub_history_length
+        self.gossipsub_history_gossip = gossipsub_history_gossip
+        self.gossipsub_seen_ttl_seconds = gossipsub_seen_ttl_seconds
+        self.cache = cache
+        self.topics = {}
+        self.retired_counters = {}  # TRAFFIC_COUNTERS of replaced topic meshes, by node position
+        self._positions = {}
+
+    @classmethod
+    def from_config(cls, simulator, config):
+        """
+        Build the topology from the `topology1` section of a loaded configuration.
+
+        Args:
+            simulator: The simulator instance managing the simulation.
+            config (ConfigManager): The simulation configuration.
+
+        Returns:
+            GossipsubTopology: The topology.
+        """
+        keys = ("gossipsub_D", "gossipsub_D_low", "gossipsub_D_high", "gossipsub_heartbeat_interval_ms",
+                "gossipsub_fanout_ttl_seconds", "gossipsub_lazy_gossip", "gossipsub_D_lazy",
+                "gossipsub_history_length", "gossipsub_history_gossip", "gossipsub_seen_ttl_seconds")
+        params = {key: config.get(f"topology1.{key}") for key in keys}
+        return cls(
+            simulator,
+            random_seed=config.get("simulation.random_seed", 42),
+            cache=TopologyCache.from_config(config),
+            **{key: value for key, value in params.items() if value is not None},
+        )
 
     def connect_nodes(self, params):
         """
-        Establish Gossipsub connections between nodes.
+        Create the topics and draw their candidate peers, then form the initial meshes.
+
+        With a RoleAssignment set, every subnet's validators subscribe to the
+        subnet's topic, and the global aggregators to the global topic, which
+        the other subnet aggregators publish to through fanout; node ids are
+        the validator indices of the assignment and the topics follow its
+        current round. Without one, all nodes share the global topic.
 
         Args:
-            params (dict): Parameters including 'validators' and 'subnet_id'.
+            params (dict): Parameters including 'validators' and, optionally,
+                'global_aggregators' when they are separate node objects.
         """
-        nodes = params.get('validators', [])
-        for node in nodes:
-            self.add_node(node)
+        for node in params.get('validators', []) + params.get('global_aggregators', []):
+            if node.node_id not in self._positions:
+                # Connections live in the topic blocks, not in per-node sets
+                self._positions[node.node_id] = len(self.nodes)
+                self.nodes.append(node)
 
-        # Create a random mesh network
-        for node in self.nodes:
-            num_peers = random.randint(self.gossipsub_D_low, self.gossipsub_D_high)
-            peers = random.sample([n for n in self.nodes if n != node], min(num_peers, len(self.nodes) - 1))
-            for peer in peers:
-                self.node_connections[node.node_id].add(peer.node_id)
-                self.node_connections[peer.node_id].add(node.node_id)
+        self.topics = {}
+        self.retired_counters = {}
+        assignment = self.assignment
+        no_publishers = np.zeros(0, dtype=np.int64)
+        if assignment is None:
+            groups = [(GLOBAL_TOPIC, np.arange(len(self.nodes)), no_publishers)]
+        else:
+            position_of = self._position_of()
+            groups = [(subnet_topic(subnet_id), position_of[assignment.members(subnet_id)], no_publishers)
+                      for subnet_id in range(assignment.num_subnets)]
+            groups.append(self._global_group(position_of))
+
+        memberships = [self._topic_members(*group) for group in groups]
+        graphs = self._candidate_graphs(memberships)
+        for (topic, _, _), (members, subscribed), (indptr, indices) in zip(groups, memberships, graphs):
+            self._add_topic(topic, members, subscribed, indptr, indices)
+
+    def reassign(self):
+        """
+        Rebuild the global topic for the assignment's current round.
+
+        Subnet topics follow the static subnet membership and keep their
+        meshes. The global topic's subscribers (global aggregators) and
+        publishers (subnet aggregators) change with the round, so its
+        candidate graph is drawn again from the seed and the round number
+        and its meshes are formed again, with the heartbeat restarted if it
+        was running. The traffic counters of the replaced meshes are added
+        to `retired_counters`.
+        """
+        if self.assignment is None or GLOBAL_TOPIC not in self.topics:
+            return
+        replaced = self.topics.pop(GLOBAL_TOPIC)
+        running, until = replaced.running, replaced.until
+        replaced.stop()
+        replaced.forget_messages()
+        for counter in TRAFFIC_COUNTERS:
+            totals = self.retired_counters.setdefault(counter, np.zeros(len(self.nodes), dtype=np.int64))
+            totals[replaced.members] += getattr(replaced, counter)
+
+        topic, subscribers, publishers = self._global_group(self._position_of())
+        members, subscribed = self._topic_members(topic, subscribers, publishers)
+        rng = np.random.default_rng([self.random_seed, self.assignment.round_number])
+        indptr, indices = candidate_graph(len(members), subscribed, self.gossipsub_D_low, self.gossipsub_D_high, rng)
+        self._add_topic(topic, members, subscribed, indptr, indices)
+        if running:
+            self.topics[topic].start(until=until)
+
+    def _position_of(self):
+        """
+        Get the position of every node id.
+
+        Returns:
+            numpy.ndarray: Position by node id, -1 for ids not in the topology.
+        """
+        position_of = np.full(max(self._positions) + 1, -1, dtype=np.int64)
+        position_of[list(self._positions)] = list(self._positions.values())
+        return position_of
+
+    def _global_group(self, position_of):
+        """
+        Get the global topic's subscribers and publishers in the assignment's current round.
+
+        Args:
+            position_of (numpy.ndarray): Position by node id.
+
+        Returns:
+            tuple[str, numpy.ndarray, numpy.ndarray]: The topic, the positions of the
+            global aggregators and of the other subnet aggregators.
+        """
+        assignment = self.assignment
+        publishers = np.setdiff1d(assignment.subnet_aggregators.ravel(), assignment.global_aggregators)
+        return GLOBAL_TOPIC, position_of[assignment.global_aggregators], position_of[publishers]
+
+    def _topic_members(self, topic, subscribers, publishers):
+        """
+        Get the members of a topic, sorted by position, and which of them subscribe.
+
+        Args:
+            topic (str): The topic name.
+            subscribers (numpy.ndarray): Positions of the subscribed nodes.
+            publishers (numpy.ndarray): Positions of nodes that only publish to the topic.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Member positions and the subscribed mask.
+        """
+        members = np.concatenate((subscribers, publishers))
+        if np.any(members < 0):
+            raise ValueError(f"Topic {topic} has members that were not added to the topology")
+        order = np.argsort(members)
+        return members[order], order < len(subscribers)
+
+    def _candidate_graphs(self, memberships):
+        """
+        Draw the candidate graph of every topic, or map them from the cache.
+
+        All topics are drawn from one random stream, so they are cached
+        together: the CSR blocks are concatenated, with the offsets of every
+        topic's row pointers and column indices, and sliced back into
+        (zero-copy) views.
+
+        Args:
+            memberships (list[tuple[numpy.ndarray, numpy.ndarray]]): Members and subscribed mask of every topic.
+
+        Returns:
+            list[tuple[numpy.ndarray, numpy.ndarray]]: CSR row pointers and column indices of every topic.
+        """
+        def build():
+            rng = np.random.default_rng(self.random_seed)
+            graphs = [candidate_graph(len(members), subscribed, self.gossipsub_D_low, self.gossipsub_D_high, rng)
+                      for members, subscribed in memberships]
+            return {
+                "indptr": np.concatenate([indptr for indptr, _ in graphs]),
+                "indices": np.concatenate([indices for _, indices in graphs]),
+                "row_offsets": np.cumsum([0] + [len(indptr) for indptr, _ in graphs]),
+                "edge_offsets": np.cumsum([0] + [len(indices) for _, indices in graphs]),
+            }
+
+        row_counts = [len(members) + 1 for members, _ in memberships]
+        if self.cache is None:
+            arrays = build()
+        else:
+            arrays = self.cache.fetch(cache_key("gossipsub_candidates", self._graph_params(), self.random_seed), build)
+            if np.diff(arrays["row_offsets"]).tolist() != row_counts:
+                arrays = build()  # Same parameters but different members: the nodes were added differently
+        row_offsets, edge_offsets = arrays["row_offsets"].tolist(), arrays["edge_offsets"].tolist()
+        return [(arrays["indptr"][row_offsets[index]:row_offsets[index + 1]],
+                 arrays["indices"][edge_offsets[index]:edge_offsets[index + 1]])
+                for index in range(len(memberships))]
+
+    def _graph_params(self):
+        """
+        Get the parameters the candidate graphs depend on, besides the seed.
+
+        Returns:
+            dict: The parameters, as hashed into cache keys.
+        """
+        params = {"D_low": self.gossipsub_D_low, "D_high": self.gossipsub_D_high, "num_nodes": len(self.nodes)}
+        assignment = self.assignment
+        if assignment is not None:
+            params.update(
+                num_validators=assignment.num_validators,
+                num_subnets=assignment.num_subnets,
+                num_subnet_aggregators=assignment.num_subnet_aggregators,
+                num_global_aggregators=assignment.num_global_aggregators,
+                num_peers_with_all_roles=assignment.num_peers_with_all_roles,
+                assignment_seed=assignment.random_seed,
+                round_number=assignment.round_number,
+            )
+        return params
+
+    def _add_topic(self, topic, members, subscribed, indptr, indices):
+        """
+        Create a topic's meshes over its members and join them.
+
+        Args:
+            topic (str): The topic name.
+            members (numpy.ndarray): Positions of the topic's members, sorted.
+            subscribed (numpy.ndarray): Boolean mask of the subscribed members.
+            indptr (numpy.ndarray): CSR row pointers of the candidate graph.
+            indices (numpy.ndarray): CSR column indices of the candidate graph.
+        """
+        mesh = BatchedGossipSub(
+            self.simulator,
+            indptr,
+            indices,
+            D=self.gossipsub_D,
+            D_low=self.gossipsub_D_low,
+            D_high=self.gossipsub_D_high,
+            heartbeat_interval_ms=self.gossipsub_heartbeat_interval_ms,
+            fanout_ttl_seconds=self.gossipsub_fanout_ttl_seconds,
+            random_seed=(self.random_seed, len(self.topics)),
+            lazy_gossip=self.gossipsub_lazy_gossip,
+            D_lazy=self.gossipsub_D_lazy,
+            history_length=self.gossipsub_history_length,
+            history_gossip=self.gossipsub_history_gossip,
+            seen_ttl_seconds=self.gossipsub_seen_ttl_seconds,
+            deliver_callback=self._deliver,
+            members=members,
+        )
+        mesh.subscribed[:] = subscribed
+        mesh.join()
+        self.topics[topic] = mesh
+
+    def start_heartbeat(self, until=None):
+        """
+        Start the heartbeat of every topic's meshes.
+
+        Each topic's heartbeat stops on its own once that topic has no
+        gossip work left, so a run without `until` still finishes.
+
+        Args:
+            until (int, optional): Last time a heartbeat may run (ms).
+
+        Returns:
+            dict: Maps topic name to its BatchedGossipSub.
+        """
+        for mesh in self.topics.values():
+            mesh.start(until=until)
+        return self.topics
+
+    def topic_of(self, message):
+        """
+        Get the topic a message is published to.
+
+        Args:
+            message: The message carrying a Signature or SNARKProof payload.
+
+        Returns:
+            str: Subnet topic of the signer for signatures, the global topic for proofs.
+        """
+        payload = message.payload
+        if isinstance(payload, SNARKProof) or self.assignment is None:
+            return GLOBAL_TOPIC
+        return subnet_topic(self.assignment.subnet(payload.validator_id))
+
+    def _row(self, mesh, node):
+        """
+        Get a node's row in a topic's meshes.
+
+        Args:
+            mesh (BatchedGossipSub): The topic's meshes.
+            node: The node to look up.
+
+        Returns:
+            int: The node's row, or -1 if it is not a member of the topic.
+        """
+        position = self._positions[node.node_id]
+        row = int(np.searchsorted(mesh.members, position))
+        return row if row < len(mesh.members) and mesh.members[row] == position else -1
+
+    def _deliver(self, position, message):
+        """
+        Hand a message received through the meshes to the node object.
+
+        The delivery goes through `Simulator.deliver`, so the metrics
+        collector's hook records the first receipt at every node.
+
+        Args:
+            position (int): Position of the receiving node in `self.nodes`.
+            message: The received message.
+        """
+        self.simulator.deliver(self.nodes[position], message)
+
+    def get_neighbors(self, node):
+        """
+        Get the mesh peers of a node across all of its topics.
+
+        Args:
+            node: The node to get neighbors for.
+
+        Returns:
+            List: List of neighboring nodes.
+        """
+        positions = set()
+        for mesh in self.topics.values():
+            row = self._row(mesh, node)
+            if row >= 0:
+                positions.update(mesh.members[mesh.mesh_peers(row)].tolist())
+        return [self.nodes[position] for position in sorted(positions)]
+
+    def are_connected(self, node1, node2) -> bool:
+        """
+        Check if two nodes are mesh peers in any topic.
+
+        Args:
+            node1: First node to check.
+            node2: Second node to check.
+
+        Returns:
+            bool: True if the nodes share a mesh link, False otherwise.
+        """
+        return node2 in self.get_neighbors(node1)
+
+    def edge_list(self):
+        """
+        Get the mesh and fanout links of every topic as arrays of node ids.
+
+        Non-subscribed publishers contribute all their candidate peers, the
+        links their fanout is drawn from when they publish.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Node ids of the two ends of every link.
+        """
+        node_ids = np.fromiter((node.node_id for node in self.nodes), dtype=np.int64, count=len(self.nodes))
+        sources, targets = [], []
+        for mesh in self.topics.values():
+            links = mesh.in_mesh | mesh.in_fanout | ~mesh.subscribed[mesh.edge_sources]
+            sources.append(node_ids[mesh.members[mesh.edge_sources[links]]])
+            targets.append(node_ids[mesh.members[mesh.indices[links]]])
+        if not sources:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(sources), np.concatenate(targets)
 
     def route_message(self, sender, recipient, message, **kwargs):
         """
         Route a message using the Gossipsub protocol.
 
+        A broadcast takes one pending delivery of a pooled message: the
+        topic's meshes hold it until it expires from their mcache windows.
+
         Args:
             sender: The node sending the message.
             recipient: The node receiving the message, or None for broadcast.
             message: The message to be routed.
+            **kwargs: 'topic' overrides the topic derived from the message payload.
         """
         if recipient:
             # Directly send the message to the recipient
-            self.simulator.schedule_event(
-                sender=sender,
-                recipient=recipient,
-                message=message,
-                latency=self.calculate_latency(sender, recipient)
+            self.simulator.schedule_delivery(
+                self.simulator.current_time + self.calculate_latency(sender, recipient),
+                recipient,
+                message,
             )
         else:
-            # Broadcast to all connected peers
-            visited = set()
-            queue = [sender]
-            while queue:
-                current = queue.pop(0)
-                if current.node_id not in visited:
-                    visited.add(current.node_id)
-                    for neighbor_id in self.node_connections[current.node_id]:
-                        neighbor = next(node for node in self.nodes if node.node_id == neighbor_id)
-                        self.simulator.schedule_event(
-                            sender=current,
-                            recipient=neighbor,
-                            message=message,
-                            latency=self.calculate_latency(current, neighbor)
-                        )
-                        queue.append(neighbor)
+            mesh = self.topics[kwargs.get("topic") or self.topic_of(message)]
+            row = self._row(mesh, sender)
+            if row < 0:
+                raise ValueError(f"Node {sender.node_id} is not a member of the message's topic")
+            mesh.publish(row, gossip_message_id(message), message, self.calculate_bandwidth_usage(message))
+
+    def flood(self, senders, messages, topic=None, receivers=None, tick_ms=1):
+        """
+        Flood messages published now over a topic's meshes with the time-stepped engine.
+
+        Deliveries, duplicate drops and forwards of the whole flood run as
+        array operations per tick instead of one event each; afterwards the
+        first receipts at `receivers` are scheduled as ordinary deliveries,
+        so the following phase (aggregation) continues on the simulator.
+
+        Args:
+            senders (list[Node]): The publisher of each message (subscribed to the topic).
+            messages (list[Message]): The messages to flood.
+            topic (str, optional): The topic. Defaults to the topic of the first message.
+            receivers (list[Node], optional): Nodes whose receipts are handed to the
+                simulator. Defaults to every member of the topic.
+            tick_ms (float): Length of a tick (ms).
+
+        Returns:
+            TickFlood: The finished flood, with first arrival times and traffic counters.
+        """
+        mesh = self.topics[topic or self.topic_of(messages[0])]
+        rows = np.array([self._row(mesh, sender) for sender in senders], dtype=np.int64)
+        if np.any(rows < 0) or not np.all(mesh.subscribed[rows]):
+            raise ValueError("Flooded messages must be published by subscribers of the topic")
+        flood = TickFlood(*mesh.flood_links(), self.simulator.latency_model, tick_ms)
+        flood.run(rows, self.simulator.current_time, [self.calculate_bandwidth_usage(message) for message in messages])
+        mesh.record_flood(flood, [gossip_message_id(message) for message in messages], messages)
+
+        receiver_rows = None if receivers is None else np.array([self._row(mesh, node) for node in receivers])
+        if receiver_rows is not None:
+            receiver_rows = receiver_rows[receiver_rows >= 0]
+        flood.hand_off(self.simulator, [self.nodes[position] for position in mesh.members.tolist()],
+                       messages, receiver_rows)
+        return flood
 
     def calculate_latency(self, sender, recipient):
         """
@@ -108,4 +554,24 @@ class GossipsubTopology(NetworkTopology):
         Returns:
             int: Bandwidth usage in bytes.
         """
-        return len(message.payload)
\ No newline at end of file
+        payload = message.payload
+        if isinstance(payload, SNARKProof):
+            return payload.wire_size
+        return payload.size
+
+
+def gossip_message_id(message):
+    """
+    Get the 32-bit gossip message id of a signature or SNARK proof message.
+
+    Args:
+        message: The message carrying a Signature or SNARKProof payload.
+
+    Returns:
+        int: The message id, see `beamsim.protocols.gossipsub.message_id`.
+    """
+    payload = message.payload
+    if isinstance(payload, SNARKProof):
+        kind = MESSAGE_KIND_GLOBAL_PROOF if "subnet_proofs" in payload.metadata else MESSAGE_KIND_SUBNET_PROOF
+        return message_id(kind, message.slot, payload.aggregator_id)
+    return message_id(MESSAGE_KIND_SIGNATURE, message.slot, payload.validator_id)
@@ -1,17 +1,100 @@
 """
 Grid communication topology for the BEAMSim discrete-event simulation engine.
 
-This module implements a grid-based communication model where nodes are
-organized in a 2D grid and communicate with their neighbors.
+This module implements a grid-based communication model where the members
+of a group (a subnet, or the global aggregators) are laid out row by row in
+a 2D grid. A broadcast reaches every member in two hops: the origin sends
+to its whole row and column, row peers forward down their column and
+column peers forward along their row. Peers are computed arithmetically
+from a member's position, so no adjacency is stored.
 """
 
-from beamsim.network.topology import NetworkTopology
 import math
 
+import numpy as np
+
+from beamsim.aggregation.snark import SNARKProof
+from beamsim.network.topology import NetworkTopology
+
+
+def grid_shape(group_size, columns=None):
+    """
+    Get the shape of the grid holding a group.
+
+    Args:
+        group_size (int): Number of members in the group.
+        columns (int, optional): Number of columns. Defaults to ceil(sqrt(group_size)).
+
+    Returns:
+        tuple[int, int]: Number of rows and columns; the last row may be partially filled.
+    """
+    if not columns:
+        columns = max(1, math.ceil(math.sqrt(group_size)))
+    return max(1, -(-group_size // columns)), columns
+
+
+def row_peers(position, group_size, columns):
+    """
+    Get the positions in the same row as a member.
+
+    Args:
+        position (int): Position of the member in its group.
+        group_size (int): Number of members in the group.
+        columns (int): Number of grid columns.
+
+    Returns:
+        numpy.ndarray: Positions of the member's row peers.
+    """
+    start = position - position % columns
+    peers = np.arange(start, min(start + columns, group_size))
+    return peers[peers != position]
+
+
+def column_peers(position, group_size, columns):
+    """
+    Get the positions in the same column as a member.
+
+    Args:
+        position (int): Position of the member in its group.
+        group_size (int): Number of members in the group.
+        columns (int): Number of grid columns.
+
+    Returns:
+        numpy.ndarray: Positions of the member's column peers.
+    """
+    peers = np.arange(position % columns, group_size, columns)
+    return peers[peers != position]
+
+
+def grid_edges(group_size, columns):
+    """
+    Get every row and column link of a grid.
+
+    Args:
+        group_size (int): Number of members in the group.
+        columns (int): Number of grid columns.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Positions of the two ends of every (directed) link.
+    """
+    num_rows, columns = grid_shape(group_size, columns)
+    positions = np.arange(group_size)
+    same_row = (positions - positions % columns)[:, None] + np.arange(columns)
+    same_column = (positions % columns)[:, None] + np.arange(num_rows) * columns
+    peers = np.concatenate((same_row, same_column), axis=1)
+    sources = np.broadcast_to(positions[:, None], peers.shape)
+    links = (peers < group_size) & (peers != sources)
+    return sources[links], peers[links]
+
 
 class GridTopology(NetworkTopology):
     """
     Grid communication topology implementation.
+
+    With a RoleAssignment set, signatures are disseminated in one grid per
+    subnet (positions are the validators' ranks in their subnet) and subnet
+    proofs in a separate grid of the global aggregators. Without one, all
+    nodes form a single grid in the order they were added.
     """
 
     def __init__(self, simulator, grid_size=None):
@@ -20,54 +103,166 @@ class GridTopology(NetworkTopology):
 
         Args:
             simulator: The simulator instance managing the simulation.
-            grid_size (int): The size of the grid (number of nodes per row/column).
+            grid_size (int): Number of columns of each grid. Defaults to
+                ceil(sqrt(group size)), computed per group.
         """
         super().__init__(simulator)
         self.grid_size = grid_size
+        self._nodes_by_id = {}
+        self._node_ids = np.zeros(0, dtype=np.int64)
+        self._positions = {}
+        self._global_positions = None
+        self._global_round = None
 
     def connect_nodes(self, params):
         """
-        Establish grid connections between nodes.
+        Register the grid members. Peers are computed on demand, so no connections are stored.
 
         Args:
-            params (dict): Parameters including 'validators'.
+            params (dict): Parameters including 'validators' and, optionally,
+                'global_aggregators' when they are separate node objects.
         """
-        nodes = params.get('validators', [])
+        nodes = params.get('validators', []) + params.get('global_aggregators', [])
         for node in nodes:
-            self.add_node(node)
+            if node.node_id not in self._nodes_by_id:
+                self.add_node(node)
+            self._nodes_by_id[node.node_id] = node
+        self._node_ids = np.fromiter((node.node_id for node in self.nodes), dtype=np.int64,
+                                     count=len(self.nodes))
+        self._positions = {node.node_id: index for index, node in enumerate(self.nodes)}
+
+    def _group_of(self, node_id, channel):
+        """
+        Get the members of the grid a node disseminates in and the node's position.
 
-        if not self.grid_size:
-            self.grid_size = math.ceil(math.sqrt(len(self.nodes)))
+        Args:
+            node_id (int): The node's id.
+            channel (str): "subnet" for signature dissemination, "global" for subnet proofs.
 
-        for idx, node in enumerate(self.nodes):
-            row, col = divmod(idx, self.grid_size)
-            neighbors = self._get_neighbors(row, col)
-            for neighbor_idx in neighbors:
-                neighbor = self.nodes[neighbor_idx]
-                self.node_connections[node.node_id].add(neighbor.node_id)
-                self.node_connections[neighbor.node_id].add(node.node_id)
+        Returns:
+            tuple[numpy.ndarray, int]: Node ids of the grid members in position order,
+            and the node's position in the grid.
+        """
+        assignment = self.assignment
+        if assignment is None:
+            return self._node_ids, self._positions[node_id]
+        if channel == "global":
+            if self._global_round != assignment.round_number:
+                self._global_positions = {
+                    aggregator_id: index for index, aggregator_id in enumerate(assignment.global_aggregators.tolist())
+                }
+                self._global_round = assignment.round_number
+            return assignment.global_aggregators, self._global_positions[node_id]
+        return assignment.members(assignment.subnet_of[node_id]), int(assignment.subnet_rank[node_id])
 
-    def _get_neighbors(self, row, col):
+    def get_grid_peers(self, node, channel="subnet"):
         """
-        Get the indices of neighboring nodes in the grid.
+        Get the row and column peers of a node.
 
         Args:
-            row (int): Row index of the node.
-            col (int): Column index of the node.
+            node: The node to get peers for.
+            channel (str): "subnet" or "global".
 
         Returns:
-            list: Indices of neighboring nodes.
-        """
-        neighbors = []
-        if row > 0:  # Up
-            neighbors.append((row - 1) * self.grid_size + col)
-        if row < self.grid_size - 1:  # Down
-            neighbors.append((row + 1) * self.grid_size + col)
-        if col > 0:  # Left
-            neighbors.append(row * self.grid_size + col - 1)
-        if col < self.grid_size - 1:  # Right
-            neighbors.append(row * self.grid_size + col + 1)
-        return neighbors
+            tuple[numpy.ndarray, numpy.ndarray]: Node ids of the row peers and of the column peers.
+        """
+        members, position = self._group_of(node.node_id, channel)
+        _, columns = grid_shape(len(members), self.grid_size)
+        return (members[row_peers(position, len(members), columns)],
+                members[column_peers(position, len(members), columns)])
+
+    def get_neighbors(self, node):
+        """
+        Get the row and column peers of a node in its subnet grid.
+
+        Args:
+            node: The node to get neighbors for.
+
+        Returns:
+            List: List of neighboring nodes.
+        """
+        row_ids, column_ids = self.get_grid_peers(node)
+        return [self._nodes_by_id[node_id] for node_id in np.concatenate((row_ids, column_ids)).tolist()
+                if node_id in self._nodes_by_id]
+
+    def are_connected(self, node1, node2) -> bool:
+        """
+        Check if two nodes share a row or column of the same subnet grid.
+
+        Args:
+            node1: First node to check.
+            node2: Second node to check.
+
+        Returns:
+            bool: True if the nodes are grid peers, False otherwise.
+        """
+        row_ids, column_ids = self.get_grid_peers(node1)
+        return bool(np.any(row_ids == node2.node_id) or np.any(column_ids == node2.node_id))
+
+    def edge_list(self):
+        """
+        Get the row and column links of every grid as arrays of node ids.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Node ids of the two ends of every link.
+        """
+        assignment = self.assignment
+        if assignment is None:
+            groups = [self._node_ids]
+        else:
+            groups = [assignment.members(subnet_id) for subnet_id in range(assignment.num_subnets)]
+            groups.append(assignment.global_aggregators)
+        sources, targets = [], []
+        for members in groups:
+            local_sources, local_targets = grid_edges(len(members), self.grid_size)
+            sources.append(np.asarray(members, dtype=np.int64)[local_sources])
+            targets.append(np.asarray(members, dtype=np.int64)[local_targets])
+        return np.concatenate(sources), np.concatenate(targets)
+
+    def broadcast_plan(self, origin_id, channel="subnet"):
+        """
+        Compute every delivery of a two-hop grid broadcast.
+
+        The origin sends to its row and column (hop 1). Row peers forward down
+        their own column and column peers along their own row (hop 2), so
+        every member is reached within two hops even when the last row is
+        only partially filled. A broadcast costs fewer than 2 * group size
+        messages and each sender fans out to O(sqrt(group size)) peers.
+
+        Args:
+            origin_id (int): Node id of the broadcasting member.
+            channel (str): "subnet" or "global".
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Recipient node id of every
+            delivery, and for each one the index of the hop-1 delivery that
+            feeds it (-1 for the hop-1 deliveries themselves, which come first).
+        """
+        members, position = self._group_of(origin_id, channel)
+        group_size = len(members)
+        num_rows, columns = grid_shape(group_size, self.grid_size)
+        row, column = divmod(position, columns)
+
+        first_row = row_peers(position, group_size, columns)
+        first_column = column_peers(position, group_size, columns)
+
+        # Row peers forward down their columns, skipping the origin's row
+        rows = np.arange(num_rows)
+        down = rows[None, :] * columns + (first_row % columns)[:, None]
+        down_valid = (down < group_size) & (rows[None, :] != row)
+        # Column peers forward along their rows, skipping the origin's column
+        cols = np.arange(columns)
+        along = (first_column // columns)[:, None] * columns + cols[None, :]
+        along_valid = (along < group_size) & (cols[None, :] != column)
+
+        num_first_hop = len(first_row) + len(first_column)
+        recipients = np.concatenate((first_row, first_column, down[down_valid], along[along_valid]))
+        parents = np.concatenate((
+            np.full(num_first_hop, -1),
+            np.broadcast_to(np.arange(len(first_row))[:, None], down.shape)[down_valid],
+            np.broadcast_to(np.arange(len(first_row), num_first_hop)[:, None], along.shape)[along_valid],
+        ))
+        return members[recipients], parents
 
     def route_message(self, sender, recipient, message, **kwargs):
         """
@@ -77,32 +272,30 @@ class GridTopology(NetworkTopology):
             sender: The node sending the message.
             recipient: The node receiving the message, or None for broadcast.
             message: The message to be routed.
+            **kwargs: 'channel' selects the subnet grid (default) or the global aggregator grid.
         """
         if recipient:
             # Directly send the message to the recipient
-            self.simulator.schedule_event(
-                sender=sender,
-                recipient=recipient,
-                message=message,
-                latency=self.calculate_latency(sender, recipient)
+            self.simulator.schedule_delivery(
+                self.simulator.current_time + self.calculate_latency(sender, recipient),
+                recipient,
+                message,
             )
-        else:
-            # Broadcast to all connected neighbors
-            visited = set()
-            queue = [sender]
-            while queue:
-                current = queue.pop(0)
-                if current.node_id not in visited:
-                    visited.add(current.node_id)
-                    for neighbor_id in self.node_connections[current.node_id]:
-                        neighbor = next(node for node in self.nodes if node.node_id == neighbor_id)
-                        self.simulator.schedule_event(
-                            sender=current,
-                            recipient=neighbor,
-                            message=message,
-                            latency=self.calculate_latency(current, neighbor)
-                        )
-                        queue.append(neighbor)
+            return
+
+        recipient_ids, parents = self.broadcast_plan(sender.node_id, kwargs.get("channel", "subnet"))
+        arrival_times = self.simulator.latency_model.sample_latencies(len(recipient_ids))
+        arrival_times += self.simulator.current_time
+        # A second-hop delivery leaves when its forwarder received the first hop
+        second_hop = parents >= 0
+        arrival_times[second_hop] += arrival_times[parents[second_hop]] - self.simulator.current_time
+
+        nodes_by_id = self._nodes_by_id
+        self.simulator.schedule_deliveries(
+            arrival_times,
+            [nodes_by_id[node_id] for node_id in recipient_ids.tolist()],
+            [message] * len(recipient_ids),
+        )
 
     def calculate_latency(self, sender, recipient):
         """
@@ -127,4 +320,7 @@ class GridTopology(NetworkTopology):
         Returns:
             int: Bandwidth usage in bytes.
         """
-        return len(message.payload)
\ No newline at end of file
+        payload = message.payload
+        if isinstance(payload, SNARKProof):
+            return payload.wire_size
+        return payload.size
@@ -7,6 +7,8 @@ between nodes based on configurable parameters and distributions.
 
 import random
 
+import numpy as np
+
 
 class LatencyModel:
     """
@@ -27,6 +29,7 @@ class LatencyModel:
         self.max_latency_ms = max_latency_ms
         self.distribution = distribution
         random.seed(random_seed)
+        self.rng = np.random.default_rng(random_seed)
 
     def calculate_latency(self, sender, recipient):
         """
@@ -49,4 +52,27 @@ class LatencyModel:
             raise ValueError(f"Unsupported distribution: {self.distribution}")
 
         # Clamp latency to the specified range
-        return max(self.min_latency_ms, min(self.max_latency_ms, int(latency)))
\ No newline at end of file
+        return max(self.min_latency_ms, min(self.max_latency_ms, int(latency)))
+
+    def sample_latencies(self, size):
+        """
+        Draw many latencies at once, following the same distribution as `calculate_latency`.
+
+        Args:
+            size (int | tuple[int, ...]): Shape of the array of latencies to draw.
+
+        Returns:
+            numpy.ndarray: Latencies in milliseconds.
+        """
+        if self.distribution == "normal":
+            mean = (self.min_latency_ms + self.max_latency_ms) / 2
+            stddev = (self.max_latency_ms - self.min_latency_ms) / 6  # 99.7% within range
+            latencies = self.rng.normal(mean, stddev, size)
+        elif self.distribution == "uniform":
+            latencies = self.rng.uniform(self.min_latency_ms, self.max_latency_ms, size)
+        else:
+            raise ValueError(f"Unsupported distribution: {self.distribution}")
+
+        # Truncate and clamp latencies to the specified range, as calculate_latency does
+        np.trunc(latencies, out=latencies)
+        return np.clip(latencies, self.min_latency_ms, self.max_latency_ms, out=latencies)
\ No newline at end of file
@@ -9,6 +9,8 @@ between nodes and handling message routing.
 from abc import ABC, abstractmethod
 from typing import List, Dict, Set, Callable, Any, Optional
 
+import numpy as np
+
 
 class NetworkTopology(ABC):
     """
@@ -28,7 +30,8 @@ class NetworkTopology(ABC):
         self.simulator = simulator
         self.nodes = []
         self.node_connections = {}  # Maps node_id to a set of connected node_ids
-        
+        self.assignment = None  # Shared RoleAssignment, if the topology uses subnets
+
     def add_node(self, node):
         """
         Add a node to the network topology.
@@ -39,6 +42,24 @@ class NetworkTopology(ABC):
         self.nodes.append(node)
         self.node_connections[node.node_id] = set()
 
+    def set_assignment(self, assignment) -> None:
+        """
+        Share a subnet and aggregator assignment with this topology.
+
+        Args:
+            assignment: The RoleAssignment used to look up subnets and aggregators.
+        """
+        self.assignment = assignment
+
+    def reassign(self) -> None:
+        """
+        Rebuild the connections that depend on the roles of the assignment's current round.
+
+        Called by the slot driver whenever the round changes; topologies that
+        look the roles up on demand have nothing to rebuild.
+        """
+        pass
+
     @abstractmethod
     def connect_nodes(self, params: Dict[str, Any]) -> None:
         """
@@ -89,6 +110,17 @@ class NetworkTopology(ABC):
         neighbor_ids = self.node_connections.get(node.node_id, set())
         return [n for n in self.nodes if n.node_id in neighbor_ids]
 
+    def edge_list(self):
+        """
+        Get every connection of the topology as arrays of node ids, for structural analysis.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Node ids of the two ends of every connection.
+        """
+        sources = [node_id for node_id, connections in self.node_connections.items() for _ in connections]
+        targets = [peer_id for connections in self.node_connections.values() for peer_id in connections]
+        return np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+
     @abstractmethod
     def calculate_latency(self, sender, recipient) -> int:
         """
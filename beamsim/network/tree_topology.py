@@ -0,0 +1,247 @@
+"""
+Aggregation tree topology for the BEAMSim discrete-event simulation engine.
+
+This module implements a hierarchical aggregation model where signatures
+are aggregated up a k-ary tree of recursive SNARK aggregators instead of
+the flat subnet -> global layers of topologies 0-2. Consecutive blocks of
+`arity` validators send to one leaf aggregator, every `arity` aggregators
+of a level send their proof to one aggregator of the level above, and the
+single root produces the final proof, so the depth grows as log_arity(N).
+"""
+
+import numpy as np
+
+from beamsim.aggregation.snark import SNARKProof
+from beamsim.network.topology import NetworkTopology
+from beamsim.nodes.global_aggregator import GlobalAggregator
+from beamsim.nodes.subnet_aggregator import SubnetAggregator
+from beamsim.nodes.tree_aggregator import TreeAggregator
+
+
+def tree_level_sizes(num_validators, arity):
+    """
+    Get the number of aggregators on every level of the tree.
+
+    Args:
+        num_validators (int): Number of validators (the leaves' children).
+        arity (int): Maximum number of children per aggregator.
+
+    Returns:
+        list[int]: Aggregators per level, from the leaf aggregators up to the root.
+    """
+    if arity < 2:
+        raise ValueError("arity must be at least 2")
+    sizes = [max(1, -(-num_validators // arity))]
+    while sizes[-1] > 1 or len(sizes) < 2:
+        sizes.append(-(-sizes[-1] // arity))
+    return sizes
+
+
+class TreeTopology(NetworkTopology):
+    """
+    Aggregation tree topology implementation.
+
+    The leaf level is made of SubnetAggregator nodes, intermediate levels of
+    TreeAggregator nodes and the root is a GlobalAggregator. Parents are
+    computed arithmetically (child j of a level reports to j // arity), so
+    apart from each node's own neighbor list no adjacency is stored.
+    """
+
+    def __init__(self, simulator, arity=16):
+        """
+        Initialize the tree topology.
+
+        Args:
+            simulator: The simulator instance managing the simulation.
+            arity (int): Maximum number of children per aggregator.
+        """
+        super().__init__(simulator)
+        self.arity = arity
+        self.levels = []
+        self.num_validators = 0
+        self.validator_ids = np.zeros(0, dtype=np.int64)
+
+    def create_aggregators(self, num_validators, aggregation_rate_per_sec, recursion_aggregation_rate_per_sec,
+                           snark_proof_size, subnet_signature_threshold, proof_threshold,
+                           finalization_threshold, first_node_id=None, participation_encoding="auto"):
+        """
+        Create the aggregator nodes of every level of the tree.
+
+        Args:
+            num_validators (int): Number of validators aggregated by the tree.
+            aggregation_rate_per_sec (int): Signature aggregation rate of the leaf aggregators.
+            recursion_aggregation_rate_per_sec (int): Recursive aggregation rate of the levels above.
+            snark_proof_size (int): Size of every SNARK proof (in bytes).
+            subnet_signature_threshold (float): Percentage of signatures a leaf aggregator waits for.
+            proof_threshold (float): Percentage of child proofs an intermediate aggregator waits for.
+            finalization_threshold (float): Percentage of child proofs the root waits for.
+            first_node_id (int, optional): Node id of the first aggregator. Defaults to num_validators.
+            participation_encoding (str): Wire encoding of the participation bitfields.
+
+        Returns:
+            list[list[Node]]: The aggregators of every level, from the leaves up to the root.
+        """
+        node_id = num_validators if first_node_id is None else first_node_id
+        sizes = tree_level_sizes(num_validators, self.arity)
+        levels = [[SubnetAggregator(node_id + index, self.simulator, aggregation_rate_per_sec,
+                                    snark_proof_size, subnet_signature_threshold, participation_encoding)
+                   for index in range(sizes[0])]]
+        node_id += sizes[0]
+        for size in sizes[1:-1]:
+            levels.append([TreeAggregator(node_id + index, self.simulator, recursion_aggregation_rate_per_sec,
+                                          snark_proof_size, proof_threshold)
+                           for index in range(size)])
+            node_id += size
+        levels.append([GlobalAggregator(node_id, self.simulator, recursion_aggregation_rate_per_sec,
+                                        snark_proof_size, finalization_threshold)])
+        return levels
+
+    def connect_nodes(self, params):
+        """
+        Wire validators and aggregators into the tree.
+
+        Validator i reports to leaf aggregator i // arity, and aggregator j of
+        a level to aggregator j // arity of the next one. Every aggregator is
+        told how many children it expects; the root's neighbors are its
+        children when they are TreeAggregators, which receive the final proof
+        and stop waiting for the slot's proofs. Leaf aggregators only take
+        signatures, so a root directly above them sends the final proof to
+        nobody but the nodes added as its neighbors afterwards.
+
+        Args:
+            params (dict): Parameters including 'validators' (Validator objects or a
+                ValidatorPopulation) and 'aggregators' (levels from `create_aggregators`).
+        """
+        validators = params.get('validators', [])
+        levels = params['aggregators']
+        arity = self.arity
+        self.levels = levels
+        self.nodes = [aggregator for level in levels for aggregator in level]
+
+        leaves = levels[0]
+        if hasattr(validators, "assign_aggregators"):
+            self.num_validators = validators.num_validators
+            validator_ids = validators.ids
+            parents = np.arange(self.num_validators) // arity
+            validators.assign_aggregators(leaves, parents.reshape(-1, 1).repeat(validators.redundancy_factor, 1))
+        else:
+            self.num_validators = len(validators)
+            validator_ids = [validator.node_id for validator in validators]
+            for index, validator in enumerate(validators):
+                validator.neighbors[:] = [leaves[index // arity]]
+            for index, leaf in enumerate(leaves):
+                leaf.expected_signatures = min((index + 1) * arity, len(validators)) - index * arity
+        self.validator_ids = np.asarray(validator_ids, dtype=np.int64)
+        if len(leaves) != -(-self.num_validators // arity):
+            raise ValueError("The leaf level does not match the number of validators")
+        for index, leaf in enumerate(leaves):
+            leaf.set_participation_offset(int(validator_ids[index * arity]))
+
+        for children, parents in zip(levels, levels[1:]):
+            for parent in parents:
+                parent.expected_proofs = 0
+            for index, child in enumerate(children):
+                parent = parents[index // arity]
+                child.neighbors[:] = [parent]
+                parent.expected_proofs += 1
+        root = levels[-1][0]
+        root.neighbors[:] = levels[-2] if len(levels) > 2 else []
+
+    @property
+    def depth(self):
+        """
+        Number of aggregation levels between the validators and the final proof.
+
+        Returns:
+            int: The number of aggregator levels.
+        """
+        return len(self.levels)
+
+    def edge_list(self):
+        """
+        Get every child -> parent link of the tree as arrays of node ids.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Node ids of every child and of its parent.
+        """
+        arity = self.arity
+        level_ids = [np.array([aggregator.node_id for aggregator in level], dtype=np.int64)
+                     for level in self.levels]
+        if not level_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        sources = [self.validator_ids]
+        targets = [level_ids[0][np.arange(len(self.validator_ids)) // arity]]
+        for children, parents in zip(level_ids, level_ids[1:]):
+            sources.append(children)
+            targets.append(parents[np.arange(len(children)) // arity])
+        return np.concatenate(sources), np.concatenate(targets)
+
+    def get_neighbors(self, node):
+        """
+        Get the parent of a node (or the children of the root).
+
+        Args:
+            node: The node to get neighbors for.
+
+        Returns:
+            List: List of neighboring nodes.
+        """
+        return list(node.get_connected_nodes())
+
+    def are_connected(self, node1, node2) -> bool:
+        """
+        Check if one node reports to the other.
+
+        Args:
+            node1: First node to check.
+            node2: Second node to check.
+
+        Returns:
+            bool: True if the nodes are parent and child, False otherwise.
+        """
+        return node2 in node1.get_connected_nodes() or node1 in node2.get_connected_nodes()
+
+    def route_message(self, sender, recipient, message, **kwargs):
+        """
+        Route a message in the tree topology.
+
+        Args:
+            sender: The node sending the message.
+            recipient: The node receiving the message, or None to send up the tree.
+            message: The message to be routed.
+        """
+        recipients = [recipient] if recipient else sender.get_connected_nodes()
+        for node in recipients:
+            self.simulator.schedule_delivery(
+                self.simulator.current_time + self.calculate_latency(sender, node),
+                node,
+                message,
+            )
+
+    def calculate_latency(self, sender, recipient):
+        """
+        Calculate latency between two nodes.
+
+        Args:
+            sender: The sending node.
+            recipient: The receiving node.
+
+        Returns:
+            int: Latency in milliseconds.
+        """
+        return self.simulator.latency_model.calculate_latency(sender, recipient)
+
+    def calculate_bandwidth_usage(self, message):
+        """
+        Calculate bandwidth usage for a message.
+
+        Args:
+            message: The message being sent.
+
+        Returns:
+            int: Bandwidth usage in bytes.
+        """
+        payload = message.payload
+        if isinstance(payload, SNARKProof):
+            return payload.wire_size
+        return payload.size
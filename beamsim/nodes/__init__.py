@@ -2,16 +2,20 @@
 Node implementations for the BEAMSim discrete-event simulation engine.
 
 This module provides different types of nodes for the BEAM Chain network
-simulation, including validators, subnet aggregators, and global aggregators.
+simulation, including validators, subnet aggregators, global aggregators and tree aggregators.
 """
 
 # Import node classes to make them available directly from beamsim.nodes
 from beamsim.nodes.validator import Validator
 from beamsim.nodes.subnet_aggregator import SubnetAggregator
 from beamsim.nodes.global_aggregator import GlobalAggregator
+from beamsim.nodes.tree_aggregator import TreeAggregator
+from beamsim.nodes.population import ValidatorPopulation
 
 __all__ = [
     'Validator',
     'SubnetAggregator',
     'GlobalAggregator',
+    'TreeAggregator',
+    'ValidatorPopulation',
 ]
\ No newline at end of file
@@ -2,17 +2,75 @@
 Global Aggregator node implementation for the BEAMSim discrete-event simulation engine.
 
 This module defines the GlobalAggregator class, which collects SNARK proofs
-from subnet aggregators, aggregates them into a final recursive SNARK proof,
-and broadcasts the result.
+from subnet aggregators, shares them with the other global aggregators,
+aggregates them into a final recursive SNARK proof, and broadcasts the result.
 """
 
+import numpy as np
+
 from beamsim.core.node import Node
-from beamsim.core.message import Message
+from beamsim.aggregation.snark import SNARKProof
+
+
+def connect_global_aggregators(global_aggregators, deduplicate=True):
+    """
+    Connect every global aggregator to all the others for subnet proof sharing.
+
+    Args:
+        global_aggregators (list[GlobalAggregator]): The global aggregators.
+        deduplicate (bool): Forward a proof only to peers not known to have it;
+            False relays every new proof to all peers but its sender.
+    """
+    for global_aggregator in global_aggregators:
+        global_aggregator.set_peers(global_aggregators, deduplicate)
+
+
+class ProofSlot:
+    """
+    The subnet proofs a global aggregator has collected for one slot.
+    """
+
+    __slots__ = ("slot", "proofs", "finalized", "proof_bits", "known_proofs")
+
+    def __init__(self, group_size=1):
+        """
+        Initialize an empty state holding no slot yet.
+
+        Args:
+            group_size (int): Members of the proof sharing group, self included.
+        """
+        self.slot = -1
+        self.proofs = []
+        self.finalized = False
+        self.proof_bits = {}  # Subnet aggregator id -> bit of its proof in this slot
+        # Proofs held by each member of the group (rows), in bitsets of one bit per proof
+        self.known_proofs = np.zeros((group_size, 16), dtype=np.uint8)
+
+    def reset(self, slot):
+        """
+        Clear the state in place for a new slot.
+
+        Args:
+            slot (int): The slot the state now holds.
+        """
+        self.slot = slot
+        self.proofs.clear()
+        self.finalized = False
+        self.proof_bits.clear()
+        self.known_proofs.fill(0)
 
 
 class GlobalAggregator(Node):
     """
     A class representing a global aggregator node in the simulation.
+
+    Global aggregators connected with `set_peers` forward every new subnet
+    proof to their peers until one of them finalizes. Which proofs each
+    group member holds is tracked in a bitset per member (one bit per proof,
+    numbered in order of first arrival in the slot). A forwarded proof
+    carries the packed set of members known to hold it after the send, so
+    receivers learn about third parties too and only forward to members
+    still missing it.
     """
 
     def __init__(self, node_id, simulator, recursion_aggregation_rate_per_sec, snark_proof_size, finalization_threshold):
@@ -30,7 +88,38 @@ class GlobalAggregator(Node):
         self.recursion_aggregation_rate_per_sec = recursion_aggregation_rate_per_sec
         self.snark_proof_size = snark_proof_size
         self.finalization_threshold = finalization_threshold
-        self.collected_proofs = []
+        self.expected_proofs = None  # Set by the slot driver; falls back to connected nodes
+        # Proofs of the current and the previous slot, whose final proof may still be in flight
+        self.slot_states = tuple(ProofSlot() for _ in range(self.SLOT_HISTORY))
+
+        self.peers = []
+        self._group = []
+        self.deduplicate_forwards = True
+        self._group_row = 0
+        self._group_rows = {}
+        self.proofs_forwarded = 0
+        self.proof_bytes_forwarded = 0
+        self.forwards_suppressed = 0
+        self.duplicate_proofs = 0
+
+    def set_peers(self, peers, deduplicate=True):
+        """
+        Set the global aggregators this aggregator shares subnet proofs with.
+
+        Every member of the group must be given the same list, whose order
+        numbers the rows of the bitsets.
+
+        Args:
+            peers (list[GlobalAggregator]): The global aggregator group, self included.
+            deduplicate (bool): Forward a proof only to peers not known to have it.
+        """
+        self.peers = [peer for peer in peers if peer is not self]
+        self.deduplicate_forwards = deduplicate
+        self._group_rows = {peer.node_id: row for row, peer in enumerate(peers)}
+        self._group_row = self._group_rows[self.node_id]
+        self._group = list(peers)
+        for state in self.slot_states:
+            state.known_proofs = np.zeros((len(peers), 16), dtype=np.uint8)
 
     def receive_message(self, message):
         """
@@ -39,44 +128,196 @@ class GlobalAggregator(Node):
         Args:
             message (Message): The message containing a SNARK proof.
         """
-        self.collected_proofs.append(message.payload)
-        if self._should_finalize():
-            self._finalize_aggregation()
+        state = self.slot_state(message.slot)
+        if state is None:
+            return  # Late proof from a slot that is no longer retained
+        proof = message.payload
+        if "subnet_proofs" in proof.metadata:
+            state.finalized = True  # Another global aggregator already produced the final proof
+            return
+
+        byte_index, mask = self._proof_bit(state, proof.aggregator_id)
+        sender_row = self._group_rows.get(message.sender.node_id) if message.sender is not None else None
+        holders = state.known_proofs[:, byte_index]
+        duplicate = holders[self._group_row] & mask
+        if sender_row is not None:
+            holders[sender_row] |= mask
+        shared_with = proof.metadata.get("shared_with")
+        if shared_with is not None:
+            holders[np.unpackbits(shared_with, count=len(holders)).view(bool)] |= mask
+        if duplicate:
+            self.duplicate_proofs += 1
+            return
+        holders[self._group_row] |= mask
+        state.proofs.append(proof)
+
+        if self.peers and not state.finalized:
+            self._forward_proof(state, proof, byte_index, mask, sender_row)
+        if not state.finalized and self._should_finalize(state):
+            self._finalize_aggregation(state)
 
-    def _should_finalize(self):
+    def _proof_bit(self, state, aggregator_id):
+        """
+        Get the bit of a subnet aggregator's proof, numbering new proofs in arrival order.
+
+        Args:
+            state (ProofSlot): The proofs of the slot.
+            aggregator_id (int): Node id of the subnet aggregator that produced the proof.
+
+        Returns:
+            tuple[int, int]: Byte index into the bitsets and the bit mask within that byte.
+        """
+        bit = state.proof_bits.setdefault(aggregator_id, len(state.proof_bits))
+        byte_index = bit >> 3
+        known_proofs = state.known_proofs
+        if byte_index >= known_proofs.shape[1]:
+            grown = np.zeros((known_proofs.shape[0], max(16, 2 * known_proofs.shape[1])), dtype=np.uint8)
+            grown[:, :known_proofs.shape[1]] = known_proofs
+            state.known_proofs = grown
+        return byte_index, 1 << (bit & 7)
+
+    def _forward_proof(self, state, proof, byte_index, mask, sender_row):
+        """
+        Forward a new subnet proof to the peers that need it.
+
+        Deduplicated forwards are a copy of the proof carrying the packed set
+        of group members known to hold it, which adds ceil(group size / 8)
+        bytes on the wire.
+
+        Args:
+            state (ProofSlot): The proofs of the slot.
+            proof (SNARKProof): The proof to forward.
+            byte_index (int): Byte of the proof's bit in the bitsets.
+            mask (int): Mask of the proof's bit within that byte.
+            sender_row (int | None): Group row of the peer the proof came from, if any.
+        """
+        holders = state.known_proofs[:, byte_index]
+        if self.deduplicate_forwards:
+            rows = np.flatnonzero((holders & mask) == 0)
+            self.forwards_suppressed += len(self.peers) - len(rows)
+        else:
+            rows = np.arange(len(holders))
+            rows = rows[(rows != self._group_row) & (rows != sender_row)]
+        if not len(rows):
+            return
+        holders[rows] |= mask
+
+        size = proof.wire_size
+        if self.deduplicate_forwards:
+            shared_with = np.packbits((holders & mask) != 0)
+            metadata = dict(proof.metadata, shared_with=shared_with)
+            proof = SNARKProof(proof.aggregator_id, proof.proof_size, proof.num_signatures, metadata,
+                               proof.participation)
+            size += len(shared_with)
+        message = self.simulator.create_message(self, proof, state.slot, len(rows))
+        current_time = self.simulator.current_time
+        latency_model = self.simulator.latency_model
+        group = self._group
+        for row in rows.tolist():
+            peer = group[row]
+            self.simulator.schedule_delivery(
+                current_time + latency_model.calculate_latency(self, peer),
+                peer,
+                message,
+            )
+        self.proofs_forwarded += len(rows)
+        self.proof_bytes_forwarded += len(rows) * size
+
+    def _should_finalize(self, state):
         """
         Check if enough subnet proofs have been collected to produce the final SNARK proof.
 
+        Args:
+            state (ProofSlot): The proofs of the slot.
+
         Returns:
             bool: True if finalization should occur, False otherwise.
         """
-        required_proofs = int(len(self.get_connected_nodes()) * self.finalization_threshold / 100)
-        return len(self.collected_proofs) >= required_proofs
+        expected = self.expected_proofs
+        if expected is None:
+            expected = len(self.get_connected_nodes())
+        required_proofs = int(expected * self.finalization_threshold / 100)
+        return len(state.proofs) >= required_proofs
 
-    def _finalize_aggregation(self):
+    def _finalize_aggregation(self, state):
         """
         Aggregate collected subnet proofs into a final recursive SNARK proof.
+
+        Args:
+            state (ProofSlot): The proofs of the slot.
         """
-        aggregation_time = len(self.collected_proofs) / self.recursion_aggregation_rate_per_sec
+        state.finalized = True
+        aggregation_time = len(state.proofs) / self.recursion_aggregation_rate_per_sec * 1000
         self.simulator.schedule_event(
-            event_time=self.simulator.current_time + aggregation_time,
-            event_callback=self._broadcast_final_snark,
+            self.simulator.current_time + aggregation_time,
+            self._broadcast_final_snark,
+            state.slot,
         )
 
-    def _broadcast_final_snark(self):
-        """
-        Broadcast the final recursive SNARK proof to all connected nodes.
-        """
-        final_snark = {
-            "aggregator_id": self.node_id,
-            "proof_size": self.snark_proof_size,
-            "subnet_proofs": len(self.collected_proofs),
-        }
-        message = Message(sender=self, payload=final_snark)
-        for node in self.get_connected_nodes():
-            self.simulator.schedule_event(
-                event_time=self.simulator.current_time + self.simulator.latency_model.calculate_latency(self, node),
-                event_callback=node.receive_message,
-                message=message,
+    def _finished_slot_state(self, slot):
+        """
+        Get the state of a slot whose proof has just been built.
+
+        Args:
+            slot (int): The slot the proof was started for.
+
+        Returns:
+            ProofSlot | None: The slot's state, or None if two newer slots reused it meanwhile.
+        """
+        state = self.slot_states[slot % self.SLOT_HISTORY]
+        return state if state.slot == slot else None
+
+    def _merge_participation(self, state):
+        """
+        Get the union of the participation bitfields of the collected proofs.
+
+        Args:
+            state (ProofSlot): The proofs of the slot.
+
+        Returns:
+            ParticipationBitfield | None: The validators covered by the collected
+            proofs, or None if none of them carries a bitfield.
+        """
+        participation = None
+        for proof in state.proofs:
+            if proof.participation is None:
+                continue
+            if participation is None:
+                participation = proof.participation.copy()
+            else:
+                participation.union_update(proof.participation)
+        return participation
+
+    def _broadcast_final_snark(self, slot):
+        """
+        Broadcast the final recursive SNARK proof to all connected nodes and peers.
+
+        Args:
+            slot (int): The slot the final proof was started for.
+        """
+        state = self._finished_slot_state(slot)
+        if state is None:
+            return  # Two newer slots started while the proof was being built
+        final_snark = SNARKProof(
+            aggregator_id=self.node_id,
+            proof_size=self.snark_proof_size,
+            num_signatures=sum(proof.num_signatures for proof in state.proofs),
+            metadata={"subnet_proofs": len(state.proofs)},
+            participation=self._merge_participation(state),
+        )
+        if self.simulator.progress is not None:
+            self.simulator.progress.cover("global", slot, self.simulator.current_time,
+                                          final_snark.participation, final_snark.num_signatures)
+        nodes = self.get_connected_nodes()
+        if self.peers:
+            # Peers stop forwarding proofs once they learn the slot is finalized
+            connected = set(map(id, nodes))
+            nodes = nodes + [peer for peer in self.peers if id(peer) not in connected]
+        message = self.simulator.create_message(self, final_snark, slot, len(nodes))
+        for node in nodes:
+            self.simulator.schedule_delivery(
+                self.simulator.current_time + self.simulator.latency_model.calculate_latency(self, node),
+                node,
+                message,
             )
-        self.collected_proofs = []
\ No newline at end of file
+        state.proofs.clear()
\ No newline at end of file
@@ -0,0 +1,365 @@
+"""
+Struct-of-arrays validator population for the BEAMSim discrete-event simulation engine.
+
+This module defines the ValidatorPopulation class, which stores every plain
+validator as a row in a set of NumPy arrays instead of one `Validator`
+object per node. Full `Node` objects are only kept for aggregators; the
+signatures validators send are still one `Signature` payload per validator
+and one `Message` per validator and slot.
+"""
+
+import sys
+
+import numpy as np
+
+from beamsim.aggregation.signature import Signature
+from beamsim.core.message import Message
+from beamsim.network.assignment import ROLE_VALIDATOR, ROLE_SUBNET_AGGREGATOR, ROLE_GLOBAL_AGGREGATOR
+
+
+class ValidatorPopulation:
+    """
+    A class representing all validators of the simulation as parallel arrays.
+
+    Row `i` of every array describes the validator with node id
+    `first_node_id + i`. Behaviour that `Validator` implements per object
+    (drawing a sign delay, sending a signature to the assigned aggregators)
+    is implemented here with vectorized methods over the whole population.
+    """
+
+    def __init__(self, simulator, num_validators, num_subnets, signature_size,
+                 sign_latency_min_ms, sign_latency_max_ms, sign_latency_distribution="normal",
+                 redundancy_factor=1, first_node_id=0, random_seed=42, assignment=None):
+        """
+        Initialize the validator population.
+
+        Args:
+            simulator: The simulator instance managing the simulation.
+            num_validators (int): Number of validators in the population.
+            num_subnets (int): Number of subnets the validators are divided into.
+            signature_size (int): Size of each signature (in bytes).
+            sign_latency_min_ms (int): Minimum latency for signature generation (in ms).
+            sign_latency_max_ms (int): Maximum latency for signature generation (in ms).
+            sign_latency_distribution (str): Sign latency distribution ("normal" or "uniform").
+            redundancy_factor (int): Number of aggregators each validator sends to.
+            first_node_id (int): Node id of the first validator.
+            random_seed (int): Seed for the population's random number generator.
+            assignment (RoleAssignment, optional): Subnet membership and roles of the
+                validators, row i being validator i of the assignment. Without one,
+                validators are split into contiguous, evenly sized subnets.
+        """
+        if sign_latency_distribution not in ("normal", "uniform"):
+            raise ValueError(f"Unsupported distribution: {sign_latency_distribution}")
+        self.simulator = simulator
+        self.num_validators = num_validators
+        self.num_subnets = num_subnets
+        self.signature_size = signature_size
+        self.sign_latency_min_ms = sign_latency_min_ms
+        self.sign_latency_max_ms = sign_latency_max_ms
+        self.sign_latency_distribution = sign_latency_distribution
+        self.redundancy_factor = redundancy_factor
+        self.slot = 0
+        self.rng = np.random.default_rng(random_seed)
+
+        if assignment is not None and (assignment.num_validators, assignment.num_subnets) != (num_validators, num_subnets):
+            raise ValueError("The assignment does not match the number of validators and subnets")
+        self.assignment = assignment
+
+        self.ids = np.arange(first_node_id, first_node_id + num_validators, dtype=np.int32)
+        subnet_dtype = np.int16 if num_subnets <= np.iinfo(np.int16).max else np.int32
+        if assignment is not None:
+            self.subnet_ids = assignment.subnet_of.astype(subnet_dtype)
+            self.roles = assignment.roles.copy()
+        else:
+            # Contiguous, evenly sized blocks of validators per subnet
+            self.subnet_ids = (np.arange(num_validators, dtype=np.int64) * num_subnets // num_validators).astype(subnet_dtype)
+            self.roles = np.full(num_validators, ROLE_VALIDATOR, dtype=np.uint8)
+        self.sign_delays = np.zeros(num_validators, dtype=np.float32)
+        self.next_event_times = np.full(num_validators, np.inf, dtype=np.float64)
+        self.signatures_sent = np.zeros(num_validators, dtype=np.uint32)
+        self.bytes_sent = np.zeros(num_validators, dtype=np.uint64)
+
+        # Aggregators stay full Node objects; validators refer to them by index
+        self.aggregators = []
+        self.aggregator_index = np.zeros((num_validators, redundancy_factor), dtype=np.int32)
+        self._aggregator_offsets = None
+        self._local_sends = None  # Sends to the aggregator seat the validator holds itself
+        self._signatures = None
+        self._slot_messages = 0  # Messages created for the current slot's sends
+
+    def set_aggregators(self, aggregators):
+        """
+        Set the aggregator nodes validators send their signatures to, within their own subnet.
+
+        The aggregators are grouped by subnet: with k aggregators per subnet,
+        subnet s owns aggregators s*k to s*k + k - 1, and the validator of
+        rank r in its subnet is assigned aggregators r, r+1, ... (modulo k)
+        of its subnet, as `DirectTopology` connects them. `rotate_aggregators`
+        permutes that assignment in place.
+
+        Args:
+            aggregators (list[Node]): The subnet aggregator nodes, grouped by subnet.
+        """
+        per_subnet, remainder = divmod(len(aggregators), self.num_subnets)
+        if remainder or not per_subnet:
+            raise ValueError("The number of subnet aggregators must be a multiple of the number of subnets")
+        if self.redundancy_factor > per_subnet:
+            raise ValueError("redundancy_factor cannot exceed the number of subnet aggregators per subnet")
+        self.aggregators = list(aggregators)
+        columns = (self._subnet_ranks()[:, None] + np.arange(self.redundancy_factor)) % per_subnet
+        self._aggregator_offsets = (self.subnet_ids.astype(np.int64)[:, None] * per_subnet + columns).astype(np.int32)
+        self.aggregator_index[:] = self._aggregator_offsets
+        self._update_expected_signatures()
+
+    def _subnet_ranks(self):
+        """
+        Get the position of every validator within its subnet.
+
+        Returns:
+            numpy.ndarray: Rank of each validator among its subnet's validators.
+        """
+        if self.assignment is not None:
+            return self.assignment.subnet_rank
+        members = np.argsort(self.subnet_ids, kind="stable")
+        offsets = np.zeros(self.num_subnets + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.subnet_ids, minlength=self.num_subnets), out=offsets[1:])
+        ranks = np.empty(self.num_validators, dtype=np.int64)
+        ranks[members] = np.arange(self.num_validators) - offsets[self.subnet_ids[members]]
+        return ranks
+
+    def assign_aggregators(self, aggregators, aggregator_index):
+        """
+        Set the aggregator nodes and an explicit validator-to-aggregator assignment.
+
+        Args:
+            aggregators (list[Node]): The aggregator nodes.
+            aggregator_index (numpy.ndarray): Indices into `aggregators` of every
+                validator's aggregators, of shape (num_validators, redundancy_factor).
+        """
+        self.aggregators = list(aggregators)
+        self._aggregator_offsets = np.asarray(aggregator_index, dtype=np.int32).reshape(self.aggregator_index.shape)
+        self.aggregator_index[:] = self._aggregator_offsets
+        self._update_expected_signatures()
+
+    def rotate_aggregators(self, order):
+        """
+        Reassign validators to aggregators according to a permutation, in place.
+
+        Args:
+            order (list[int] | numpy.ndarray): Permutation of aggregator indices, which
+                should only move aggregators within their subnet's group.
+        """
+        np.take(np.asarray(order, dtype=np.int32), self._aggregator_offsets, out=self.aggregator_index)
+        self._update_expected_signatures()
+
+    def follow_assignment(self):
+        """
+        Take the roles of the assignment's current round.
+
+        The aggregator nodes stand for the subnet aggregator seats of the
+        round: aggregator s*k + c is the seat held by validator
+        `assignment.subnet_aggregators[s, c]`. A validator sending to the
+        seat it holds itself hands its signature over without network
+        latency.
+        """
+        assignment = self.assignment
+        if assignment is None:
+            raise ValueError("The population was built without an assignment")
+        if len(self.aggregators) != assignment.subnet_aggregators.size:
+            raise ValueError("There must be one aggregator node per subnet aggregator seat of the assignment")
+        self.roles[:] = assignment.roles
+        if self._local_sends is None:
+            self._local_sends = np.zeros(self.aggregator_index.shape, dtype=bool)
+        seat_holders = assignment.subnet_aggregators.ravel()
+        np.equal(seat_holders[self.aggregator_index], np.arange(self.num_validators)[:, None], out=self._local_sends)
+
+    def _update_expected_signatures(self):
+        """
+        Tell every aggregator how many validators are assigned to it.
+        """
+        counts = np.bincount(self.aggregator_index.ravel(), minlength=len(self.aggregators))
+        for aggregator, count in zip(self.aggregators, counts.tolist()):
+            aggregator.expected_signatures = count
+
+    def set_role(self, indices, role):
+        """
+        Add a role flag to a set of validators.
+
+        Args:
+            indices (array-like): Row indices of the validators.
+            role (int): One of the ROLE_* flags.
+        """
+        self.roles[indices] |= role
+
+    def indices_with_role(self, role):
+        """
+        Get the row indices of all validators holding a role.
+
+        Args:
+            role (int): One of the ROLE_* flags.
+
+        Returns:
+            numpy.ndarray: Row indices of the matching validators.
+        """
+        return np.flatnonzero(self.roles & role)
+
+    def validators_in_subnet(self, subnet_id):
+        """
+        Get the row indices of all validators in a subnet.
+
+        Args:
+            subnet_id (int): The subnet to look up.
+
+        Returns:
+            numpy.ndarray: Row indices of the subnet's validators.
+        """
+        return np.flatnonzero(self.subnet_ids == subnet_id)
+
+    def draw_sign_delays(self):
+        """
+        Draw a sign delay for every validator in one vectorized call.
+
+        The normal distribution is centered between the bounds with 99.7% of
+        the mass inside them, matching `LatencyModel`; draws are clamped to
+        the bounds and truncated to whole milliseconds.
+
+        Returns:
+            numpy.ndarray: The population's sign delays (in ms), updated in place.
+        """
+        low, high = self.sign_latency_min_ms, self.sign_latency_max_ms
+        if self.sign_latency_distribution == "normal":
+            delays = self.rng.normal((low + high) / 2, (high - low) / 6, self.num_validators)
+        else:
+            delays = self.rng.uniform(low, high, self.num_validators)
+        np.trunc(delays, out=delays)
+        np.clip(delays, low, high, out=delays)
+        self.sign_delays[:] = delays
+        return self.sign_delays
+
+    def start_signature_generation(self):
+        """
+        Schedule every validator's signature deliveries for the current slot in bulk.
+
+        Sign delays and network latencies are drawn in one vectorized call
+        each, arrival times at all assigned aggregators are computed as one
+        array, and the resulting delivery events are loaded into the queue
+        with a single `Simulator.schedule_deliveries` call instead of one heap
+        push per validator. Every message is stamped with its validator's
+        sign time, and the sent counters are only updated once that time has
+        passed (see `settle_sends`).
+        """
+        self.settle_sends(np.inf)  # Sends still pending from the previous slot are in the queue already
+        self.slot = self.simulator.current_slot
+        self.draw_sign_delays()
+        np.add(self.sign_delays, self.simulator.current_time, out=self.next_event_times)
+        latencies = self.simulator.latency_model.sample_latencies(self.aggregator_index.shape)
+        if self._local_sends is not None:
+            latencies[self._local_sends] = 0
+        arrival_times = latencies + self.next_event_times[:, None]
+
+        signatures = self._get_signatures()
+        create_message = self.simulator.create_message
+        slot = self.slot
+        redundancy_factor = self.redundancy_factor
+        messages = [create_message(None, signature, slot, redundancy_factor, sign_time)
+                    for signature, sign_time in zip(signatures, self.next_event_times.tolist())]
+        self._slot_messages = len(messages)
+        aggregators = self.aggregators
+        self.simulator.schedule_deliveries(
+            arrival_times.ravel(),
+            [aggregators[index] for index in self.aggregator_index.ravel().tolist()],
+            [message for message in messages for _ in range(redundancy_factor)],
+        )
+
+    def settle_sends(self, until=None):
+        """
+        Count the signatures of bulk-scheduled sends whose sign time has passed.
+
+        `start_signature_generation` schedules every delivery of a slot
+        up front, so the sent counters are brought up to date lazily, by
+        whoever reads them, instead of by one event per validator.
+
+        Args:
+            until (float, optional): Count sends up to this time; np.inf counts every
+                pending send. Defaults to the current time.
+
+        Returns:
+            int: Number of validators whose sends were counted.
+        """
+        until = self.simulator.current_time if until is None else until
+        # Validators with nothing pending have an infinite next event time
+        sent = self.next_event_times <= until if until < np.inf else np.isfinite(self.next_event_times)
+        np.add(self.signatures_sent, self.redundancy_factor, out=self.signatures_sent, where=sent)
+        np.add(self.bytes_sent, self.redundancy_factor * self.signature_size, out=self.bytes_sent, where=sent)
+        self.next_event_times[sent] = np.inf
+        return int(np.count_nonzero(sent))
+
+    def generate_signature(self, index):
+        """
+        Generate a validator's signature and send it to its assigned aggregators.
+
+        Args:
+            index (int): Row index of the validator.
+        """
+        message = self.simulator.create_message(None, self._get_signatures()[index], self.slot,
+                                                self.redundancy_factor)
+        self._slot_messages += 1
+        current_time = self.simulator.current_time
+        latency_model = self.simulator.latency_model
+        for aggregator_idx in self.aggregator_index[index].tolist():
+            aggregator = self.aggregators[aggregator_idx]
+            self.simulator.schedule_delivery(
+                current_time + latency_model.calculate_latency(None, aggregator),
+                aggregator,
+                message,
+            )
+        self.signatures_sent[index] += self.redundancy_factor
+        self.bytes_sent[index] += self.redundancy_factor * self.signature_size
+        self.next_event_times[index] = np.inf
+
+    def _get_signatures(self):
+        """
+        Get the validators' signature payloads, creating them on first use only.
+
+        Returns:
+            list[Signature]: One immutable signature per validator, shared by
+            every message that carries it in every slot.
+        """
+        if self._signatures is None:
+            self._signatures = [Signature(validator_id, self.signature_size) for validator_id in self.ids.tolist()]
+        return self._signatures
+
+    def reset_counters(self):
+        """
+        Zero the per-validator counters in place.
+        """
+        self.signatures_sent.fill(0)
+        self.bytes_sent.fill(0)
+        self.next_event_times.fill(np.inf)
+
+    def memory_usage(self):
+        """
+        Get the memory held by the population's arrays and signature objects.
+
+        Besides the arrays, this counts the `Signature` payloads (created
+        once and kept for the whole run) and the `Message` objects of the
+        current slot's sends, which the event queue holds until they are
+        delivered (and a `MessagePool` then recycles, if the simulator has
+        one). Object sizes are shallow sizes from `sys.getsizeof`.
+
+        Returns:
+            int: Total size of the arrays and objects (in bytes).
+        """
+        arrays = (self.ids, self.subnet_ids, self.roles, self.sign_delays, self.next_event_times,
+                  self.signatures_sent, self.bytes_sent, self.aggregator_index)
+        total = sum(array.nbytes for array in arrays)
+        if self._aggregator_offsets is not None:
+            total += self._aggregator_offsets.nbytes
+        if self._signatures is not None:
+            # Signatures are all alike: the object, its validator id and the list slot
+            signature = self._signatures[-1]
+            total += sys.getsizeof(self._signatures) + len(self._signatures) * (
+                sys.getsizeof(signature) + sys.getsizeof(signature.validator_id))
+        # Each message also holds its own send time and id
+        total += self._slot_messages * (sys.getsizeof(Message(None)) + sys.getsizeof(0.0) + sys.getsizeof(1 << 30))
+        return total
@@ -7,7 +7,43 @@ to global aggregators.
 """
 
 from beamsim.core.node import Node
-from beamsim.core.message import Message
+from beamsim.aggregation.snark import SNARKProof
+from beamsim.aggregation.bitfield import ParticipationBitfield
+
+
+class SignatureSlot:
+    """
+    The signatures a subnet aggregator has collected for one slot.
+    """
+
+    __slots__ = ("slot", "signatures", "participation", "expected", "aggregating")
+
+    def __init__(self, participation_encoding="auto"):
+        """
+        Initialize an empty state holding no slot yet.
+
+        Args:
+            participation_encoding (str): Wire encoding of the participation bitfield.
+        """
+        self.slot = -1
+        self.signatures = []
+        self.participation = ParticipationBitfield(encoding=participation_encoding)
+        self.expected = None  # Signatures expected in this slot; None falls back to connected nodes
+        self.aggregating = False
+
+    def reset(self, slot, expected=None):
+        """
+        Clear the state in place for a new slot.
+
+        Args:
+            slot (int): The slot the state now holds.
+            expected (int, optional): Signatures expected in that slot.
+        """
+        self.slot = slot
+        self.signatures.clear()
+        self.participation.clear()
+        self.expected = expected
+        self.aggregating = False
 
 
 class SubnetAggregator(Node):
@@ -15,7 +51,8 @@ class SubnetAggregator(Node):
     A class representing a subnet aggregator node in the simulation.
     """
 
-    def __init__(self, node_id, simulator, aggregation_rate_per_sec, snark_proof_size, subnet_signature_threshold):
+    def __init__(self, node_id, simulator, aggregation_rate_per_sec, snark_proof_size, subnet_signature_threshold,
+                 participation_encoding="auto"):
         """
         Initialize a subnet aggregator node.
 
@@ -25,12 +62,36 @@ class SubnetAggregator(Node):
             aggregation_rate_per_sec (int): Rate of signature aggregation (signatures per second).
             snark_proof_size (int): Size of the SNARK proof (in bytes).
             subnet_signature_threshold (float): Percentage of signatures required to produce a SNARK proof.
+            participation_encoding (str): Wire encoding of the participation bitfield ("raw", "rle",
+                "roaring" or "auto" for the smallest).
         """
         super().__init__(node_id, simulator)
         self.aggregation_rate_per_sec = aggregation_rate_per_sec
         self.snark_proof_size = snark_proof_size
         self.subnet_signature_threshold = subnet_signature_threshold
-        self.collected_signatures = []
+        self.expected_signatures = None  # Set by the slot driver; falls back to connected nodes
+        # Signatures of the current and the previous slot, whose proof may still be in flight
+        self.slot_states = tuple(SignatureSlot(participation_encoding) for _ in range(self.SLOT_HISTORY))
+
+    def open_slot_state(self, state, slot):
+        """
+        Reuse a signature state for a slot, fixing the number of signatures it expects.
+
+        Args:
+            state (SignatureSlot): The state of the oldest retained slot.
+            slot (int): The newer slot.
+        """
+        state.reset(slot, self.expected_signatures)
+
+    def set_participation_offset(self, offset):
+        """
+        Set the lowest validator id of the participation bitfields.
+
+        Args:
+            offset (int): Lowest validator id this aggregator receives signatures from.
+        """
+        for state in self.slot_states:
+            state.participation.offset = offset & ~7
 
     def receive_message(self, message):
         """
@@ -39,44 +100,66 @@ class SubnetAggregator(Node):
         Args:
             message (Message): The message containing a signature.
         """
-        self.collected_signatures.append(message.payload)
-        if self._should_aggregate():
-            self._aggregate_signatures()
+        state = self.slot_state(message.slot)
+        if state is None:
+            return  # Late signature from a slot that is no longer retained
+        state.signatures.append(message.payload)
+        state.participation.set(message.payload.validator_id)
+        if not state.aggregating and self._should_aggregate(state):
+            self._aggregate_signatures(state)
 
-    def _should_aggregate(self):
+    def _should_aggregate(self, state):
         """
         Check if enough signatures have been collected to produce a SNARK proof.
 
+        Args:
+            state (SignatureSlot): The signatures of the slot.
+
         Returns:
             bool: True if aggregation should occur, False otherwise.
         """
-        required_signatures = int(len(self.get_connected_nodes()) * self.subnet_signature_threshold / 100)
-        return len(self.collected_signatures) >= required_signatures
+        expected = state.expected
+        if expected is None:
+            expected = len(self.get_connected_nodes())
+        required_signatures = int(expected * self.subnet_signature_threshold / 100)
+        return len(state.signatures) >= required_signatures
 
-    def _aggregate_signatures(self):
+    def _aggregate_signatures(self, state):
         """
         Aggregate collected signatures into a SNARK proof and send it to global aggregators.
+
+        Args:
+            state (SignatureSlot): The signatures of the slot.
         """
-        aggregation_time = len(self.collected_signatures) / self.aggregation_rate_per_sec
+        state.aggregating = True
+        aggregation_time = len(state.signatures) / self.aggregation_rate_per_sec * 1000
         self.simulator.schedule_event(
-            event_time=self.simulator.current_time + aggregation_time,
-            event_callback=self._send_snark_proof,
+            self.simulator.current_time + aggregation_time,
+            self._send_snark_proof,
+            state.slot,
         )
 
-    def _send_snark_proof(self):
+    def _send_snark_proof(self, slot):
         """
         Send the SNARK proof to connected global aggregators.
+
+        Args:
+            slot (int): The slot the proof was started for.
         """
-        snark_proof = {
-            "aggregator_id": self.node_id,
-            "proof_size": self.snark_proof_size,
-            "signatures": len(self.collected_signatures),
-        }
-        message = Message(sender=self, payload=snark_proof)
-        for global_aggregator in self.get_connected_nodes():
-            self.simulator.schedule_event(
-                event_time=self.simulator.current_time + self.simulator.latency_model.calculate_latency(self, global_aggregator),
-                event_callback=global_aggregator.receive_message,
-                message=message,
+        state = self.slot_states[slot % self.SLOT_HISTORY]
+        if state.slot != slot:
+            return  # Two newer slots started while the proof was being built
+        snark_proof = SNARKProof(self.node_id, self.snark_proof_size, len(state.signatures),
+                                 participation=state.participation.copy())
+        if self.simulator.progress is not None:
+            self.simulator.progress.cover("subnet", slot, self.simulator.current_time,
+                                          snark_proof.participation, snark_proof.num_signatures)
+        global_aggregators = self.get_connected_nodes()
+        message = self.simulator.create_message(self, snark_proof, slot, len(global_aggregators))
+        for global_aggregator in global_aggregators:
+            self.simulator.schedule_delivery(
+                self.simulator.current_time + self.simulator.latency_model.calculate_latency(self, global_aggregator),
+                global_aggregator,
+                message,
             )
-        self.collected_signatures = []
\ No newline at end of file
+        state.signatures.clear()
@@ -0,0 +1,46 @@
+"""
+Tree Aggregator node implementation for the BEAMSim discrete-event simulation engine.
+
+This module defines the TreeAggregator class, an intermediate node of a
+k-ary aggregation tree, which collects SNARK proofs from its children,
+aggregates them recursively and sends the resulting proof to its parent.
+"""
+
+from beamsim.nodes.global_aggregator import GlobalAggregator
+from beamsim.aggregation.snark import SNARKProof
+
+
+class TreeAggregator(GlobalAggregator):
+    """
+    A class representing an intermediate recursive aggregator in an aggregation tree.
+
+    Proof collection, the threshold check and the recursion time are those
+    of `GlobalAggregator`; only the result differs: a partial proof sent to
+    the connected parent instead of a final proof broadcast to everyone.
+    """
+
+    def _broadcast_final_snark(self, slot):
+        """
+        Send the recursive SNARK proof of the collected child proofs to the parent.
+
+        Args:
+            slot (int): The slot the proof was started for.
+        """
+        state = self._finished_slot_state(slot)
+        if state is None:
+            return  # Two newer slots started while the proof was being built
+        snark_proof = SNARKProof(
+            aggregator_id=self.node_id,
+            proof_size=self.snark_proof_size,
+            num_signatures=sum(proof.num_signatures for proof in state.proofs),
+            participation=self._merge_participation(state),
+        )
+        parents = self.get_connected_nodes()
+        message = self.simulator.create_message(self, snark_proof, slot, len(parents))
+        for parent in parents:
+            self.simulator.schedule_delivery(
+                self.simulator.current_time + self.simulator.latency_model.calculate_latency(self, parent),
+                parent,
+                message,
+            )
+        state.proofs.clear()
@@ -6,7 +6,7 @@ responsible for generating and sending signatures in the network simulation.
 """
 
 from beamsim.core.node import Node
-from beamsim.core.message import Message
+from beamsim.aggregation.signature import Signature
 
 
 class Validator(Node):
@@ -29,17 +29,15 @@ class Validator(Node):
         self.signature_size = signature_size
         self.sign_latency_min_ms = sign_latency_min_ms
         self.sign_latency_max_ms = sign_latency_max_ms
+        # Immutable payload shared by every signature message this validator sends
+        self.signature = Signature(node_id, signature_size)
 
     def generate_signature(self):
         """
         Generate a signature and send it to the assigned aggregators.
         """
-        signature = {
-            "validator_id": self.node_id,
-            "data": "signature_data",  # Placeholder for actual signature data
-            "size": self.signature_size,
-        }
-        message = Message(sender=self, payload=signature)
+        aggregators = self.get_connected_nodes()
+        message = self.simulator.create_message(self, self.signature, self.slot, len(aggregators))
         self.send_to_aggregators(message)
 
     def send_to_aggregators(self, message):
@@ -50,16 +48,28 @@ class Validator(Node):
             message (Message): The message containing the signature.
         """
         for aggregator in self.get_connected_nodes():
-            self.simulator.schedule_event(
-                event_time=self.simulator.current_time + self.simulator.latency_model.calculate_latency(self, aggregator),
-                event_callback=aggregator.receive_message,
-                message=message,
+            self.simulator.schedule_delivery(
+                self.simulator.current_time + self.simulator.latency_model.calculate_latency(self, aggregator),
+                aggregator,
+                message,
             )
 
+    def receive_message(self, message):
+        """
+        Handle a message relayed through the validator.
+
+        Plain validators only forward messages (the topology does that), so
+        nothing is processed here.
+
+        Args:
+            message (Message): The received message.
+        """
+
     def start_signature_generation(self):
         """
         Schedule the signature generation process with random latency.
         """
+        self.slot = self.simulator.current_slot
         latency = self.simulator.random.randint(self.sign_latency_min_ms, self.sign_latency_max_ms)
         self.simulator.schedule_event(
             event_time=self.simulator.current_time + latency,
@@ -7,10 +7,13 @@ GossipSub and Grid topology protocols.
 """
 
 # Import protocol-related classes to make them available directly from beamsim.protocols
-from beamsim.protocols.gossipsub import GossipSub
+from beamsim.protocols.gossipsub import GossipSub, BatchedGossipSub
 from beamsim.protocols.grid_protocol import GridProtocol
+from beamsim.protocols.flood import TickFlood
 
 __all__ = [
     'GossipSub',
+    'BatchedGossipSub',
     'GridProtocol',
+    'TickFlood',
 ]
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+Time-stepped flooding engine for the BEAMSim discrete-event simulation engine.
+
+This module defines the TickFlood class, an alternative to the event queue
+for phases where nearly every node receives and forwards messages every
+millisecond (the gossip flood of signatures in a subnet). Instead of one
+event per delivery, time advances in fixed ticks and each tick delivers,
+deduplicates and forwards everything due in it with array operations over
+all messages and nodes at once. The first receipts the rest of the
+simulation cares about are then handed to the event-driven Simulator.
+"""
+
+import numpy as np
+
+
+class TickFlood:
+    """
+    A class flooding messages over a fixed set of forwarding links in ticks of `tick_ms`.
+
+    Every node forwards a message the first time it receives it to all its
+    links except the sender, with one latency drawn per send from the
+    latency model, exactly as eager push in `BatchedGossipSub` does.
+    Deliveries in flight are kept in one bucket per tick; a tick processes
+    its whole bucket, so arrival times are exact whenever `tick_ms` does not
+    exceed the minimum latency (latencies are whole milliseconds, so the
+    default 1 ms tick is always exact). Empty ticks are skipped.
+
+    State is a (messages x nodes) array of first arrival times, so one flood
+    should cover one topic's messages, not a whole network's.
+    """
+
+    def __init__(self, indptr, indices, latency_model, tick_ms=1):
+        """
+        Initialize the engine.
+
+        Args:
+            indptr (numpy.ndarray): CSR row pointers of the forwarding links.
+            indices (numpy.ndarray): CSR column indices of the forwarding links.
+            latency_model (LatencyModel): Source of the per-send latencies.
+            tick_ms (float): Length of a tick (ms).
+        """
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.num_nodes = len(self.indptr) - 1
+        self.latency_model = latency_model
+        self.tick_ms = tick_ms
+        self.ticks = 0
+
+        self.arrival_times = np.zeros((0, self.num_nodes))
+        self.senders = np.zeros((0, self.num_nodes), dtype=np.int32)
+        self.sizes = np.zeros(0, dtype=np.int64)
+        self.messages_received = np.zeros(self.num_nodes, dtype=np.int64)
+        self.duplicates_received = np.zeros(self.num_nodes, dtype=np.int64)
+        self.bytes_sent = np.zeros(self.num_nodes, dtype=np.int64)
+        self.bytes_received = np.zeros(self.num_nodes, dtype=np.int64)
+        self._buckets = {}
+
+    def run(self, origins, start_times, sizes, until=None):
+        """
+        Flood messages from their origins until no delivery is left in flight.
+
+        Args:
+            origins (numpy.ndarray): Row of the node publishing each message.
+            start_times (numpy.ndarray): Time each message is published (ms).
+            sizes (numpy.ndarray | int): Wire size of each message (in bytes).
+            until (float, optional): Deliveries arriving after this time are dropped.
+
+        Returns:
+            numpy.ndarray: First arrival time of every message at every node
+            (messages x nodes, the publish time at the origin, inf where never reached).
+        """
+        origins = np.asarray(origins, dtype=np.int64)
+        num_messages = len(origins)
+        start_times = np.broadcast_to(np.asarray(start_times, dtype=np.float64), (num_messages,))
+        self.sizes = np.broadcast_to(np.asarray(sizes, dtype=np.int64), (num_messages,)).copy()
+        self.arrival_times = np.full((num_messages, self.num_nodes), np.inf)
+        self.senders = np.full((num_messages, self.num_nodes), -1, dtype=np.int32)
+        self._buckets = {}
+
+        messages = np.arange(num_messages)
+        self.arrival_times[messages, origins] = start_times
+        self._forward(messages, origins, np.full(num_messages, -1), start_times)
+
+        flat_arrivals = self.arrival_times.reshape(-1)
+        flat_senders = self.senders.reshape(-1)
+        while self._buckets:
+            tick = min(self._buckets)
+            chunks = self._buckets.pop(tick)
+            if until is not None and tick * self.tick_ms > until:
+                break
+            self.ticks += 1
+            times, messages, nodes, senders = (np.concatenate(column) for column in zip(*chunks))
+            if until is not None:
+                due = times <= until
+                times, messages, nodes, senders = times[due], messages[due], nodes[due], senders[due]
+            np.add.at(self.bytes_received, nodes, self.sizes[messages])
+
+            # Earliest delivery of every (message, node) pair not seen before this tick
+            order = np.argsort(times, kind="stable")
+            times, messages, nodes, senders = times[order], messages[order], nodes[order], senders[order]
+            keys = messages * self.num_nodes + nodes
+            new = np.isinf(flat_arrivals[keys])
+            _, first = np.unique(keys[new], return_index=True)
+            first = np.flatnonzero(new)[first]
+            is_first = np.zeros(len(keys), dtype=bool)
+            is_first[first] = True
+            np.add.at(self.duplicates_received, nodes[~is_first], 1)
+            np.add.at(self.messages_received, nodes[first], 1)
+            flat_arrivals[keys[first]] = times[first]
+            flat_senders[keys[first]] = senders[first]
+            self._forward(messages[first], nodes[first], senders[first], times[first])
+        self._buckets = {}
+        return self.arrival_times
+
+    def _forward(self, messages, nodes, senders, times):
+        """
+        Send messages from the nodes that just received them to all their links but the sender.
+
+        Args:
+            messages (numpy.ndarray): Message of every forward.
+            nodes (numpy.ndarray): Forwarding node of every forward.
+            senders (numpy.ndarray): Node each message came from (-1 for the origin).
+            times (numpy.ndarray): Time each node forwards (ms).
+        """
+        counts = self.indptr[nodes + 1] - self.indptr[nodes]
+        owners = np.repeat(np.arange(len(nodes)), counts)
+        edges = self.indptr[nodes][owners] + np.arange(len(owners)) - (np.cumsum(counts) - counts)[owners]
+        peers = self.indices[edges]
+        keep = peers != senders[owners]
+        owners, peers = owners[keep], peers[keep]
+        if not len(peers):
+            return
+        np.add.at(self.bytes_sent, nodes[owners], self.sizes[messages[owners]])
+
+        arrival_times = times[owners] + self.latency_model.sample_latencies(len(peers))
+        ticks = np.floor(arrival_times / self.tick_ms).astype(np.int64)
+        order = np.argsort(ticks, kind="stable")
+        ticks, arrival_times, owners, peers = ticks[order], arrival_times[order], owners[order], peers[order]
+        unique_ticks, starts = np.unique(ticks, return_index=True)
+        bounds = np.append(starts, len(ticks))
+        forwarded_messages, forwarders = messages[owners], nodes[owners]
+        for tick, start, end in zip(unique_ticks.tolist(), bounds[:-1].tolist(), bounds[1:].tolist()):
+            self._buckets.setdefault(tick, []).append((
+                arrival_times[start:end], forwarded_messages[start:end], peers[start:end], forwarders[start:end],
+            ))
+
+    def first_receipts(self, rows=None):
+        """
+        List the first receipt of every message at the given nodes, in time order.
+
+        Args:
+            rows (numpy.ndarray, optional): Nodes of interest. Defaults to every node but the origins.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: Arrival time,
+            message index and node of every receipt.
+        """
+        arrivals = self.arrival_times if rows is None else self.arrival_times[:, rows]
+        senders = self.senders if rows is None else self.senders[:, rows]
+        received = np.isfinite(arrivals) & (senders >= 0)
+        messages, columns = np.nonzero(received)
+        nodes = columns if rows is None else np.asarray(rows)[columns]
+        times = arrivals[messages, columns]
+        order = np.argsort(times, kind="stable")
+        return times[order], messages[order], nodes[order]
+
+    def hand_off(self, simulator, recipients, messages, rows=None):
+        """
+        Schedule the first receipts at the given nodes as deliveries in the event-driven simulator.
+
+        Only these deliveries enter the event queue, so the sparse phase that
+        follows (aggregation) runs on the Simulator with the flood already done.
+
+        Args:
+            simulator (Simulator): The simulator continuing the run.
+            recipients (list[Node]): Node object of every row (entries outside `rows` may be None).
+            messages (list[Message]): The Message of every flooded message.
+            rows (numpy.ndarray, optional): Nodes whose receipts are delivered. Defaults to all.
+
+        Returns:
+            int: Number of deliveries scheduled.
+        """
+        times, message_indices, nodes = self.first_receipts(rows)
+        # A pooled message gets one pending delivery per receipt
+        receipts = np.bincount(message_indices, minlength=len(messages))
+        for message, count in zip(messages, receipts.tolist()):
+            if message.pending:
+                message.pending += count
+        simulator.schedule_deliveries(
+            times,
+            [recipients[node] for node in nodes.tolist()],
+            [messages[index] for index in message_indices.tolist()],
+        )
+        return len(times)
@@ -2,18 +2,47 @@
 GossipSub protocol implementation for the BEAMSim discrete-event simulation engine.
 
 This module defines the GossipSub class, which simulates the behavior of the
-GossipSub protocol for message propagation in the network.
+GossipSub protocol for message propagation in the network, and the
+BatchedGossipSub class, which maintains the meshes of all nodes at once.
 """
 
+import collections
+import math
 import random
 
+import numpy as np
+
+# Message kinds packed into message ids; 0 is reserved for empty cache entries
+MESSAGE_KIND_SIGNATURE = 1
+MESSAGE_KIND_SUBNET_PROOF = 2
+MESSAGE_KIND_GLOBAL_PROOF = 3
+
+
+def message_id(kind, slot, origin):
+    """
+    Pack the identity of a message into a fixed-width 32-bit message id.
+
+    The id holds the slot modulo 256 (8 bits), the message kind (2 bits)
+    and the origin's node id (22 bits), which is unique for far longer than
+    a message stays in any cache and takes 4 bytes in memory and on the wire.
+
+    Args:
+        kind (int): One of the MESSAGE_KIND_* constants.
+        slot (int): The slot the message belongs to.
+        origin (int): Node id of the publisher (below 2**22).
+
+    Returns:
+        int: The message id.
+    """
+    return ((slot & 0xFF) << 24) | (kind << 22) | (origin & 0x3FFFFF)
+
 
 class GossipSub:
     """
     A class representing the GossipSub protocol for message propagation.
     """
 
-    def __init__(self, node_id, peers, D, D_low, D_high, heartbeat_interval_ms):
+    def __init__(self, node_id, peers, D, D_low, D_high, heartbeat_interval_ms, send_callback=None):
         """
         Initialize the GossipSub protocol.
 
@@ -24,6 +53,8 @@ class GossipSub:
             D_low (int): Minimum number of peers in the mesh.
             D_high (int): Maximum number of peers in the mesh.
             heartbeat_interval_ms (int): Interval between heartbeat events (ms).
+            send_callback (callable, optional): Called as send_callback(peer, message_id, message)
+                to hand a message to the network.
         """
         self.node_id = node_id
         self.peers = peers
@@ -34,6 +65,7 @@ class GossipSub:
         self.mesh = set()
         self.fanout = {}
         self.messages = set()
+        self.send_callback = send_callback
 
     def join_mesh(self):
         """
@@ -63,8 +95,8 @@ class GossipSub:
             message_id (str): Unique identifier for the message.
             message (str): The content of the message.
         """
-        # Placeholder for actual message sending logic
-        print(f"Node {self.node_id} sent message {message_id} to peer {peer}")
+        if self.send_callback is not None:
+            self.send_callback(peer, message_id, message)
 
     def heartbeat(self):
         """
@@ -78,4 +110,635 @@ class GossipSub:
         if len(self.mesh) > self.D_high:
             excess_peers = len(self.mesh) - self.D_high
             for _ in range(excess_peers):
-                self.mesh.pop()
\ No newline at end of file
+                self.mesh.pop()
+
+class BatchedGossipSub:
+    """
+    A class maintaining the GossipSub meshes of every node with array operations.
+
+    Candidate peers are stored as one CSR adjacency (`indptr`, `indices`)
+    over node positions, and mesh and fanout membership as boolean arrays
+    over its edges. A single self-rescheduling heartbeat event per interval
+    performs GRAFT/PRUNE for all nodes against D_low/D_high and expires
+    fanout peers, instead of one event and one `random.sample` per node.
+
+    Published messages are pushed eagerly along the meshes. Which nodes have
+    seen a message is kept in one boolean row per message id for `seen_ttl`,
+    apart from the ids each node keeps for gossip in a fixed-size ring
+    buffer of 32-bit message ids (the mcache), split into heartbeat windows.
+    With lazy gossip enabled, each heartbeat also sends IHAVE advertisements
+    of the last `history_gossip` windows to `D_lazy` non-mesh peers, which
+    pull the messages they miss with IWANT.
+    """
+
+    def __init__(self, simulator, indptr, indices, D, D_low, D_high, heartbeat_interval_ms,
+                 fanout_ttl_seconds=60, control_message_size=64, random_seed=42, lazy_gossip=True,
+                 D_lazy=6, history_length=5, history_gossip=3, mcache_capacity=256,
+                 seen_ttl_seconds=120, message_id_size=4, gossip_overhead=16, deliver_callback=None, members=None):
+        """
+        Initialize the batched GossipSub meshes.
+
+        Args:
+            simulator: The simulator instance managing the simulation.
+            indptr (numpy.ndarray): CSR row pointers of the candidate peers, one row per node.
+            indices (numpy.ndarray): CSR column indices (peer positions); rows must be sorted.
+            D (int): Target number of peers in the mesh.
+            D_low (int): Minimum number of peers in the mesh.
+            D_high (int): Maximum number of peers in the mesh.
+            heartbeat_interval_ms (int): Interval between heartbeat events (ms).
+            fanout_ttl_seconds (float): Time-to-live of fanout peers after the last publish.
+            control_message_size (int): Wire size of a GRAFT or PRUNE message (in bytes).
+            random_seed (int): Seed for peer selection.
+            lazy_gossip (bool): Whether heartbeats send IHAVE advertisements.
+            D_lazy (int): Number of non-mesh peers receiving IHAVE per heartbeat.
+            history_length (int): Number of heartbeat windows kept in the mcache.
+            history_gossip (int): Number of recent windows advertised in IHAVE.
+            mcache_capacity (int): Message ids kept per node for IHAVE; older ids are overwritten.
+            seen_ttl_seconds (float): Time a message id is remembered for duplicate detection,
+                at least `history_length` heartbeats.
+            message_id_size (int): Wire size of a message id (in bytes).
+            gossip_overhead (int): Wire size of an IHAVE or IWANT message without its ids (in bytes).
+            deliver_callback (callable, optional): Called as `deliver_callback(member, message)`
+                the first time a node receives a message, with the node's entry in `members`.
+            members (numpy.ndarray, optional): Shared position of each row's node when the
+                meshes cover a subset of the nodes (one topic); defaults to the row number.
+        """
+        self.simulator = simulator
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.num_nodes = len(self.indptr) - 1
+        self.members = (np.arange(self.num_nodes, dtype=np.int32) if members is None
+                        else np.asarray(members, dtype=np.int32))
+        self.D = D
+        self.D_low = D_low
+        self.D_high = D_high
+        self.heartbeat_interval_ms = heartbeat_interval_ms
+        self.fanout_ttl_ms = fanout_ttl_seconds * 1000
+        self.control_message_size = control_message_size
+        self.rng = np.random.default_rng(random_seed)
+        self.joined = False
+        self.running = False
+        self.until = None
+        self.scheduled = False
+        # Deliveries scheduled but not yet received
+        self.in_flight = 0
+
+        # Source node of every edge, and the index of its reverse edge (-1 if missing)
+        self.edge_sources = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+        keys = self.edge_sources.astype(np.int64) * self.num_nodes + self.indices
+        reverse_keys = self.indices.astype(np.int64) * self.num_nodes + self.edge_sources
+        if len(keys):
+            reverse = np.minimum(np.searchsorted(keys, reverse_keys), len(keys) - 1)
+            self.reverse_edges = np.where(keys[reverse] == reverse_keys, reverse, -1)
+        else:
+            self.reverse_edges = np.zeros(0, dtype=np.int64)
+
+        self.subscribed = np.ones(self.num_nodes, dtype=bool)
+        self.in_mesh = np.zeros(len(self.indices), dtype=bool)
+        self.in_fanout = np.zeros(len(self.indices), dtype=bool)
+        self.fanout_expiry = np.full(self.num_nodes, np.inf)
+
+        self.heartbeats = 0
+        self.grafts_sent = np.zeros(self.num_nodes, dtype=np.int64)
+        self.prunes_sent = np.zeros(self.num_nodes, dtype=np.int64)
+        self.control_bytes_sent = np.zeros(self.num_nodes, dtype=np.int64)
+        self.control_bytes_received = np.zeros(self.num_nodes, dtype=np.int64)
+
+        self.lazy_gossip = lazy_gossip
+        self.D_lazy = D_lazy
+        self.history_length = history_length
+        self.history_gossip = history_gossip
+        self.mcache_capacity = mcache_capacity
+        self.message_id_size = message_id_size
+        self.gossip_overhead = gossip_overhead
+        self.deliver_callback = deliver_callback
+
+        # Message ids kept for gossip per node; window w of the history starts at
+        # write number window_starts[node, w], and the current window is `_window`
+        self.mcache = np.zeros((self.num_nodes, mcache_capacity), dtype=np.uint32)
+        self.mcache_writes = np.zeros(self.num_nodes, dtype=np.int64)
+        self.window_starts = np.zeros((self.num_nodes, history_length), dtype=np.int64)
+        self._window = 0
+        # Content of the messages still in some mcache window, by message id
+        self.messages = {}
+        self._published = collections.deque()
+        # Nodes that have seen each message id, forgotten after `seen_ttl` heartbeats
+        self.seen_ttl = max(history_length, math.ceil(seen_ttl_seconds * 1000 / heartbeat_interval_ms))
+        self.seen = {}
+        self._seen_order = collections.deque()
+
+        self.messages_received = np.zeros(self.num_nodes, dtype=np.int64)
+        self.duplicates_received = np.zeros(self.num_nodes, dtype=np.int64)
+        self.bytes_sent = np.zeros(self.num_nodes, dtype=np.int64)
+        self.bytes_received = np.zeros(self.num_nodes, dtype=np.int64)
+        self.ihave_sent = np.zeros(self.num_nodes, dtype=np.int64)
+        self.iwant_sent = np.zeros(self.num_nodes, dtype=np.int64)
+        self.gossip_bytes_sent = np.zeros(self.num_nodes, dtype=np.int64)
+
+    @classmethod
+    def from_connections(cls, simulator, node_ids, node_connections, **kwargs):
+        """
+        Build the candidate-peer CSR from a topology's connection sets.
+
+        Args:
+            simulator: The simulator instance managing the simulation.
+            node_ids (list[int]): Node ids in position order.
+            node_connections (dict): Maps node_id to a set of connected node_ids.
+            **kwargs: Remaining BatchedGossipSub parameters (D, D_low, D_high, ...).
+
+        Returns:
+            BatchedGossipSub: The batched meshes, with node i at position i of node_ids.
+        """
+        position = {node_id: index for index, node_id in enumerate(node_ids)}
+        rows = [sorted(position[peer] for peer in node_connections.get(node_id, ()) if peer in position)
+                for node_id in node_ids]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=indptr[1:])
+        indices = np.fromiter((peer for row in rows for peer in row), dtype=np.int32, count=int(indptr[-1]))
+        return cls(simulator, indptr, indices, **kwargs)
+
+    def mesh_degrees(self):
+        """
+        Get the mesh size of every node.
+
+        Returns:
+            numpy.ndarray: Number of mesh peers per node.
+        """
+        return np.bincount(self.edge_sources[self.in_mesh], minlength=self.num_nodes)
+
+    def mesh_peers(self, node):
+        """
+        Get the mesh peers of a node.
+
+        Args:
+            node (int): Position of the node.
+
+        Returns:
+            numpy.ndarray: Positions of the node's mesh peers.
+        """
+        start, end = self.indptr[node], self.indptr[node + 1]
+        return self.indices[start:end][self.in_mesh[start:end]]
+
+    def join(self):
+        """
+        Form the initial meshes with one GRAFT round.
+        """
+        self.joined = True
+        self._maintain_meshes()
+
+    def start(self, until=None):
+        """
+        Join the meshes (if not joined yet) and schedule the periodic heartbeat.
+
+        The heartbeat stops rescheduling itself after `until`, or once the
+        meshes have no pending gossip work (no message in flight or in an
+        mcache window); the next publish starts it again.
+
+        Args:
+            until (int, optional): Last time a heartbeat may run (ms).
+        """
+        self.running = True
+        self.until = until
+        if not self.joined:
+            self.join()
+        if not self.scheduled:
+            self._schedule_next()
+
+    def stop(self):
+        """Stop scheduling heartbeats."""
+        self.running = False
+
+    def publish_fanout(self, node):
+        """
+        Get the fanout peers a node publishes to on a topic it is not subscribed to.
+
+        Fanout peers are selected on first use and kept until `fanout_ttl_seconds`
+        pass without a publish.
+
+        Args:
+            node (int): Position of the publishing node.
+
+        Returns:
+            numpy.ndarray: Positions of the node's fanout peers.
+        """
+        start, end = self.indptr[node], self.indptr[node + 1]
+        fanout = self.in_fanout[start:end]
+        if self.fanout_expiry[node] <= self.simulator.current_time:
+            fanout[:] = False  # Expired while the heartbeat was idle
+        if not fanout.any():
+            candidates = np.flatnonzero(self.subscribed[self.indices[start:end]])
+            chosen = self.rng.permutation(candidates)[:self.D]
+            fanout[chosen] = True
+        self.fanout_expiry[node] = self.simulator.current_time + self.fanout_ttl_ms
+        return self.indices[start:end][fanout]
+
+    def publish(self, node, message_id, message, size):
+        """
+        Publish a message from a node to its mesh peers (or fanout peers if not subscribed).
+
+        Args:
+            node (int): Position of the publishing node.
+            message_id (int): The message's id, see `message_id`.
+            message (Message): The message delivered to every node; the meshes take
+                over one pending delivery of a pooled message (see `_hold`).
+            size (int): Wire size of the message (in bytes).
+        """
+        self._hold(message_id, message, size)
+        self._seen_by(message_id)[node] = True
+        self._remember(node, message_id)
+        peers = self.mesh_peers(node) if self.subscribed[node] else self.publish_fanout(node)
+        self._forward(node, message_id, size, peers)
+        self._wake()
+
+    def flood_links(self):
+        """
+        Get the mesh links as a CSR adjacency, for flooding with `TickFlood`.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: CSR row pointers and column indices of the mesh.
+        """
+        indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(self.mesh_degrees(), out=indptr[1:])
+        return indptr, self.indices[self.in_mesh]
+
+    def record_flood(self, flood, message_ids, messages):
+        """
+        Account for messages flooded outside the event queue by a `TickFlood` over `flood_links`.
+
+        Traffic counters are added up, the flooded nodes are marked as having
+        seen each message, and every node's mcache gets the ids it received in
+        arrival order, so lazy gossip and duplicate detection continue from
+        the flooded state.
+
+        Args:
+            flood (TickFlood): The finished flood.
+            message_ids (numpy.ndarray): Id of every flooded message.
+            messages (list[Message]): The flooded messages, held like published ones.
+        """
+        message_ids = np.asarray(message_ids, dtype=np.uint32)
+        reached = np.isfinite(flood.arrival_times)
+        for index, (message_id, message, size) in enumerate(zip(message_ids.tolist(), messages,
+                                                                 flood.sizes.tolist())):
+            self._hold(message_id, message, size)
+            self._seen_by(message_id)[reached[index]] = True
+        self.messages_received += flood.messages_received
+        self.duplicates_received += flood.duplicates_received
+        self.bytes_sent += flood.bytes_sent
+        self.bytes_received += flood.bytes_received
+
+        flooded, nodes = np.nonzero(reached)
+        order = np.lexsort((flood.arrival_times[flooded, nodes], nodes))
+        flooded, nodes = flooded[order], nodes[order]
+        counts = np.bincount(nodes, minlength=self.num_nodes)
+        ranks = np.arange(len(nodes)) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.mcache[nodes, (self.mcache_writes[nodes] + ranks) % self.mcache_capacity] = message_ids[flooded]
+        self.mcache_writes += counts
+        self._wake()
+
+    def _hold(self, message_id, message, size):
+        """
+        Keep a message's content for delivery until it expires from the mcache windows.
+
+        The meshes take over one pending delivery of the message and drop it
+        when the message expires (or `forget_messages` is called), so a
+        pooled message is recycled once nothing can deliver it any more. A
+        message id already held keeps its first message.
+
+        Args:
+            message_id (int): The message's id.
+            message (Message): The message.
+            size (int): Wire size of the message (in bytes).
+        """
+        if message_id in self.messages:
+            self.simulator.release_message(message)
+            return
+        self.messages[message_id] = (message, size)
+        self._published.append((self.heartbeats, message_id))
+
+    def forget_messages(self):
+        """
+        Drop every held message, e.g. when the meshes are replaced.
+
+        Deliveries still in flight are dropped on arrival.
+        """
+        for message, _ in self.messages.values():
+            self.simulator.release_message(message)
+        self.messages.clear()
+        self._published.clear()
+
+    def has_seen(self, node, message_id):
+        """
+        Check whether a node has seen a message id within the last `seen_ttl` heartbeats.
+
+        Args:
+            node (int): Position of the node.
+            message_id (int): The message's id.
+
+        Returns:
+            bool: True if the node has received or published the message.
+        """
+        seen = self.seen.get(message_id)
+        return seen is not None and bool(seen[node])
+
+    def _seen_by(self, message_id):
+        """
+        Get the nodes that have seen a message id, starting its seen TTL if it is new.
+
+        Args:
+            message_id (int): The message's id.
+
+        Returns:
+            numpy.ndarray: Boolean row over the nodes, updated in place.
+        """
+        seen = self.seen.get(message_id)
+        if seen is None:
+            seen = self.seen[message_id] = np.zeros(self.num_nodes, dtype=bool)
+            self._seen_order.append((self.heartbeats, message_id))
+        return seen
+
+    def _remember(self, node, message_id):
+        """
+        Append a message id to a node's mcache ring, overwriting the oldest id when full.
+
+        Args:
+            node (int): Position of the node.
+            message_id (int): The message's id.
+        """
+        writes = self.mcache_writes[node]
+        self.mcache[node, writes % self.mcache_capacity] = message_id
+        self.mcache_writes[node] = writes + 1
+
+    def _forward(self, node, message_id, size, peers):
+        """
+        Send a message from a node to a set of peers.
+
+        Args:
+            node (int): Position of the sending node.
+            message_id (int): The message's id.
+            size (int): Wire size of the message (in bytes).
+            peers (numpy.ndarray): Positions of the receiving peers.
+        """
+        if not len(peers):
+            return
+        arrival_times = self.simulator.latency_model.sample_latencies(len(peers))
+        arrival_times += self.simulator.current_time
+        schedule_event = self.simulator.schedule_event
+        receive = self._receive
+        for peer, arrival_time in zip(peers.tolist(), arrival_times.tolist()):
+            schedule_event(arrival_time, receive, peer, message_id, node)
+        self.in_flight += len(peers)
+        self.bytes_sent[node] += size * len(peers)
+
+    def _receive(self, node, message_id, sender):
+        """
+        Receive a message: drop duplicates, otherwise deliver it and forward it along the mesh.
+
+        Args:
+            node (int): Position of the receiving node.
+            message_id (int): The message's id.
+            sender (int): Position of the peer the message came from.
+        """
+        self.in_flight -= 1
+        entry = self.messages.get(message_id)
+        if entry is None:
+            return  # Expired from every mcache while in flight
+        message, size = entry
+        self.bytes_received[node] += size
+        seen = self._seen_by(message_id)
+        if seen[node]:
+            self.duplicates_received[node] += 1
+            return
+        seen[node] = True
+        self.messages_received[node] += 1
+        self._remember(node, message_id)
+        if self.deliver_callback is not None:
+            self.deliver_callback(int(self.members[node]), message)
+        peers = self.mesh_peers(node)
+        self._forward(node, message_id, size, peers[peers != sender])
+
+    def _schedule_next(self):
+        """
+        Schedule the next heartbeat.
+        """
+        next_time = self.simulator.current_time + self.heartbeat_interval_ms
+        if self.until is None or next_time <= self.until:
+            self.simulator.schedule_event(next_time, self._heartbeat)
+            self.scheduled = True
+
+    def _wake(self):
+        """
+        Schedule the next heartbeat if it stopped for lack of gossip work.
+        """
+        if self.running and not self.scheduled:
+            self._schedule_next()
+
+    def has_pending_work(self):
+        """
+        Check whether the heartbeat still has gossip work to do.
+
+        Returns:
+            bool: True while a message is in flight or still in an mcache window.
+        """
+        return self.in_flight > 0 or bool(self.messages)
+
+    def _heartbeat(self):
+        """
+        Maintain every node's mesh and fanout in one batched step.
+        """
+        self.scheduled = False
+        if not self.running:
+            return
+        self._maintain_meshes()
+        if self.lazy_gossip:
+            self._emit_gossip()
+        self._shift_history()
+        if self.has_pending_work():
+            self._schedule_next()
+
+    def _maintain_meshes(self):
+        """
+        GRAFT under-full meshes, PRUNE over-full ones and expire fanout peers.
+        """
+        self.heartbeats += 1
+        sources = self.edge_sources
+        degree = self.mesh_degrees()
+        peer_subscribed = self.subscribed[self.indices] & self.subscribed[sources]
+
+        need = np.where(degree < self.D_low, self.D - degree, 0)
+        graft = self._select_per_node(~self.in_mesh & peer_subscribed & (need[sources] > 0), need)
+        excess = np.where(degree > self.D_high, degree - self.D, 0)
+        prune = self._select_per_node(self.in_mesh & (excess[sources] > 0), excess)
+
+        # Mesh links are symmetric: the peer adds or removes the reverse edge too
+        self._set_links(graft, True)
+        self._set_links(prune, False)
+
+        expired = self.fanout_expiry <= self.simulator.current_time
+        if expired.any():
+            self.in_fanout[expired[sources]] = False
+            self.fanout_expiry[expired] = np.inf
+
+        self._account_control(graft, self.grafts_sent)
+        self._account_control(prune, self.prunes_sent)
+
+    def _emit_gossip(self):
+        """
+        Send IHAVE to random non-mesh peers of every node and schedule the IWANT pulls.
+
+        Only the gossiped windows of the mcache are read. Advertised ids are
+        expanded into one (peer, id) array, checked against the seen row of
+        each distinct id, and each missing message is requested once per
+        peer. A pulled message arrives after the IHAVE, IWANT and message
+        latencies.
+        """
+        num_nodes = self.num_nodes
+        capacity = self.mcache_capacity
+        writes = self.mcache_writes
+        oldest = self.window_starts[:, (self._window - self.history_gossip + 1) % self.history_length]
+        start = np.maximum(oldest, writes - capacity)
+        counts = writes - start
+
+        sources = self.edge_sources
+        candidates = (~self.in_mesh & self.subscribed[self.indices] & self.subscribed[sources]
+                      & (counts[sources] > 0))
+        edges = self._select_per_node(candidates, np.full(num_nodes, self.D_lazy))
+        if not len(edges):
+            return
+        senders = sources[edges]
+        peers = self.indices[edges]
+        advertised = counts[senders]
+
+        # One row per advertised id: the IHAVE it belongs to and the id itself
+        edge_of = np.repeat(np.arange(len(edges)), advertised)
+        offsets = np.arange(len(edge_of)) - np.repeat(np.cumsum(advertised) - advertised, advertised)
+        origin = senders[edge_of]
+        ids = self.mcache[origin, (start[origin] + offsets) % capacity]
+
+        # Look every advertised (peer, id) up in the id's seen row, one row per distinct id
+        wanted_by = peers[edge_of]
+        held = np.ones(len(ids), dtype=bool)  # Ids no longer seen by anyone cannot be served
+        distinct, inverse = np.unique(ids, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(distinct)))[:-1]
+        for message_id, rows in zip(distinct.tolist(), np.split(order, bounds)):
+            seen = self.seen.get(message_id)
+            if seen is not None:
+                held[rows] = seen[wanted_by[rows]]
+        missing = np.flatnonzero(~held)
+        wanted = (wanted_by.astype(np.uint64) << np.uint64(32)) | ids.astype(np.uint64)
+        _, first = np.unique(wanted[missing], return_index=True)
+        requests = missing[np.sort(first)]
+
+        ihave_bytes = self.gossip_overhead + self.message_id_size * advertised
+        requested = np.bincount(edge_of[requests], minlength=len(edges))
+        iwant = requested > 0
+        iwant_bytes = self.gossip_overhead + self.message_id_size * requested[iwant]
+        self._account_gossip(senders, peers, ihave_bytes, self.ihave_sent)
+        self._account_gossip(peers[iwant], senders[iwant], iwant_bytes, self.iwant_sent)
+        if not len(requests):
+            return
+
+        latencies = self.simulator.latency_model.sample_latencies((2, len(edges)))
+        round_trip = latencies[0] + latencies[1]
+        request_edges = edge_of[requests]
+        arrival_times = self.simulator.latency_model.sample_latencies(len(requests))
+        arrival_times += self.simulator.current_time + round_trip[request_edges]
+
+        times, kwargs = [], []
+        messages = self.messages
+        for arrival_time, responder, requester, requested_id in zip(
+                arrival_times.tolist(), senders[request_edges].tolist(), peers[request_edges].tolist(),
+                ids[requests].tolist()):
+            entry = messages.get(requested_id)
+            if entry is None:
+                continue
+            self.bytes_sent[responder] += entry[1]
+            times.append(arrival_time)
+            kwargs.append({"node": requester, "message_id": requested_id, "sender": responder})
+        self.simulator.schedule_events(times, [self._receive] * len(kwargs), kwargs)
+        self.in_flight += len(kwargs)
+
+    def _shift_history(self):
+        """
+        Start a new mcache window, forget messages older than `history_length` windows
+        and message ids seen more than `seen_ttl` heartbeats ago.
+        """
+        self._window = (self._window + 1) % self.history_length
+        self.window_starts[:, self._window] = self.mcache_writes
+        expired = self.heartbeats - self.history_length
+        published = self._published
+        while published and published[0][0] <= expired:
+            message, _ = self.messages.pop(published.popleft()[1])
+            self.simulator.release_message(message)
+        expired = self.heartbeats - self.seen_ttl
+        seen_order = self._seen_order
+        while seen_order and seen_order[0][0] <= expired:
+            self.seen.pop(seen_order.popleft()[1], None)
+
+    def _account_gossip(self, senders, receivers, sizes, counter):
+        """
+        Charge IHAVE or IWANT messages to the control bandwidth of both ends.
+
+        Args:
+            senders (numpy.ndarray): Position of the sender of each message.
+            receivers (numpy.ndarray): Position of the receiver of each message.
+            sizes (numpy.ndarray): Wire size of each message (in bytes).
+            counter (numpy.ndarray): Per-node counter of the message type.
+        """
+        if not len(senders):
+            return
+        counter += np.bincount(senders, minlength=self.num_nodes)
+        sent = np.bincount(senders, weights=sizes, minlength=self.num_nodes).astype(np.int64)
+        self.gossip_bytes_sent += sent
+        self.control_bytes_sent += sent
+        self.control_bytes_received += np.bincount(receivers, weights=sizes,
+                                                   minlength=self.num_nodes).astype(np.int64)
+
+    def _select_per_node(self, candidates, quota):
+        """
+        Pick random candidate edges, at most `quota[node]` per source node.
+
+        Args:
+            candidates (numpy.ndarray): Boolean mask over edges.
+            quota (numpy.ndarray): Maximum number of edges to pick per node.
+
+        Returns:
+            numpy.ndarray: Indices of the selected edges.
+        """
+        edges = np.flatnonzero(candidates)
+        if not len(edges):
+            return edges
+        sources = self.edge_sources[edges]
+        edges = edges[np.lexsort((self.rng.random(len(edges)), sources))]
+        sources = self.edge_sources[edges]
+        run_starts = np.flatnonzero(np.r_[True, sources[1:] != sources[:-1]])
+        rank = np.arange(len(edges)) - np.repeat(run_starts, np.diff(np.r_[run_starts, len(edges)]))
+        return edges[rank < quota[sources]]
+
+    def _set_links(self, edges, value):
+        """
+        Add or remove mesh links on both ends.
+
+        Args:
+            edges (numpy.ndarray): Indices of the edges to update.
+            value (bool): True to GRAFT, False to PRUNE.
+        """
+        self.in_mesh[edges] = value
+        reverse = self.reverse_edges[edges]
+        self.in_mesh[reverse[reverse >= 0]] = value
+
+    def _account_control(self, edges, counter):
+        """
+        Charge one control message per edge to its sender and receiver.
+
+        Args:
+            edges (numpy.ndarray): Indices of the edges a control message was sent on.
+            counter (numpy.ndarray): Per-node counter of the control message type.
+        """
+        if not len(edges):
+            return
+        sent = np.bincount(self.edge_sources[edges], minlength=self.num_nodes)
+        counter += sent
+        self.control_bytes_sent += sent * self.control_message_size
+        self.control_bytes_received += np.bincount(self.indices[edges], minlength=self.num_nodes) \
+            * self.control_message_size
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Allocations per delivered message for the different delivery paths.
+
+This script schedules the same number of signature deliveries through the
+closure-based path `Node.send_message` used before, the keyword-argument
+callback path, and the typed delivery path with shared `Signature`
+payloads (with and without a warm `MessagePool`). It reports the memory
+blocks and bytes held per in-flight delivery and the time to schedule and
+deliver them.
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from beamsim.aggregation.signature import Signature
+from beamsim.core import Message, MessagePool, Node, Simulator
+
+
+class SinkNode(Node):
+    """
+    A node that counts the messages it receives.
+    """
+
+    def __init__(self, node_id, simulator):
+        """
+        Initialize the sink node.
+
+        Args:
+            node_id (int): Unique identifier for the node.
+            simulator (Simulator): Reference to the simulation engine.
+        """
+        super().__init__(node_id, simulator)
+        self.received = 0
+
+    def receive_message(self, message):
+        """
+        Count an incoming message.
+
+        Args:
+            message (Message): The received message.
+        """
+        self.received += 1
+
+
+def send_closure(simulator, sender, recipient, index, signatures):
+    """Send a new dict payload through a per-send closure (the previous Node.send_message)."""
+    payload = {"validator_id": index, "slot": 0, "data": "signature_data", "size": 3072}
+    message = Message(sender, payload=payload)
+
+    def deliver_message():
+        recipient.receive_message(message)
+    simulator.schedule_event(simulator.current_time + 10, deliver_message)
+
+
+def send_kwargs(simulator, sender, recipient, index, signatures):
+    """Send a new dict payload through a bound-method callback with keyword arguments."""
+    payload = {"validator_id": index, "slot": 0, "data": "signature_data", "size": 3072}
+    message = Message(sender, payload=payload)
+    simulator.schedule_event(
+        event_time=simulator.current_time + 10,
+        event_callback=recipient.receive_message,
+        message=message,
+    )
+
+
+def send_typed(simulator, sender, recipient, index, signatures):
+    """Send a shared Signature payload through a typed delivery entry."""
+    message = simulator.create_message(sender, signatures[index], 0)
+    simulator.schedule_delivery(simulator.current_time + 10, recipient, message)
+
+
+def measure(send, num_messages, pooled):
+    """
+    Measure one delivery path.
+
+    Args:
+        send (callable): Function scheduling one delivery.
+        num_messages (int): Number of deliveries to schedule.
+        pooled (bool): Whether the simulator uses a (pre-warmed) message pool.
+
+    Returns:
+        tuple[float, float, float]: Blocks and bytes held per in-flight
+        delivery, and wall time per delivery (in microseconds).
+    """
+    simulator = Simulator(message_pool=MessagePool() if pooled else None)
+    sender, recipient = SinkNode(0, simulator), SinkNode(1, simulator)
+    signatures = [Signature(index, 3072) for index in range(num_messages)]
+    if pooled:
+        # Warm the pool with one round so the measured round reuses its messages
+        for index in range(num_messages):
+            send(simulator, sender, recipient, index, signatures)
+        simulator.run()
+
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    start_time = time.perf_counter()
+    for index in range(num_messages):
+        send(simulator, sender, recipient, index, signatures)
+    blocks = sys.getallocatedblocks() - blocks_before
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    simulator.run()
+    elapsed_time = time.perf_counter() - start_time
+    return blocks / num_messages, memory / num_messages, elapsed_time / num_messages * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report allocations per delivered message")
+    parser.add_argument("--messages", type=int, default=100000, help="Number of deliveries")
+    args = parser.parse_args()
+
+    paths = (
+        ("closure (before)", send_closure, False),
+        ("kwargs callback", send_kwargs, False),
+        ("typed delivery", send_typed, False),
+        ("typed + pool", send_typed, True),
+    )
+    print(f"{'path':>18} {'blocks/msg':>11} {'bytes/msg':>10} {'us/msg':>8}")
+    for name, send, pooled in paths:
+        blocks, memory, micros = measure(send, args.messages, pooled)
+        print(f"{name:>18} {blocks:>11.2f} {memory:>10.1f} {micros:>8.2f}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Size check of the participation bitfield encodings.
+
+This script marks sparse validator ids far above the bitfield's offset,
+so the bitfield starts with a long run of zero bytes, and compares the
+raw, RLE and roaring sizes (and the "auto" choice) with sizes computed
+independently from the marked ids. The raw encoding must only span the
+bytes between the first and the last marked validator.
+"""
+
+import argparse
+
+import numpy as np
+
+from beamsim.aggregation.bitfield import ParticipationBitfield, varint_sizes, ENCODINGS
+
+HEADER_SIZE = 8
+
+
+def expected_sizes(validator_ids, offset):
+    """
+    Compute the encoded sizes of a set of validator ids from scratch.
+
+    Args:
+        validator_ids (numpy.ndarray): Sorted, distinct marked validator ids.
+        offset (int): Byte-aligned offset of the bitfield.
+
+    Returns:
+        dict[str, int]: Encoded size (in bytes) per encoding.
+    """
+    bits = validator_ids - offset
+    raw = HEADER_SIZE + int(bits[-1] // 8 - bits[0] // 8 + 1)
+
+    # Zero run before every marked id that does not follow another one, then a run of ones
+    starts = np.flatnonzero(np.diff(bits, prepend=-2) != 1)
+    ends = np.append(starts[1:], len(bits))
+    zero_runs = bits[starts] - np.concatenate(([0], bits[ends[:-1] - 1] + 1))
+    runs = np.column_stack((zero_runs, ends - starts)).ravel()
+    rle = HEADER_SIZE + 1 + int(varint_sizes(runs).sum())
+
+    roaring = HEADER_SIZE
+    for key in np.unique(bits >> 16).tolist():
+        members = bits[(bits >> 16) == key]
+        num_runs = int((np.diff(members) != 1).sum()) + 1
+        roaring += 4 + min(2 * len(members) if len(members) <= 4096 else 8192, 2 + 4 * num_runs, 8192)
+    return {"raw": raw, "rle": rle, "roaring": roaring}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the bitfield encodings on sparse bitfields")
+    parser.add_argument("--first-id", type=int, default=1_000_000, help="Lowest marked validator id")
+    parser.add_argument("--span", type=int, default=65536, help="Validator ids the marked ids are drawn from")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'marked':>8} {'leading zero B':>15} {'raw':>7} {'rle':>7} {'roaring':>8} {'auto':>7}  check")
+    failures = 0
+    for density in (0.0005, 0.005, 0.05, 0.5):
+        count = max(1, int(args.span * density))
+        validator_ids = np.sort(rng.choice(args.span, count, replace=False)) + args.first_id
+        bitfield = ParticipationBitfield(offset=0)
+        for validator_id in validator_ids.tolist():
+            bitfield.set(validator_id)
+
+        expected = expected_sizes(validator_ids, bitfield.offset)
+        sizes = {name: bitfield.encoded_size(name) for name in ENCODINGS}
+        leading = (int(validator_ids[0]) - bitfield.offset) // 8
+        ok = sizes == expected and bitfield.encoded_size("auto") == min(sizes.values())
+        failures += not ok
+        print(f"{count:>8} {leading:>15,} {sizes['raw']:>7} {sizes['rle']:>7} {sizes['roaring']:>8} "
+              f"{bitfield.encoded_size('auto'):>7}  {'ok' if ok else f'expected {expected}'}")
+    if failures:
+        raise SystemExit(f"{failures} bitfield(s) with unexpected encoded sizes")
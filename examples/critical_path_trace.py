@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Critical path of finalization in an aggregation tree.
+
+This script runs one aggregation tree slot (Topology 3) with a causal
+trace, prints the chain of events that led to the final proof (the last
+signature an aggregator waited for, its proof, every recursive aggregation
+up the tree) and the time spent in each stage, and compares the wall time
+of the traced run with an untraced one.
+"""
+
+import argparse
+import time
+
+from beamsim.core import CausalTrace, Simulator
+from beamsim.network.latency import LatencyModel
+from beamsim.network.tree_topology import TreeTopology
+from beamsim.nodes import ValidatorPopulation
+from beamsim.utils.config import ConfigManager
+
+
+def run_slot(config, num_validators, arity, trace=None):
+    """
+    Run one aggregation tree slot, optionally traced.
+
+    Args:
+        config (ConfigManager): The simulation configuration.
+        num_validators (int): Number of validators.
+        arity (int): Children per aggregator.
+        trace (CausalTrace, optional): Trace attached to the simulator.
+
+    Returns:
+        tuple[float, ValidatorPopulation]: Wall time of the run (in seconds) and the validators.
+    """
+    seed = config.get("simulation.random_seed", 42)
+    simulator = Simulator(latency_model=LatencyModel(
+        config.get("network.network_latency_min_ms"),
+        config.get("network.network_latency_max_ms"),
+        config.get("network.network_latency_distribution"),
+        random_seed=seed,
+    ))
+    population = ValidatorPopulation(
+        simulator, num_validators, 1, config.get("network.signature_size"),
+        config.get("network.sign_latency_min_ms"), config.get("network.sign_latency_max_ms"),
+        config.get("network.sign_latency_distribution"), random_seed=seed,
+    )
+    topology = TreeTopology(simulator, arity)
+    levels = topology.create_aggregators(
+        num_validators,
+        config.get("network.aggregation_rate_per_sec"),
+        config.get("network.snark_recursion_aggregation_rate_per_sec"),
+        config.get("network.snark_proof_size"),
+        config.get("network.subnet_signature_threshold") * 100,
+        config.get("topology3.tree_proof_threshold"),
+        config.get("topology3.tree_finalization_threshold"),
+    )
+    topology.connect_nodes({"validators": population, "aggregators": levels})
+    if trace is not None:
+        trace.attach(simulator)
+
+    start_time = time.perf_counter()
+    population.start_signature_generation()
+    simulator.run()
+    return time.perf_counter() - start_time, population
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trace the critical path of finalization")
+    parser.add_argument("--validators", type=int, default=100000, help="Number of validators")
+    parser.add_argument("--arity", type=int, default=16, help="Tree arity")
+    args = parser.parse_args()
+
+    config = ConfigManager("config/default.yaml")
+    config.update_config("config/topology3.yaml")
+    untraced_time, _ = run_slot(config, args.validators, args.arity)
+    trace = CausalTrace()
+    traced_time, population = run_slot(config, args.validators, args.arity, trace)
+
+    path = trace.critical_path()
+    if not len(path):
+        raise SystemExit("No final proof was produced")
+    print(f"Critical path to the final proof ({len(path)} events):")
+    for line in trace.describe(path):
+        print(f"  {line}")
+    print(f"\n{'stage':<48} {'events':>6} {'time (ms)':>10} {'share':>6}")
+    total = path["time"][-1]
+    for row in trace.breakdown(path, population=population):
+        print(f"{row['stage']:<48} {row['events']:>6} {row['time_ms']:>10.1f} {row['time_ms'] / total:>6.1%}")
+    print(f"{'finalization':<48} {'':>6} {total:>10.1f}")
+    print(f"\n{len(trace)} events traced in {trace.nbytes / 2**20:.1f} MB; "
+          f"wall time {untraced_time:.2f} s untraced, {traced_time:.2f} s traced "
+          f"({traced_time / untraced_time:.2f}x)")
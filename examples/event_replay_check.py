@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Recording and replay check of the binary event trace.
+
+This script runs one aggregation tree slot (Topology 3) with a metrics
+collector and an event recorder, replays the recorded file into a fresh
+collector, and checks that both collectors hold the same per-node totals
+and latency quantiles, next to the time of the run and of the replay and
+the size of the file.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from beamsim.core import Simulator
+from beamsim.metrics import EventRecorder, MetricsCollector, read_events, replay_events
+from beamsim.network.latency import LatencyModel
+from beamsim.network.tree_topology import TreeTopology
+from beamsim.nodes import ValidatorPopulation
+from beamsim.utils.config import ConfigManager
+
+
+def run_slot(config, num_validators, arity, collector, recorder):
+    """
+    Run one aggregation tree slot with a collector and a recorder attached.
+
+    Args:
+        config (ConfigManager): The simulation configuration.
+        num_validators (int): Number of validators.
+        arity (int): Children per aggregator.
+        collector (MetricsCollector): Collector recording the run's metrics.
+        recorder (EventRecorder): Recorder writing the run's events.
+
+    Returns:
+        float: Wall time of the run (in seconds).
+    """
+    seed = config.get("simulation.random_seed", 42)
+    simulator = Simulator(latency_model=LatencyModel(
+        config.get("network.network_latency_min_ms"),
+        config.get("network.network_latency_max_ms"),
+        config.get("network.network_latency_distribution"),
+        random_seed=seed,
+    ))
+    population = ValidatorPopulation(
+        simulator, num_validators, 1, config.get("network.signature_size"),
+        config.get("network.sign_latency_min_ms"), config.get("network.sign_latency_max_ms"),
+        config.get("network.sign_latency_distribution"), random_seed=seed,
+    )
+    topology = TreeTopology(simulator, arity)
+    levels = topology.create_aggregators(
+        num_validators,
+        config.get("network.aggregation_rate_per_sec"),
+        config.get("network.snark_recursion_aggregation_rate_per_sec"),
+        config.get("network.snark_proof_size"),
+        config.get("network.subnet_signature_threshold") * 100,
+        config.get("topology3.tree_proof_threshold"),
+        config.get("topology3.tree_finalization_threshold"),
+    )
+    topology.connect_nodes({"validators": population, "aggregators": levels})
+    collector.attach(simulator)
+    recorder.attach(simulator)
+
+    start_time = time.perf_counter()
+    population.start_signature_generation()
+    simulator.run()
+    recorder.close()
+    return time.perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that replaying an event trace reproduces the metrics")
+    parser.add_argument("--validators", type=int, default=1000000, help="Number of validators")
+    parser.add_argument("--arity", type=int, default=16, help="Tree arity")
+    args = parser.parse_args()
+
+    config = ConfigManager("config/default.yaml")
+    config.update_config("config/topology3.yaml")
+    with tempfile.TemporaryDirectory() as output_dir:
+        path = os.path.join(output_dir, "events.bin")
+        live = MetricsCollector()
+        run_time = run_slot(config, args.validators, args.arity, live, EventRecorder(path))
+
+        start_time = time.perf_counter()
+        replayed = replay_events(path, MetricsCollector())
+        replay_time = time.perf_counter() - start_time
+
+        events, kinds = read_events(path)
+        print(f"{len(events):,} events of {len(kinds)} kinds, {os.path.getsize(path) / 2**20:.1f} MB")
+        for code, kind in enumerate(kinds):
+            print(f"  {np.count_nonzero(events['kind'] == code):>10,}  {kind['name']}")
+        print(f"run {run_time:.2f} s, replay {replay_time:.2f} s")
+
+    print(f"bandwidth totals match: {live.bandwidth_usage == replayed.bandwidth_usage}")
+    print(f"message counts match:   {live.message_counts == replayed.message_counts}")
+    for row_live, row_replayed in zip(live.latency_sketches.summary(), replayed.latency_sketches.summary()):
+        match = row_live == row_replayed
+        print(f"latency {row_live['message_type']:>12} at {row_live['role']:<18} "
+              f"p50 {row_live['p50']:>7.1f} ms, p99 {row_live['p99']:>7.1f} ms, match: {match}")
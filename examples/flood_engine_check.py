@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Cross-check and speed comparison of the time-stepped flooding engine.
+
+This script floods the same messages over the same gossipsub meshes twice:
+once with eager push through the event queue (BatchedGossipSub.publish) and
+once with TickFlood. With a constant latency both runs must agree exactly
+on every first arrival time, on the messages received and bytes sent per
+node, and on the total duplicates and bytes received (copies arriving at
+the same time are tie-broken differently, which moves duplicates between
+nodes); with random latencies the arrival time distributions are
+compared. It then reports the wall time of both engines.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from beamsim.core import Simulator
+from beamsim.core.message import Message
+from beamsim.network.gossipsub_topology import candidate_graph
+from beamsim.network.latency import LatencyModel
+from beamsim.protocols.flood import TickFlood
+from beamsim.protocols.gossipsub import BatchedGossipSub
+
+
+def build_mesh(simulator, num_nodes, seed):
+    """
+    Build and join the gossipsub meshes of one topic.
+
+    Args:
+        simulator (Simulator): The simulator the meshes schedule on.
+        num_nodes (int): Number of subscribed nodes.
+        seed (int): Seed for the candidate peers and mesh selection.
+
+    Returns:
+        BatchedGossipSub: The joined meshes.
+    """
+    indptr, indices = candidate_graph(num_nodes, np.ones(num_nodes, dtype=bool), 6, 12,
+                                      np.random.default_rng(seed))
+    mesh = BatchedGossipSub(simulator, indptr, indices, D=8, D_low=6, D_high=12, heartbeat_interval_ms=700,
+                            random_seed=seed, lazy_gossip=False, mcache_capacity=4096)
+    mesh.join()
+    return mesh
+
+
+def run_events(num_nodes, num_messages, size, latency_model, seed):
+    """
+    Flood messages with eager push through the event queue.
+
+    Args:
+        num_nodes (int): Number of nodes.
+        num_messages (int): Number of messages, published at time 0 by distinct nodes.
+        size (int): Wire size of every message (in bytes).
+        latency_model (LatencyModel): Latency of every send.
+        seed (int): Seed for the meshes and publishers.
+
+    Returns:
+        tuple: First arrival times (messages x nodes), the meshes and the wall time.
+    """
+    simulator = Simulator(latency_model=latency_model)
+    mesh = build_mesh(simulator, num_nodes, seed)
+    origins = np.random.default_rng(seed).choice(num_nodes, num_messages, replace=False)
+    arrivals = np.full((num_messages, num_nodes), np.inf)
+    arrivals[np.arange(num_messages), origins] = 0
+
+    def deliver(node, message):
+        arrivals[message.payload, node] = simulator.current_time
+
+    mesh.deliver_callback = deliver
+    start_time = time.perf_counter()
+    for index, origin in enumerate(origins.tolist()):
+        mesh.publish(origin, index + 1, Message(None, payload=index), size)
+    simulator.run()
+    return arrivals, mesh, time.perf_counter() - start_time
+
+
+def run_ticks(num_nodes, num_messages, size, latency_model, seed):
+    """
+    Flood the same messages over the same meshes with the time-stepped engine.
+
+    Args:
+        num_nodes (int): Number of nodes.
+        num_messages (int): Number of messages, published at time 0 by distinct nodes.
+        size (int): Wire size of every message (in bytes).
+        latency_model (LatencyModel): Latency of every send.
+        seed (int): Seed for the meshes and publishers.
+
+    Returns:
+        tuple: First arrival times (messages x nodes), the engine and the wall time.
+    """
+    mesh = build_mesh(Simulator(latency_model=latency_model), num_nodes, seed)
+    origins = np.random.default_rng(seed).choice(num_nodes, num_messages, replace=False)
+    flood = TickFlood(*mesh.flood_links(), latency_model)
+    start_time = time.perf_counter()
+    arrivals = flood.run(origins, 0, size)
+    return arrivals, flood, time.perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-check the time-stepped flooding engine")
+    parser.add_argument("--nodes", type=int, default=128, help="Nodes of the cross-checked topic")
+    parser.add_argument("--messages", type=int, default=64, help="Messages of the cross-check")
+    parser.add_argument("--bench-nodes", type=int, default=256, help="Nodes of the speed comparison")
+    parser.add_argument("--bench-messages", type=int, default=256, help="Messages of the speed comparison")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+    size = 3072
+
+    events, mesh, _ = run_events(args.nodes, args.messages, size, LatencyModel(20, 20, "uniform"), args.seed)
+    ticks, flood, _ = run_ticks(args.nodes, args.messages, size, LatencyModel(20, 20, "uniform"), args.seed)
+    checks = {
+        "arrival times": np.array_equal(events, ticks),
+        "messages received": np.array_equal(mesh.messages_received, flood.messages_received),
+        "bytes sent": np.array_equal(mesh.bytes_sent, flood.bytes_sent),
+        # Which of several same-time copies counts as first (and is not echoed back) is a tie-break,
+        # so duplicates are only equal in total
+        "total duplicates": mesh.duplicates_received.sum() == flood.duplicates_received.sum(),
+        "total bytes received": mesh.bytes_received.sum() == flood.bytes_received.sum(),
+    }
+    print("constant latency: " + ", ".join(f"{name} {'match' if ok else 'DIFFER'}" for name, ok in checks.items()))
+
+    events, mesh, _ = run_events(args.nodes, args.messages, size, LatencyModel(10, 100, "normal", args.seed),
+                                 args.seed)
+    ticks, flood, _ = run_ticks(args.nodes, args.messages, size, LatencyModel(10, 100, "normal", args.seed + 1),
+                                args.seed)
+    print(f"random latency:   reached {np.isfinite(events).mean():.3f} / {np.isfinite(ticks).mean():.3f}, "
+          f"p50 {np.median(events):.0f} / {np.median(ticks):.0f} ms, "
+          f"p99 {np.percentile(events, 99):.0f} / {np.percentile(ticks, 99):.0f} ms, "
+          f"duplicates/node {mesh.duplicates_received.mean():.1f} / {flood.duplicates_received.mean():.1f} "
+          f"(events / ticks)")
+
+    latency_model = LatencyModel(10, 100, "normal", args.seed)
+    _, mesh, event_time = run_events(args.bench_nodes, args.bench_messages, size, latency_model, args.seed)
+    _, flood, tick_time = run_ticks(args.bench_nodes, args.bench_messages, size, latency_model, args.seed)
+    deliveries = int(flood.messages_received.sum() + flood.duplicates_received.sum())
+    print(f"{args.bench_nodes} nodes x {args.bench_messages} messages ({deliveries} deliveries): "
+          f"events {event_time:.2f} s, ticks {tick_time:.2f} s over {flood.ticks} ticks, "
+          f"speedup {event_time / tick_time:.1f}x")
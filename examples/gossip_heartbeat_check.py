@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Heartbeat check of the gossipsub topology (Topology 1).
+
+This script publishes one signature per validator to its subnet topic in
+each of two slots, starts every topic's heartbeat without an end time, and
+runs the simulator without `max_time`. The run must finish: each topic's
+heartbeat stops once its meshes have no message in flight or in an mcache
+window, and the second slot's publishes start it again. Every node of a
+topic must receive every message published to it, and every message, taken
+from a message pool, must be back in the pool at the end.
+"""
+
+import argparse
+import time
+
+from beamsim.core import Simulator, MessagePool
+from beamsim.network import RoleAssignment, GossipsubTopology
+from beamsim.network.gossipsub_topology import GLOBAL_TOPIC
+from beamsim.network.latency import LatencyModel
+from beamsim.nodes import Validator
+from beamsim.utils.config import ConfigManager
+from beamsim.utils.random import RandomGenerator
+
+
+def run_slots(config, num_validators, num_subnets, num_slots):
+    """
+    Gossip one signature per validator and slot over the subnet topics.
+
+    Args:
+        config (ConfigManager): The simulation configuration.
+        num_validators (int): Number of validators.
+        num_subnets (int): Number of subnets (and subnet topics).
+        num_slots (int): Number of slots with publishes.
+
+    Returns:
+        tuple[Simulator, GossipsubTopology]: The finished simulator and the topology.
+    """
+    seed = config.get("simulation.random_seed", 42)
+    simulator = Simulator(latency_model=LatencyModel(
+        config.get("network.network_latency_min_ms"),
+        config.get("network.network_latency_max_ms"),
+        config.get("network.network_latency_distribution"),
+        random_seed=seed,
+    ), random_generator=RandomGenerator(seed), message_pool=MessagePool())
+    validators = [Validator(index, simulator, config.get("network.signature_size"),
+                            config.get("network.sign_latency_min_ms"), config.get("network.sign_latency_max_ms"))
+                  for index in range(num_validators)]
+    topology = GossipsubTopology.from_config(simulator, config)
+    topology.set_assignment(RoleAssignment(num_validators, num_subnets, 4, 8, random_seed=seed))
+    topology.connect_nodes({"validators": validators})
+
+    slot_time = config.get("network.slot_time")
+    for slot in range(num_slots):
+        for validator in validators:
+            message = simulator.create_message(validator, validator.signature, slot)
+            sign_time = simulator.random.randint(validator.sign_latency_min_ms, validator.sign_latency_max_ms)
+            simulator.schedule_event(slot * slot_time + sign_time, topology.route_message, validator, None, message)
+    topology.start_heartbeat()
+    simulator.run()
+    return simulator, topology
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that gossipsub heartbeats let the simulator finish")
+    parser.add_argument("--validators", type=int, default=512, help="Number of validators")
+    parser.add_argument("--subnets", type=int, default=8, help="Number of subnets")
+    parser.add_argument("--slots", type=int, default=2, help="Number of slots with publishes")
+    args = parser.parse_args()
+
+    config = ConfigManager("config/default.yaml")
+    config.update_config("config/topology1.yaml")
+    start = time.perf_counter()
+    simulator, topology = run_slots(config, args.validators, args.subnets, args.slots)
+    elapsed = time.perf_counter() - start
+
+    failures = []
+    heartbeats = [mesh.heartbeats for mesh in topology.topics.values()]
+    print(f"{len(topology.topics)} topics finished at {simulator.current_time / 1000:.1f} s simulated "
+          f"({elapsed:.2f} s wall), {min(heartbeats)}-{max(heartbeats)} heartbeats per topic")
+    if simulator.event_queue:
+        failures.append(f"{len(simulator.event_queue)} events left in the queue")
+    pool = simulator.message_pool
+    if len(pool.free) != pool.created:
+        failures.append(f"{pool.created - len(pool.free)} of {pool.created} pooled messages not released")
+    for topic, mesh in topology.topics.items():
+        if mesh.in_flight:
+            failures.append(f"{topic}: {mesh.in_flight} messages still in flight")
+        if topic == GLOBAL_TOPIC:
+            continue  # Only subnet aggregators publish there, and none did
+        members = int(mesh.subscribed.sum())
+        if int(mesh.messages_received.sum()) != members * (members - 1) * args.slots:
+            failures.append(f"{topic}: {int(mesh.messages_received.sum()):,} receipts")
+    if failures:
+        raise SystemExit("; ".join(failures))
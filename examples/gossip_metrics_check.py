@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Metrics check of the gossipsub topology (Topology 1).
+
+This script publishes one signature per validator to its subnet topic,
+gossips them over the meshes with a metrics collector attached, and checks
+that the collector counted the gossip deliveries: with every metric on,
+message counts, bandwidth and latency must all be non-zero (one delivery
+per node that received a message for the first time), with latencies keyed
+by the recipients' assigned roles; with every metric
+off, nothing may be recorded.
+"""
+
+import argparse
+
+from beamsim.core import Simulator
+from beamsim.metrics import MetricsCollector
+from beamsim.metrics.sketch import role_name
+from beamsim.network import RoleAssignment, GossipsubTopology
+from beamsim.network.assignment import ROLE_GLOBAL_AGGREGATOR, ROLE_SUBNET_AGGREGATOR, ROLE_VALIDATOR
+from beamsim.network.latency import LatencyModel
+from beamsim.nodes import Validator
+from beamsim.utils.config import ConfigManager
+from beamsim.utils.random import RandomGenerator
+
+# Roles of the recipients of subnet gossip: plain validators and subnet
+# aggregators, each possibly also a global aggregator
+ROLE_KEYS = {role_name(ROLE_VALIDATOR | extra) for extra in (
+    0, ROLE_SUBNET_AGGREGATOR, ROLE_GLOBAL_AGGREGATOR, ROLE_SUBNET_AGGREGATOR | ROLE_GLOBAL_AGGREGATOR)}
+
+
+def run_gossip(config, num_validators, num_subnets, collect):
+    """
+    Gossip one signature per validator over the subnet topics.
+
+    Args:
+        config (ConfigManager): The simulation configuration.
+        num_validators (int): Number of validators.
+        num_subnets (int): Number of subnets (and subnet topics).
+        collect (bool): Switch every metric of the collector on, or every one off.
+
+    Returns:
+        tuple[MetricsCollector, int]: The collector and the number of first receipts in the meshes.
+    """
+    seed = config.get("simulation.random_seed", 42)
+    simulator = Simulator(latency_model=LatencyModel(
+        config.get("network.network_latency_min_ms"),
+        config.get("network.network_latency_max_ms"),
+        config.get("network.network_latency_distribution"),
+        random_seed=seed,
+    ), random_generator=RandomGenerator(seed))
+    validators = [Validator(index, simulator, config.get("network.signature_size"),
+                            config.get("network.sign_latency_min_ms"), config.get("network.sign_latency_max_ms"))
+                  for index in range(num_validators)]
+    topology = GossipsubTopology.from_config(simulator, config)
+    topology.set_assignment(RoleAssignment(num_validators, num_subnets, 4, 8, random_seed=seed))
+    topology.connect_nodes({"validators": validators})
+
+    collector = MetricsCollector(collect_bandwidth_usage=collect, collect_message_counts=collect,
+                                 collect_latency=collect, roles=topology.assignment.roles)
+    collector.attach(simulator)
+    for validator in validators:
+        message = simulator.create_message(validator, validator.signature, 0)
+        sign_time = simulator.random.randint(validator.sign_latency_min_ms, validator.sign_latency_max_ms)
+        simulator.schedule_event(sign_time, topology.route_message, validator, None, message)
+    for mesh in topology.topics.values():
+        mesh.start(until=config.get("network.slot_time"))
+    simulator.run()
+    return collector, sum(int(mesh.messages_received.sum()) for mesh in topology.topics.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that gossip deliveries reach the metrics collector")
+    parser.add_argument("--validators", type=int, default=2048, help="Number of validators")
+    parser.add_argument("--subnets", type=int, default=16, help="Number of subnets")
+    args = parser.parse_args()
+
+    config = ConfigManager("config/default.yaml")
+    config.update_config("config/topology1.yaml")
+    failures = []
+    for collect in (True, False):
+        collector, receipts = run_gossip(config, args.validators, args.subnets, collect)
+        messages = sum(collector.message_counts.values())
+        received = sum(collector.bandwidth_usage.values())
+        latencies = sum(sketch.count for sketch in collector.latency_sketches.sketches.values())
+        print(f"metrics {'on ' if collect else 'off'}: {receipts:,} first receipts in the meshes, "
+              f"{messages:,} messages counted, {received / 2**20:.1f} MB received, {latencies:,} latencies")
+        if collect and not (messages == receipts and received and latencies == receipts):
+            failures.append("gossip deliveries are missing from the collector")
+        roles = {role for _, role in collector.latency_sketches.sketches}
+        if collect and not (len(roles) > 1 and roles <= ROLE_KEYS):
+            failures.append("latencies are not keyed by the recipients' assigned roles")
+        if not collect and (messages or received or latencies):
+            failures.append("switched-off metrics were recorded")
+    if failures:
+        raise SystemExit("; ".join(failures))
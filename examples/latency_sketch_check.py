@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Accuracy and merge check of the latency quantile sketches.
+
+This script sketches latency samples of several seeds in parallel worker
+processes, merges the returned sketches and compares their p50/p99/p999
+with the exact quantiles of all samples, next to the memory of the
+sketch and of the raw samples.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from beamsim.metrics.sketch import LatencySketch
+
+
+def sample_latencies(seed, num_samples):
+    """
+    Draw heavy-tailed latency samples for one seed.
+
+    Args:
+        seed (int): Seed of the samples.
+        num_samples (int): Number of samples.
+
+    Returns:
+        numpy.ndarray: The latencies (ms).
+    """
+    rng = np.random.default_rng(seed)
+    return np.concatenate((rng.lognormal(3.5, 0.5, num_samples - num_samples // 100),
+                           rng.pareto(1.5, num_samples // 100) * 200 + 100))
+
+
+def sketch_seed(seed, num_samples, relative_accuracy):
+    """
+    Sketch the samples of one seed.
+
+    Args:
+        seed (int): Seed of the samples.
+        num_samples (int): Number of samples.
+        relative_accuracy (float): Relative error bound of the sketch.
+
+    Returns:
+        LatencySketch: The sketch of the seed's samples.
+    """
+    sketch = LatencySketch(relative_accuracy)
+    sketch.record_many(sample_latencies(seed, num_samples))
+    return sketch
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the accuracy of merged latency sketches")
+    parser.add_argument("--seeds", type=int, default=8, help="Seeds, sketched in parallel")
+    parser.add_argument("--samples", type=int, default=1_000_000, help="Samples per seed")
+    parser.add_argument("--accuracy", type=float, default=0.01, help="Relative accuracy of the sketches")
+    args = parser.parse_args()
+
+    seeds = range(args.seeds)
+    with ProcessPoolExecutor() as executor:
+        sketches = list(executor.map(sketch_seed, seeds, [args.samples] * args.seeds,
+                                     [args.accuracy] * args.seeds))
+    merged = LatencySketch(args.accuracy)
+    for sketch in sketches:
+        merged.merge(sketch)
+
+    samples = np.concatenate([sample_latencies(seed, args.samples) for seed in seeds])
+    quantiles = [0.5, 0.99, 0.999]
+    exact = np.quantile(samples, quantiles, method="lower")
+    estimates = merged.quantiles(quantiles)
+    print(f"{merged.count} samples from {args.seeds} seeds; sketch {merged.counts.nbytes / 1024:.1f} KB, "
+          f"samples {samples.nbytes / 2**20:.1f} MB")
+    for q, exact_value, estimate in zip(quantiles, exact, estimates):
+        print(f"p{q * 100:<5g} exact {exact_value:>9.2f} ms, sketch {estimate:>9.2f} ms, "
+              f"relative error {abs(estimate - exact_value) / exact_value:.4f}")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Throughput cost of the metrics switches.
+
+This script runs the same aggregation tree slot (Topology 3) without a
+metrics collector, with a collector whose metrics are all switched off,
+with latency only and with every metric on, and reports the wall time,
+the deliveries simulated per second and the finalization time, which
+must not depend on the metrics.
+"""
+
+import argparse
+import time
+
+from beamsim.core import Simulator, Node
+from beamsim.metrics import MetricsCollector
+from beamsim.network.latency import LatencyModel
+from beamsim.network.tree_topology import TreeTopology
+from beamsim.nodes import ValidatorPopulation
+from beamsim.utils.config import ConfigManager
+
+MODES = {
+    "none": None,
+    "off": dict(collect_bandwidth_usage=False, collect_message_counts=False, collect_latency=False),
+    "latency": dict(collect_bandwidth_usage=False, collect_message_counts=False, collect_latency=True),
+    "all": dict(collect_bandwidth_usage=True, collect_message_counts=True, collect_latency=True),
+}
+
+
+class FinalProofProbe(Node):
+    """
+    A node recording when the root sent the final proof.
+    """
+
+    def __init__(self, node_id, simulator):
+        """
+        Initialize the probe.
+
+        Args:
+            node_id (int): Unique identifier for the probe.
+            simulator: The simulator instance managing the simulation.
+        """
+        super().__init__(node_id, simulator)
+        self.finalized_at = None
+
+    def receive_message(self, message):
+        """
+        Record the send time of the final proof.
+
+        Args:
+            message (Message): The message carrying the final proof.
+        """
+        self.finalized_at = message.timestamp
+
+
+def run_slot(config, num_validators, arity, switches):
+    """
+    Run one aggregation tree slot with the given metrics switches.
+
+    Args:
+        config (ConfigManager): The simulation configuration.
+        num_validators (int): Number of validators.
+        arity (int): Children per aggregator.
+        switches (dict | None): MetricsCollector switches, or None for no collector.
+
+    Returns:
+        tuple[float, int, float | None]: Wall time of the run (in seconds), number
+        of deliveries, and finalization time (ms).
+    """
+    seed = config.get("simulation.random_seed", 42)
+    simulator = Simulator(latency_model=LatencyModel(
+        config.get("network.network_latency_min_ms"),
+        config.get("network.network_latency_max_ms"),
+        config.get("network.network_latency_distribution"),
+        random_seed=seed,
+    ))
+    population = ValidatorPopulation(
+        simulator, num_validators, 1, config.get("network.signature_size"),
+        config.get("network.sign_latency_min_ms"), config.get("network.sign_latency_max_ms"),
+        config.get("network.sign_latency_distribution"), random_seed=seed,
+    )
+    topology = TreeTopology(simulator, arity)
+    levels = topology.create_aggregators(
+        num_validators,
+        config.get("network.aggregation_rate_per_sec"),
+        config.get("network.snark_recursion_aggregation_rate_per_sec"),
+        config.get("network.snark_proof_size"),
+        config.get("network.subnet_signature_threshold") * 100,
+        config.get("topology3.tree_proof_threshold"),
+        config.get("topology3.tree_finalization_threshold"),
+    )
+    topology.connect_nodes({"validators": population, "aggregators": levels})
+    probe = FinalProofProbe(-1, simulator)
+    levels[-1][0].add_neighbor(probe)
+
+    collector = None
+    if switches is not None:
+        collector = MetricsCollector(**switches)
+        collector.attach(simulator)
+
+    start_time = time.perf_counter()
+    population.start_signature_generation()
+    simulator.run()
+    elapsed_time = time.perf_counter() - start_time
+    deliveries = num_validators + sum(len(level) for level in levels[:-1]) + 1
+    return elapsed_time, deliveries, probe.finalized_at
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare throughput with metrics switched on and off")
+    parser.add_argument("--validators", type=int, default=1000000, help="Number of validators")
+    parser.add_argument("--arity", type=int, default=16, help="Tree arity")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per mode; the fastest is reported")
+    args = parser.parse_args()
+
+    config = ConfigManager("config/default.yaml")
+    config.update_config("config/topology3.yaml")
+    print(f"{'metrics':>8} {'wall (s)':>9} {'deliveries/s':>13} {'slowdown':>9} {'final (ms)':>11}")
+    baseline = None
+    for mode, switches in MODES.items():
+        runs = [run_slot(config, args.validators, args.arity, switches) for _ in range(args.repeats)]
+        elapsed_time, deliveries, finalized_at = min(runs)
+        baseline = baseline or elapsed_time
+        finalized = f"{finalized_at:.0f}" if finalized_at is not None else "-"
+        print(f"{mode:>8} {elapsed_time:>9.2f} {deliveries / elapsed_time:>13,.0f} "
+              f"{elapsed_time / baseline:>8.2f}x {finalized:>11}")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Memory and throughput report for streamed metrics.
+
+This script records the same latency measurements into a MetricsCollector
+keeping them in a list and into one streaming them to a MetricsSink,
+for growing record counts, and reports the traced peak memory and the
+time per record. The sink's peak stays at its buffer pool.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from beamsim.metrics import MetricsCollector, MetricsSink
+
+
+def measure(make_collector, latencies):
+    """
+    Record latencies one by one, once timed and once with memory tracing.
+
+    Args:
+        make_collector (callable): Function building a fresh MetricsCollector.
+        latencies (list[float]): The latencies.
+
+    Returns:
+        tuple[float, int, MetricsCollector]: Time per record (in microseconds),
+        traced peak memory (in bytes) and the timed collector.
+    """
+    collector = make_collector()
+    start_time = time.perf_counter()
+    for latency in latencies:
+        collector.record_latency(latency)
+    collector.close()
+    elapsed_time = time.perf_counter() - start_time
+
+    traced = make_collector()
+    tracemalloc.start()
+    for latency in latencies:
+        traced.record_latency(latency)
+    traced.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_time / len(latencies) * 1e6, peak, collector
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare in-memory and streamed metrics")
+    parser.add_argument("--records", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="Record counts to measure")
+    parser.add_argument("--format", default="auto", help="Sink format: parquet, arrow, csv or auto")
+    args = parser.parse_args()
+
+    print(f"{'records':>9} {'list peak MB':>12} {'list us/rec':>11} {'sink peak MB':>12} {'sink us/rec':>11} "
+          f"{'file MB':>8} {'loaded':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for num_records in args.records:
+            latencies = np.random.default_rng(num_records).uniform(10, 100, num_records).tolist()
+            list_time, list_peak, _ = measure(lambda: MetricsCollector(keep_samples=True), latencies)
+            path = os.path.join(directory, f"latencies_{num_records}")
+            sink_time, sink_peak, collector = measure(
+                lambda: MetricsCollector(MetricsSink(path, output_format=args.format)), latencies)
+            loaded = len(collector.get_latencies())
+            print(f"{num_records:>9} {list_peak / 2**20:>12.1f} {list_time:>11.2f} {sink_peak / 2**20:>12.1f} "
+                  f"{sink_time:>11.2f} {os.path.getsize(collector.sink.path) / 2**20:>8.1f} {loaded:>9}")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Memory and build-time report for validator populations.
+
+This script compares building validators as individual `Validator` objects
+with building a struct-of-arrays `ValidatorPopulation`, at 16k, 100k and
+1M validators.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from beamsim.core import Simulator
+from beamsim.nodes import Validator, ValidatorPopulation
+
+
+def measure(build):
+    """
+    Measure the wall time and traced memory of a build function.
+
+    Args:
+        build (callable): Function building and returning the validators.
+
+    Returns:
+        tuple[float, int]: Build time (in seconds) and allocated memory (in bytes).
+    """
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = build()
+    elapsed_time = time.perf_counter() - start_time
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed_time, memory
+
+
+def build_objects(simulator, num_validators):
+    """
+    Build one Validator object per validator.
+
+    Args:
+        simulator (Simulator): The simulator instance.
+        num_validators (int): Number of validators to build.
+
+    Returns:
+        list[Validator]: The validators.
+    """
+    return [Validator(i, simulator, 3072, 10, 100) for i in range(num_validators)]
+
+
+def build_population(simulator, num_validators):
+    """
+    Build a struct-of-arrays population.
+
+    Args:
+        simulator (Simulator): The simulator instance.
+        num_validators (int): Number of validators to build.
+
+    Returns:
+        ValidatorPopulation: The population.
+    """
+    return ValidatorPopulation(simulator, num_validators, 128, 3072, 10, 100, redundancy_factor=3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report validator population memory and build time")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[16384, 100000, 1000000],
+        help="Population sizes to measure"
+    )
+    args = parser.parse_args()
+
+    simulator = Simulator()
+    print(f"{'validators':>12} {'layout':>12} {'build (s)':>10} {'memory (MB)':>12} {'bytes/node':>11}")
+    for num_validators in args.sizes:
+        for layout, build in (("objects", build_objects), ("arrays", build_population)):
+            elapsed_time, memory = measure(lambda: build(simulator, num_validators))
+            print(f"{num_validators:>12} {layout:>12} {elapsed_time:>10.3f} "
+                  f"{memory / (1024 * 1024):>12.1f} {memory / num_validators:>11.1f}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Bandwidth report for subnet proof sharing among global aggregators.
+
+This script sends one proof from every subnet aggregator to a few random
+global aggregators and compares three modes: no sharing between global
+aggregators, naive relaying of every new proof to all peers, and relaying
+only to peers not known to have the proof (per-peer bitsets). Naive
+relaying delivers every proof about (global aggregators)^2 times, so it is
+also by far the slowest mode to simulate.
+"""
+
+import argparse
+import random
+
+from beamsim.core import Simulator, Node
+from beamsim.network.latency import LatencyModel
+from beamsim.nodes import SubnetAggregator, GlobalAggregator
+from beamsim.nodes.global_aggregator import connect_global_aggregators
+
+
+class FinalProofProbe(Node):
+    """
+    A node recording when the first final proof was sent.
+    """
+
+    def __init__(self, node_id, simulator):
+        """
+        Initialize the probe.
+
+        Args:
+            node_id (int): Unique identifier for the probe.
+            simulator: The simulator instance managing the simulation.
+        """
+        super().__init__(node_id, simulator)
+        self.finalized_at = None
+
+    def receive_message(self, message):
+        """
+        Record the send time of the first final proof.
+
+        Args:
+            message (Message): The message carrying a final proof.
+        """
+        if self.finalized_at is None or message.timestamp < self.finalized_at:
+            self.finalized_at = message.timestamp
+
+
+def run_sharing(mode, num_subnet_aggregators, num_global_aggregators, fanout, proof_size, seed):
+    """
+    Run one round of proof delivery and sharing.
+
+    Args:
+        mode (str): "off", "naive" or "dedup".
+        num_subnet_aggregators (int): Number of subnet proofs.
+        num_global_aggregators (int): Number of global aggregators.
+        fanout (int): Global aggregators each subnet aggregator sends its proof to.
+        proof_size (int): Size of a SNARK proof (in bytes).
+        seed (int): Seed for wiring, send times and latencies.
+
+    Returns:
+        tuple[list[GlobalAggregator], FinalProofProbe]: The global aggregators and the probe.
+    """
+    rng = random.Random(seed)
+    simulator = Simulator(latency_model=LatencyModel(10, 100, "normal", random_seed=seed))
+    global_aggregators = [GlobalAggregator(num_subnet_aggregators + index, simulator, 100, proof_size, 67)
+                          for index in range(num_global_aggregators)]
+    if mode != "off":
+        connect_global_aggregators(global_aggregators, deduplicate=(mode == "dedup"))
+    probe = FinalProofProbe(-1, simulator)
+    for global_aggregator in global_aggregators:
+        global_aggregator.add_neighbor(probe)
+        global_aggregator.expected_proofs = num_subnet_aggregators if mode != "off" else 0
+
+    for index in range(num_subnet_aggregators):
+        subnet_aggregator = SubnetAggregator(index, simulator, 1000, proof_size, 90)
+        subnet_aggregator.neighbors[:] = rng.sample(global_aggregators, fanout)
+        if mode == "off":
+            for global_aggregator in subnet_aggregator.neighbors:
+                global_aggregator.expected_proofs += 1
+        subnet_aggregator.slot_state(0)  # Open slot 0 as a first signature would
+        simulator.schedule_event(rng.uniform(0, 500), subnet_aggregator._send_snark_proof, 0)
+    simulator.run()
+    return global_aggregators, probe
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare proof sharing modes among global aggregators")
+    parser.add_argument("--subnet-aggregators", type=int, default=2048, help="Number of subnet proofs")
+    parser.add_argument("--global-aggregators", type=int, default=128, help="Number of global aggregators")
+    parser.add_argument("--fanout", type=int, default=1, help="Global aggregators receiving each proof")
+    parser.add_argument("--proof-size", type=int, default=131072, help="SNARK proof size (in bytes)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'final (ms)':>11} {'forwarded':>10} {'GB sent':>8} {'MB/aggregator':>14} "
+          f"{'duplicates':>11} {'suppressed':>11}")
+    for mode in ("off", "naive", "dedup"):
+        global_aggregators, probe = run_sharing(mode, args.subnet_aggregators, args.global_aggregators,
+                                                args.fanout, args.proof_size, args.seed)
+        forwarded = sum(aggregator.proofs_forwarded for aggregator in global_aggregators)
+        forwarded_bytes = sum(aggregator.proof_bytes_forwarded for aggregator in global_aggregators)
+        duplicates = sum(aggregator.duplicate_proofs for aggregator in global_aggregators)
+        suppressed = sum(aggregator.forwards_suppressed for aggregator in global_aggregators)
+        finalized = f"{probe.finalized_at:.0f}" if probe.finalized_at is not None else "-"
+        print(f"{mode:>6} {finalized:>11} {forwarded:>10} {forwarded_bytes / 1024 ** 3:>8.2f} "
+              f"{forwarded_bytes / len(global_aggregators) / 1024 ** 2:>14.1f} {duplicates:>11} {suppressed:>11}")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Role count check of the aggregator assignment.
+
+This script draws the roles of many seeds and rounds and checks that every
+draw has exactly the configured number of subnet aggregators per subnet,
+global aggregators and peers holding every role, and that every all-role
+peer is a subnet aggregator of its own subnet.
+"""
+
+import argparse
+
+import numpy as np
+
+from beamsim.network import RoleAssignment
+from beamsim.network.assignment import ROLE_GLOBAL_AGGREGATOR, ROLE_SUBNET_AGGREGATOR
+
+
+def check_round(assignment):
+    """
+    Check the role counts of the assignment's current round.
+
+    Args:
+        assignment (RoleAssignment): The assignment to check.
+
+    Returns:
+        list[str]: Descriptions of the counts that are wrong.
+    """
+    failures = []
+    all_roles = assignment.peers_with_all_roles()
+    if len(all_roles) != assignment.num_peers_with_all_roles:
+        failures.append(f"{len(all_roles)} all-role peers instead of {assignment.num_peers_with_all_roles}")
+    if not np.array_equal(np.sort(all_roles), np.sort(assignment.global_aggregators[:len(all_roles)])):
+        failures.append("all-role peers are not the first global aggregators")
+    subnet_aggregators = assignment.subnet_aggregators
+    if not np.all(assignment.subnet_of[subnet_aggregators] == np.arange(assignment.num_subnets)[:, None]):
+        failures.append("subnet aggregator outside its subnet")
+    if len(np.unique(subnet_aggregators)) != subnet_aggregators.size:
+        failures.append("duplicate subnet aggregators")
+    if np.count_nonzero(assignment.roles & ROLE_SUBNET_AGGREGATOR) != subnet_aggregators.size:
+        failures.append("wrong number of subnet aggregators")
+    if np.count_nonzero(assignment.roles & ROLE_GLOBAL_AGGREGATOR) != assignment.num_global_aggregators:
+        failures.append("wrong number of global aggregators")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the role counts of the aggregator assignment")
+    parser.add_argument("--seeds", type=int, default=50, help="Number of random seeds")
+    parser.add_argument("--rounds", type=int, default=4, help="Number of rounds per seed")
+    args = parser.parse_args()
+
+    # (validators, subnets, aggregators per subnet, global aggregators, all-role peers)
+    cases = [(1000, 10, 1, 10, 5), (1000, 10, 1, 10, 10), (1000, 4, 2, 20, 8), (2048, 16, 4, 64, 32)]
+    failures = []
+    for case in cases:
+        wrong = 0
+        for seed in range(args.seeds):
+            assignment = RoleAssignment(*case, random_seed=seed)
+            for round_number in range(args.rounds):
+                assignment.assign(round_number)
+                problems = check_round(assignment)
+                if problems:
+                    wrong += 1
+                    failures.append(f"{case} seed {seed} round {round_number}: {', '.join(problems)}")
+        print(f"{case}: {args.seeds * args.rounds - wrong} / {args.seeds * args.rounds} draws correct")
+    if failures:
+        raise SystemExit("\n".join(failures[:10]))
@@ -11,110 +11,73 @@ import time
 import argparse
 import matplotlib.pyplot as plt
 
-from beamsim.core import Simulator
+from beamsim.core import EngineProfiler, Simulator
 from beamsim.utils.config import ConfigManager
 from beamsim.metrics.collector import MetricsCollector
+from beamsim.metrics.snapshots import MetricsSnapshots
+from beamsim.metrics.telemetry import LiveTelemetry
+from beamsim.metrics.visualizer import MetricsVisualizer
 
 
 # Define the visualization functions that were missing
-def plot_aggregation_progress(metrics_collector):
+def plot_aggregation_progress(metrics_collector, slot=0):
     """
     Plot the progress of signature aggregation over time.
 
     Args:
         metrics_collector: The metrics collector containing aggregation data.
+        slot (int): The slot to plot.
 
     Returns:
         matplotlib.figure.Figure: The figure containing the plot.
     """
     fig, ax = plt.subplots(figsize=(10, 6))
 
-    # If metrics_collector doesn't have this data yet, create empty plot
-    if not hasattr(metrics_collector, 'aggregation_progress'):
-        ax.set_xlabel('Time (ms)')
-        ax.set_ylabel('Signatures Aggregated')
-        ax.set_title('Signature Aggregation Progress')
-        return fig
+    progress = metrics_collector.aggregation_progress
+    if progress is not None:
+        for level in progress.levels:
+            times, fractions = progress.steps(level, slot)
+            if len(times):
+                ax.step(times, fractions * 100, where='post', label=f'{level} proofs')
+        ax.legend()
 
-    times = list(metrics_collector.aggregation_progress.keys())
-    counts = list(metrics_collector.aggregation_progress.values())
-
-    ax.plot(times, counts, marker='o', linestyle='-', color='blue')
     ax.set_xlabel('Time (ms)')
-    ax.set_ylabel('Signatures Aggregated')
+    ax.set_ylabel('Signatures Aggregated (%)')
     ax.set_title('Signature Aggregation Progress')
     ax.grid(True)
 
     return fig
 
 
-def plot_bandwidth_usage(metrics_collector):
+def plot_bandwidth_over_time(snapshots):
     """
-    Plot bandwidth usage for each node.
+    Plot the cumulative bandwidth usage of all nodes from the periodic snapshots.
 
     Args:
-        metrics_collector: The metrics collector containing bandwidth data.
+        snapshots (MetricsSnapshots): Snapshots tracking the collector's totals.
 
     Returns:
         matplotlib.figure.Figure: The figure containing the plot.
     """
     fig, ax = plt.subplots(figsize=(10, 6))
-
-    # If metrics_collector doesn't have this data yet, create empty plot
-    if not hasattr(metrics_collector, 'bandwidth_usage') or not metrics_collector.bandwidth_usage:
-        ax.set_xlabel('Node ID')
-        ax.set_ylabel('Bandwidth Usage (bytes)')
-        ax.set_title('Bandwidth Usage per Node')
-        return fig
-
-    nodes = list(metrics_collector.bandwidth_usage.keys())
-    usage = list(metrics_collector.bandwidth_usage.values())
-
-    ax.bar(nodes, usage, color='blue')
-    ax.set_xlabel('Node ID')
-    ax.set_ylabel('Bandwidth Usage (bytes)')
-    ax.set_title('Bandwidth Usage per Node')
-
-    return fig
-
-
-def plot_message_count(metrics_collector):
-    """
-    Plot the number of messages sent by each node.
-
-    Args:
-        metrics_collector: The metrics collector containing message count data.
-
-    Returns:
-        matplotlib.figure.Figure: The figure containing the plot.
-    """
-    fig, ax = plt.subplots(figsize=(10, 6))
-
-    # If metrics_collector doesn't have this data yet, create empty plot
-    if not hasattr(metrics_collector, 'message_counts') or not metrics_collector.message_counts:
-        ax.set_xlabel('Node ID')
-        ax.set_ylabel('Message Count')
-        ax.set_title('Messages Sent per Node')
-        return fig
-
-    nodes = list(metrics_collector.message_counts.keys())
-    counts = list(metrics_collector.message_counts.values())
-
-    ax.bar(nodes, counts, color='green')
-    ax.set_xlabel('Node ID')
-    ax.set_ylabel('Message Count')
-    ax.set_title('Messages Sent per Node')
+    times, usage = snapshots.history("bandwidth_usage")
+    ax.plot(times, usage.sum(axis=1) / (1024 * 1024), color='blue')
+    ax.set_xlabel('Time (ms)')
+    ax.set_ylabel('Bandwidth Usage (MB)')
+    ax.set_title('Bandwidth Usage Over Time')
+    ax.grid(True)
 
     return fig
 
 
-def run_simulation(config_path, output_dir=None):
+def run_simulation(config_path, output_dir=None, profile=False):
     """
     Run a simple simulation with the specified configuration.
 
     Args:
         config_path (str): Path to the configuration file.
         output_dir (str, optional): Directory to save output files.
+        profile (bool): Run in profiler mode and print its summary.
     """
     # Create output directory if needed
     if output_dir and not os.path.exists(output_dir):
@@ -138,11 +101,14 @@ def run_simulation(config_path, output_dir=None):
     elif topology_number == 2:
         from beamsim.network.grid_topology import GridTopology
         topology = GridTopology(config_manager)
+    elif topology_number == 3:
+        from beamsim.network.tree_topology import TreeTopology
+        topology = TreeTopology(config_manager)
     else:
         raise ValueError(f"Unknown topology number: {topology_number}")
 
     # Initialize metrics collector
-    metrics_collector = MetricsCollector()
+    metrics_collector = MetricsCollector.from_config(config_manager)
 
     # Add required attributes to metrics_collector for the summary
     metrics_collector.total_signatures_collected = 0
@@ -150,10 +116,9 @@ def run_simulation(config_path, output_dir=None):
     metrics_collector.total_bandwidth_used = 0
     metrics_collector.aggregation_completed = False
     metrics_collector.aggregation_completion_time = 0
-    metrics_collector.aggregation_progress = {}
 
-    # Create and set up the simulator
-    simulator = Simulator()
+    # Create and set up the simulator; aggregators report their coverage to the collector's progress
+    simulator = Simulator(progress=metrics_collector.aggregation_progress)
 
     # Store configuration, topology, and metrics as attributes
     simulator.config_manager = config_manager
@@ -163,15 +128,36 @@ def run_simulation(config_path, output_dir=None):
     # Register the metrics collector with the topology
     topology.register_metrics_collector(metrics_collector)
 
+    # Snapshot the counters every metrics.log_interval_ms
+    snapshots = MetricsSnapshots.from_config(simulator, config_manager)
+    snapshots.track_collector(metrics_collector, config_manager.get("network.num_validators"))
+    snapshots.track_progress(metrics_collector.aggregation_progress)
+    snapshots.start()
+
+    # Count and time the event handlers in profiler mode
+    profiler = None
+    if profile:
+        profiler = EngineProfiler.from_config(config_manager)
+        profiler.attach(simulator)
+
     # Set up other necessary components based on config
     max_time = config_manager.get("simulation.max_time_seconds", 300) * 1000  # Convert to ms
 
+    # Serve live stats while the simulation runs if metrics.telemetry_port is set
+    telemetry = LiveTelemetry.from_config(simulator, config_manager, end_time=max_time)
+    if telemetry is not None:
+        print(f"Live telemetry at {telemetry.start()}")
+
     # Run the simulation with the configured max time
     print("Starting simulation...")
     start_time = time.time()
     simulator.run(max_time=max_time)
     elapsed_time = time.time() - start_time
     print(f"Simulation completed in {elapsed_time:.2f} seconds")
+    if telemetry is not None:
+        telemetry.stop()
+    if profiler is not None:
+        print(profiler.format_table())
 
     # Generate plots if output directory is provided
     if output_dir:
@@ -180,21 +166,18 @@ def run_simulation(config_path, output_dir=None):
         fig.savefig(os.path.join(output_dir, "aggregation_progress.png"))
         plt.close(fig)
 
-        # Plot bandwidth usage
-        fig = plot_bandwidth_usage(metrics_collector)
-        fig.savefig(os.path.join(output_dir, "bandwidth_usage.png"))
+        # Plot bandwidth usage over time
+        fig = plot_bandwidth_over_time(snapshots)
+        fig.savefig(os.path.join(output_dir, "bandwidth_over_time.png"))
         plt.close(fig)
 
-        # Plot message count
-        fig = plot_message_count(metrics_collector)
-        fig.savefig(os.path.join(output_dir, "message_count.png"))
-        plt.close(fig)
+        # Plot bandwidth usage, message counts and latencies aggregated over nodes
+        MetricsVisualizer(metrics_collector, snapshots=snapshots).render(output_dir)
 
         # Save metrics to CSV files
-        if hasattr(metrics_collector, 'save_to_csv'):
-            metrics_collector.save_to_csv(output_dir)
-        else:
-            print("Warning: save_to_csv method not implemented in MetricsCollector")
+        metrics_collector.save_to_csv(output_dir)
+        if profiler is not None:
+            profiler.to_json(os.path.join(output_dir, "profile.json"))
 
         print(f"Results saved to {output_dir}")
 
@@ -214,10 +197,15 @@ if __name__ == "__main__":
         default="results",
         help="Directory to save output files"
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-handler event counts and wall times and save them to profile.json"
+    )
     args = parser.parse_args()
 
     # Run the simulation
-    simulator, metrics = run_simulation(args.config, args.output_dir)
+    simulator, metrics = run_simulation(args.config, args.output_dir, args.profile)
 
     # Print summary statistics
     print("\nSimulation Summary:")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Structural comparison of the BEAMSim topologies.
+
+This script builds the direct (0), gossipsub (1), grid (2) and aggregation
+tree (3) topologies for the configured validator count, without running a
+simulation, and reports their degree statistics, effective diameter,
+share of unreachable node pairs, validator -> aggregator hop counts and
+minimum edge cut estimate. Topologies whose subnets only reach the global
+aggregators through direct sends (0 and 2) are disconnected graphs, so
+their minimum cut is 0.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from beamsim.core import Simulator
+from beamsim.network import RoleAssignment, DirectTopology, GossipsubTopology, GridTopology, TreeTopology
+from beamsim.network.analysis import analyze
+from beamsim.network.latency import LatencyModel
+from beamsim.nodes import Validator
+from beamsim.utils.config import ConfigManager
+
+
+def build_topology(config, topology_number, num_validators):
+    """
+    Build and connect one topology.
+
+    Args:
+        config (ConfigManager): The simulation configuration.
+        topology_number (int): 0, 1, 2 or 3.
+        num_validators (int): Number of validators.
+
+    Returns:
+        NetworkTopology: The connected topology.
+    """
+    seed = config.get("simulation.random_seed", 42)
+    simulator = Simulator(latency_model=LatencyModel(random_seed=seed))
+    validators = [Validator(index, simulator, config.get("network.signature_size"),
+                            config.get("network.sign_latency_min_ms"), config.get("network.sign_latency_max_ms"))
+                  for index in range(num_validators)]
+    if topology_number == 3:
+        topology = TreeTopology(simulator, config.get("topology3.tree_arity"))
+        levels = topology.create_aggregators(
+            num_validators,
+            config.get("network.aggregation_rate_per_sec"),
+            config.get("network.snark_recursion_aggregation_rate_per_sec"),
+            config.get("network.snark_proof_size"),
+            config.get("network.subnet_signature_threshold") * 100,
+            config.get("topology3.tree_proof_threshold"),
+            config.get("topology3.tree_finalization_threshold"),
+        )
+        topology.connect_nodes({"validators": validators, "aggregators": levels})
+        return topology
+
+    config.config["network"]["num_validators"] = num_validators
+    assignment = RoleAssignment.from_config(config, topology_number)
+    if topology_number == 0:
+        topology = DirectTopology(simulator, config.get("topology0.redundancy_factor"))
+    elif topology_number == 1:
+        topology = GossipsubTopology.from_config(simulator, config)
+    else:
+        topology = GridTopology(simulator)
+    topology.set_assignment(assignment)
+    topology.connect_nodes({"validators": validators})
+    return topology
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report structural numbers of the BEAMSim topologies")
+    parser.add_argument("--validators", type=int, default=16384, help="Number of validators")
+    parser.add_argument("--topologies", type=int, nargs="+", default=[0, 1, 2, 3], help="Topologies to analyze")
+    parser.add_argument("--sources", type=int, default=128, help="Sources sampled for the diameter")
+    parser.add_argument("--cut-pairs", type=int, default=8, help="Node pairs sampled for the minimum cut")
+    args = parser.parse_args()
+
+    config = ConfigManager("config/default.yaml")
+    print(f"{'topology':>8} {'nodes':>7} {'edges':>8} {'degree min/mean/max':>20} {'eff. diam':>9} "
+          f"{'max hops':>8} {'unreach %':>9} {'agg hops mean/max':>17} {'min cut':>7} "
+          f"{'build (s)':>9} {'analysis (s)':>12}")
+    for topology_number in args.topologies:
+        start_time = time.perf_counter()
+        topology = build_topology(config, topology_number, args.validators)
+        build_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        report = analyze(topology, args.sources, args.cut_pairs, config.get("simulation.random_seed", 42))
+        analysis_time = time.perf_counter() - start_time
+
+        degree = report["degree"]
+        degrees = f"{degree['min']}/{degree['mean']:.1f}/{degree['max']}"
+        hop_counts = report["aggregator_hops"]
+        if hop_counts is not None and hop_counts.sum():
+            mean_hops = (np.arange(len(hop_counts)) * hop_counts).sum() / hop_counts.sum()
+            aggregator_hops = f"{mean_hops:.2f}/{len(hop_counts) - 1}"
+        else:
+            aggregator_hops = "-"
+        print(f"{topology_number:>8} {report['num_nodes']:>7} {report['num_edges']:>8} {degrees:>20} "
+              f"{report['diameter']['effective_diameter']:>9.2f} {report['diameter']['max_hops']:>8} "
+              f"{report['diameter']['unreachable_fraction'] * 100:>9.1f} {aggregator_hops:>17} "
+              f"{report['min_cut']['sampled_min_cut']:>7} {build_time:>9.2f} {analysis_time:>12.2f}")
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Finalization latency and per-node bandwidth of the aggregation tree topology.
+
+This script runs one slot of the k-ary aggregation tree (Topology 3) for a
+range of validator counts and arities, and reports the tree depth, the time
+at which the root broadcasts the final proof, the encoded size of its
+participation bitfield, and the largest number of bytes any node of each
+level receives.
+
+As a baseline, it first runs the flat subnet -> global aggregation of
+topologies 0-2 with each topology's role counts: validators send to the
+aggregators of their subnet (`redundancy_factor` of them for Topology 0),
+each subnet aggregator sends its proof to one global aggregator, and the
+global aggregators share the proofs among themselves. Signatures and proofs
+travel as direct sends in every baseline row, so the rows only differ in
+their role counts. Subnets are merged for small validator counts until
+every subnet holds at least `num_subnet_aggregators` validators.
+"""
+
+import argparse
+import time
+
+from beamsim.core import Simulator, Node, SlotDriver
+from beamsim.network.latency import LatencyModel
+from beamsim.network.tree_topology import TreeTopology
+from beamsim.nodes import ValidatorPopulation, SubnetAggregator, GlobalAggregator
+from beamsim.utils.config import ConfigManager
+
+
+class FinalProofProbe(Node):
+    """
+    A node recording when the first final proof was sent.
+    """
+
+    def __init__(self, node_id, simulator):
+        """
+        Initialize the probe.
+
+        Args:
+            node_id (int): Unique identifier for the probe.
+            simulator: The simulator instance managing the simulation.
+        """
+        super().__init__(node_id, simulator)
+        self.finalized_at = None
+        self.num_signatures = 0
+        self.bitfield_size = 0
+
+    def receive_message(self, message):
+        """
+        Record the send time, signature count and bitfield size of the first final proof.
+
+        Args:
+            message (Message): The message carrying a final proof.
+        """
+        if self.finalized_at is not None and message.timestamp >= self.finalized_at:
+            return
+        self.finalized_at = message.timestamp
+        self.num_signatures = message.payload.num_signatures
+        self.bitfield_size = message.payload.wire_size - message.payload.proof_size
+
+
+def build_simulator(config):
+    """
+    Build a simulator with the configured latency model.
+
+    Args:
+        config (ConfigManager): The simulation configuration.
+
+    Returns:
+        Simulator: The simulator.
+    """
+    return Simulator(latency_model=LatencyModel(
+        config.get("network.network_latency_min_ms"),
+        config.get("network.network_latency_max_ms"),
+        config.get("network.network_latency_distribution"),
+        random_seed=config.get("simulation.random_seed", 42),
+    ))
+
+
+def run_flat(config, num_validators, topology_number):
+    """
+    Run one slot of the flat subnet -> global aggregation with a topology's role counts.
+
+    Args:
+        config (ConfigManager): The simulation configuration.
+        num_validators (int): Number of validators.
+        topology_number (int): Topology (0, 1 or 2) whose role counts to use.
+
+    Returns:
+        tuple: The two aggregator levels, the probe, and the wall time of the run (in seconds).
+    """
+    section = f"topology{topology_number}"
+    seed = config.get("simulation.random_seed", 42)
+    per_subnet = config.get(f"{section}.num_subnet_aggregators")
+    redundancy_factor = config.get(f"{section}.redundancy_factor") or 1
+    num_subnets = max(1, min(config.get(f"{section}.num_subnets"), num_validators // per_subnet))
+    simulator = build_simulator(config)
+    population = ValidatorPopulation(
+        simulator, num_validators, num_subnets, config.get("network.signature_size"),
+        config.get("network.sign_latency_min_ms"), config.get("network.sign_latency_max_ms"),
+        config.get("network.sign_latency_distribution"), redundancy_factor=redundancy_factor, random_seed=seed,
+    )
+    node_id = num_validators
+    subnet_aggregators = [SubnetAggregator(node_id + index, simulator, config.get("network.aggregation_rate_per_sec"),
+                                           config.get("network.snark_proof_size"),
+                                           config.get("network.subnet_signature_threshold") * 100,
+                                           config.get("network.participation_encoding", "auto"))
+                          for index in range(num_subnets * per_subnet)]
+    node_id += len(subnet_aggregators)
+    global_aggregators = [GlobalAggregator(node_id + index, simulator,
+                                           config.get("network.snark_recursion_aggregation_rate_per_sec"),
+                                           config.get("network.snark_proof_size"),
+                                           config.get("topology3.tree_finalization_threshold"))
+                          for index in range(min(config.get(f"{section}.num_global_aggregators"), num_validators))]
+    for index, aggregator in enumerate(subnet_aggregators):
+        aggregator.neighbors[:] = [global_aggregators[index % len(global_aggregators)]]
+    probe = FinalProofProbe(-1, simulator)
+    for global_aggregator in global_aggregators:
+        global_aggregator.add_neighbor(probe)
+    driver = SlotDriver(simulator, population, subnet_aggregators, global_aggregators,
+                        redundancy_factor=redundancy_factor, random_seed=seed, share_proofs=True)
+
+    start_time = time.perf_counter()
+    driver.start(1)
+    simulator.run(max_time=config.get("simulation.max_time_seconds") * 1000)
+    return [subnet_aggregators, global_aggregators], probe, time.perf_counter() - start_time
+
+
+def run_tree(config, num_validators, arity):
+    """
+    Run one slot of the aggregation tree.
+
+    Args:
+        config (ConfigManager): The simulation configuration.
+        num_validators (int): Number of validators.
+        arity (int): Children per aggregator.
+
+    Returns:
+        tuple: The topology, the probe, and the wall time of the run (in seconds).
+    """
+    seed = config.get("simulation.random_seed", 42)
+    simulator = build_simulator(config)
+    population = ValidatorPopulation(
+        simulator, num_validators, 1, config.get("network.signature_size"),
+        config.get("network.sign_latency_min_ms"), config.get("network.sign_latency_max_ms"),
+        config.get("network.sign_latency_distribution"), random_seed=seed,
+    )
+    topology = TreeTopology(simulator, arity)
+    levels = topology.create_aggregators(
+        num_validators,
+        config.get("network.aggregation_rate_per_sec"),
+        config.get("network.snark_recursion_aggregation_rate_per_sec"),
+        config.get("network.snark_proof_size"),
+        config.get("network.subnet_signature_threshold") * 100,
+        config.get("topology3.tree_proof_threshold"),
+        config.get("topology3.tree_finalization_threshold"),
+        participation_encoding=config.get("network.participation_encoding", "auto"),
+    )
+    topology.connect_nodes({"validators": population, "aggregators": levels})
+    probe = FinalProofProbe(-1, simulator)
+    levels[-1][0].add_neighbor(probe)
+
+    start_time = time.perf_counter()
+    population.start_signature_generation()
+    simulator.run(max_time=config.get("simulation.max_time_seconds") * 1000)
+    return topology, probe, time.perf_counter() - start_time
+
+
+def max_bytes_received(levels, config):
+    """
+    Get the largest number of bytes received by a node of each level.
+
+    Leaf (subnet) aggregators receive one signature per validator child, the
+    levels above one proof per child aggregator (or per shared subnet proof).
+
+    Args:
+        levels (list[list[Node]]): The aggregators of every level, from the leaves up.
+        config (ConfigManager): The simulation configuration.
+
+    Returns:
+        list[int]: Maximum bytes received per node, from the leaves up to the root.
+    """
+    signature_size = config.get("network.signature_size")
+    proof_size = config.get("network.snark_proof_size")
+    received = [max(leaf.expected_signatures for leaf in levels[0]) * signature_size]
+    for level in levels[1:]:
+        received.append(max(aggregator.expected_proofs for aggregator in level) * proof_size)
+    return received
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report aggregation tree finalization latency and bandwidth")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[16384, 1000000],
+        help="Validator counts to run"
+    )
+    parser.add_argument(
+        "--arities",
+        type=int,
+        nargs="+",
+        default=[4, 16, 64],
+        help="Tree arities to run"
+    )
+    parser.add_argument(
+        "--baselines",
+        type=int,
+        nargs="*",
+        default=[0, 1, 2],
+        help="Flat topologies run as a baseline for every validator count"
+    )
+    parser.add_argument(
+        "--config",
+        default="config/topology3.yaml",
+        help="Path to configuration file"
+    )
+    args = parser.parse_args()
+
+    config = ConfigManager("config/default.yaml")
+    config.update_config(args.config)
+    print(f"{'validators':>12} {'topology':>9} {'arity':>6} {'depth':>6} {'final (ms)':>11} {'signatures':>11} "
+          f"{'bitfield B':>11} {'wall (s)':>9}  max KB received per node, leaves -> root")
+
+    def report(num_validators, topology_number, arity, levels, probe, elapsed_time):
+        finalized = f"{probe.finalized_at:.0f}" if probe.finalized_at is not None else "-"
+        received = " ".join(f"{size / 1024:.0f}" for size in max_bytes_received(levels, config))
+        print(f"{num_validators:>12} {topology_number:>9} {arity:>6} {len(levels):>6} {finalized:>11} "
+              f"{probe.num_signatures:>11} {probe.bitfield_size:>11} {elapsed_time:>9.2f}  {received}")
+
+    for num_validators in args.sizes:
+        for topology_number in args.baselines:
+            levels, probe, elapsed_time = run_flat(config, num_validators, topology_number)
+            report(num_validators, topology_number, "-", levels, probe, elapsed_time)
+        for arity in args.arities:
+            topology, probe, elapsed_time = run_tree(config, num_validators, arity)
+            report(num_validators, 3, arity, topology.levels, probe, elapsed_time)
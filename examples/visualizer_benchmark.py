@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Rendering time of the standard metrics charts.
+
+This script fills metrics collectors and counter snapshots with synthetic
+per-node totals and latencies of a run with the given number of nodes,
+then reports the time to render the three standard charts (bandwidth
+usage, message counts and latency distribution by role) of one run, and
+of many runs serially and with `render_runs`.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from beamsim.core import Simulator
+from beamsim.metrics import MetricsCollector, MetricsSnapshots, MetricsVisualizer
+from beamsim.metrics.visualizer import render_runs
+from beamsim.network.assignment import ROLE_VALIDATOR, ROLE_SUBNET_AGGREGATOR, ROLE_GLOBAL_AGGREGATOR
+
+
+def synthetic_run(num_nodes, num_snapshots, seed):
+    """
+    Build the visualizer of a synthetic run.
+
+    Args:
+        num_nodes (int): Number of nodes.
+        num_snapshots (int): Snapshots of the per-node counters.
+        seed (int): Seed of the run.
+
+    Returns:
+        MetricsVisualizer: The run's visualizer.
+    """
+    rng = np.random.default_rng(seed)
+    roles = np.full(num_nodes, ROLE_VALIDATOR, dtype=np.uint8)
+    roles[rng.choice(num_nodes, num_nodes // 32, replace=False)] |= ROLE_SUBNET_AGGREGATOR
+    roles[rng.choice(num_nodes, 4, replace=False)] |= ROLE_GLOBAL_AGGREGATOR
+
+    collector = MetricsCollector()
+    rates = rng.lognormal(8, 1, num_nodes) * np.where(roles > ROLE_VALIDATOR, 20, 1)
+    simulator = Simulator()
+    snapshots = MetricsSnapshots(simulator, capacity=num_snapshots)
+    snapshots.track_collector(collector, num_nodes)
+    for index in range(1, num_snapshots + 1):
+        simulator.current_time = index * 1000
+        collector.bandwidth_usage = dict(zip(range(num_nodes), (rates * index).astype(np.int64).tolist()))
+        collector.message_counts = dict(zip(range(num_nodes), (rates * index / 3072).astype(np.int64).tolist()))
+        snapshots.take()
+    for role, scale in ((ROLE_SUBNET_AGGREGATOR, 50), (ROLE_GLOBAL_AGGREGATOR, 120)):
+        collector.latency_sketches.record_many(rng.lognormal(np.log(scale), 0.4, num_nodes * 4), "any", role)
+    return MetricsVisualizer(collector, roles, snapshots)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the rendering of the standard metrics charts")
+    parser.add_argument("--nodes", type=int, default=16384, help="Nodes per run")
+    parser.add_argument("--snapshots", type=int, default=300, help="Snapshots per run")
+    parser.add_argument("--runs", type=int, default=8, help="Runs rendered in a batch")
+    args = parser.parse_args()
+
+    visualizers = [synthetic_run(args.nodes, args.snapshots, seed) for seed in range(args.runs)]
+    with tempfile.TemporaryDirectory() as output_dir:
+        visualizers[0].render(os.path.join(output_dir, "warmup"))
+        start_time = time.perf_counter()
+        paths = visualizers[0].render(os.path.join(output_dir, "single"))
+        single_time = time.perf_counter() - start_time
+        print(f"one run of {args.nodes:,} nodes x {args.snapshots} snapshots: {single_time:.2f} s "
+              f"for {len(paths)} charts")
+
+        run_dirs = [os.path.join(output_dir, f"run{index}") for index in range(args.runs)]
+        start_time = time.perf_counter()
+        for visualizer, run_dir in zip(visualizers, run_dirs):
+            visualizer.render(run_dir)
+        serial_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        render_runs(visualizers, run_dirs)
+        parallel_time = time.perf_counter() - start_time
+        print(f"{args.runs} runs: {serial_time:.2f} s serially, {parallel_time:.2f} s with render_runs "
+              f"({serial_time / parallel_time:.1f}x)")